@@ -0,0 +1,303 @@
+from functools import lru_cache
+
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.exceptions import PermissionDenied
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.forms.models import BaseInlineFormSet
+from django.http import FileResponse, StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from django.utils.html import format_html
+
+from apps.core import search
+from apps.core.blobs import original_name_attname
+from apps.core.db import read_alias
+from apps.core.exports import export_columns, stream_csv, write_xlsx
+from apps.core.models import DocumentOwnerModel, Job
+from apps.core.pagination import CURSOR_VAR, FastPaginator
+from apps.core.utils import sign_urls, storage_key
+
+
+def presign_files(objs, field_name='file'):
+    """
+    Sign the files of every object in one batch before the page renders, so
+    each row's ``signed_file_url`` is served from the presigned URL cache.
+    """
+    items = []
+    for obj in objs:
+        name = getattr(obj, field_name).name
+        if not name:
+            continue
+        attname = original_name_attname(type(obj), obj._meta.get_field(field_name))
+        filename = getattr(obj, attname) if attname else ''
+        # Keyed as signed_file_url signs it, so its cache lookups hit.
+        items.append((storage_key(name), filename) if filename else storage_key(name))
+    return sign_urls(items)
+
+
+class PresignedFileInlineFormSet(BaseInlineFormSet):
+    signed_file_field = 'file'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not getattr(self, '_files_presigned', False):
+            # Evaluates (and caches) the formset queryset once.
+            presign_files(queryset, self.signed_file_field)
+            self._files_presigned = True
+        return queryset
+
+
+class PresignedFileAdminMixin:
+    """ModelAdmin mixin that presigns the file links of a changelist page."""
+    signed_file_field = 'file'
+
+    def get_changelist_instance(self, request):
+        cl = super().get_changelist_instance(request)
+        presign_files(cl.result_list, self.signed_file_field)
+        return cl
+
+
+class SelectRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    """RelatedFieldListFilter whose choice labels may follow other relations."""
+
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        queryset = field.remote_field.model._default_manager.select_related()
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return [(obj.pk, str(obj)) for obj in queryset]
+
+
+class SearchRankChangeList(ChangeList):
+    """Lists search results best match first unless a column sort is chosen."""
+
+    def get_ordering(self, request, queryset):
+        ordering = super().get_ordering(request, queryset)
+        if ORDER_VAR not in self.params and 'search_rank' in queryset.query.annotations:
+            ordering = ['search_rank', *ordering]
+        return ordering
+
+
+class IndexedSearchMixin:
+    """
+    Answer the changelist search box from the search index (apps.core.search)
+    instead of ``icontains`` over ``search_fields``.
+
+    ``search_index`` lists ``(lookup, model)`` pairs: rows match when
+    ``lookup`` is one of the ``model`` objects found, e.g. ``('vendor',
+    Vendor)``. The default searches the admin's own model. As with
+    ``search_fields``, every word must match one of the pairs. With a single
+    pair the best SEARCH_RESULT_LIMIT matches come first. Terms without a word
+    of three characters fall back to ``search_fields``.
+    """
+    search_index = None
+
+    def get_search_index(self):
+        return self.search_index or [('pk', self.model)]
+
+    def get_changelist(self, request, **kwargs):
+        return SearchRankChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        words = search.terms(search_term)
+        if not search.indexable(words):
+            return super().get_search_results(request, queryset, search_term)
+        using = queryset.db
+        search_index = self.get_search_index()
+
+        if len(search_index) > 1:
+            for word in words:
+                condition = Q()
+                for lookup, model in search_index:
+                    condition |= Q(**{f'{lookup}__in': RawSQL(*search.match_sql(model, [word], using))})
+                queryset = queryset.filter(condition)
+            return queryset, False
+
+        # One entry holds all of an object's words: one subquery for the term.
+        lookup, model = search_index[0]
+        queryset = queryset.filter(**{f'{lookup}__in': RawSQL(*search.match_sql(model, words, using))})
+        if ORDER_VAR not in request.GET:
+            pks = search.search(model, search_term, using=using)
+            queryset = queryset.annotate(search_rank=Case(
+                *[When(**{lookup: pk}, then=Value(rank)) for rank, pk in enumerate(pks)],
+                default=Value(len(pks)),
+                output_field=IntegerField(),
+            ))
+        return queryset, False
+
+
+class FastPaginationChangeList:
+    """
+    ChangeList mixin for FastPaginator: the cursor is not a filter, and the
+    links to the neighbouring pages carry one so those pages seek.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        new_params = {CURSOR_VAR: None, **(new_params or {})}
+        paginator = getattr(self, 'paginator', None)
+        if PAGE_VAR in new_params and isinstance(paginator, FastPaginator):
+            new_params[CURSOR_VAR] = paginator.cursor_for(new_params[PAGE_VAR])
+        return super().get_query_string(new_params, remove)
+
+
+@lru_cache(maxsize=None)
+def _fast_pagination_changelist(changelist):
+    return type(changelist.__name__, (FastPaginationChangeList, changelist), {})
+
+
+class FastPaginationMixin:
+    """
+    Page the changelist with FastPaginator (apps.core.pagination): counts
+    above PAGINATION_COUNT_THRESHOLD rows are estimated, and next / previous
+    page links seek down the ordering index instead of using OFFSET.
+
+    The unfiltered total ("N total") is not shown, as it would be counted.
+    """
+    paginator = FastPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return _fast_pagination_changelist(super().get_changelist(request, **kwargs))
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page, cursor=request.GET.get(CURSOR_VAR),
+        )
+
+
+COMPLIANCE_COLORS = {
+    DocumentOwnerModel.VALID: '#3D5A3D',
+    DocumentOwnerModel.EXPIRING: '#FF6B35',
+    DocumentOwnerModel.EXPIRED: '#C0392B',
+    DocumentOwnerModel.NONE: '#6c757d',
+}
+
+
+def compliance_badge(owner):
+    """The compliance status of a DocumentOwnerModel, colored, with its date."""
+    expire_on = f' ({owner.documents_expire_on:%d-%m-%Y})' if owner.documents_expire_on else ''
+    return format_html(
+        '<span style="font-weight: 600; color: {};">{}{}</span>',
+        COMPLIANCE_COLORS.get(owner.compliance_status, ''), owner.get_compliance_status_display(), expire_on,
+    )
+
+
+class DocumentComplianceMixin:
+    """
+    ``compliance`` column for DocumentOwnerModel admins, read from the
+    owner's own columns (apps.core.expiry); sorts by the expiry date.
+    """
+
+    @admin.display(description='Status dokumen', ordering='documents_expire_on')
+    def compliance(self, obj):
+        return compliance_badge(obj)
+
+
+class ImportAdminMixin:
+    """Adds an "Import" page that streams a CSV/XLSX file through ``importer_class``."""
+    importer_class = None
+    change_list_template = 'admin/import_change_list.html'
+
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name=f'{opts.app_label}_{opts.model_name}_import',
+            ),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            raise PermissionDenied
+
+        result = None
+        upload = request.FILES.get('file') if request.method == 'POST' else None
+        if upload is not None:
+            importer = self.importer_class(dry_run=bool(request.POST.get('dry_run')))
+            try:
+                result = importer.run(upload.file, upload.name)
+            except ValueError as exc:
+                self.message_user(request, str(exc), messages.ERROR)
+            else:
+                level = messages.WARNING if result.failed else messages.SUCCESS
+                self.message_user(request, f'Import {upload.name}: {result}', level)
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f'Import {self.model._meta.verbose_name_plural}',
+            'columns': self.importer_class.required_columns,
+            'optional_columns': [
+                name for name in self.importer_class.fields
+                if name not in self.importer_class.required_columns
+            ],
+            'result': result,
+        }
+        return TemplateResponse(request, 'admin/import_form.html', context)
+
+
+def _export_filename(modeladmin, extension):
+    return f'{modeladmin.model._meta.model_name}-{timezone.now():%Y%m%d-%H%M%S}.{extension}'
+
+
+@admin.action(description='Export ke CSV', permissions=['view'])
+def export_as_csv(modeladmin, request, queryset):
+    """
+    Stream the selected rows, or every row matching the current filters and
+    search when "select all" is used, as CSV. Opt-in: list it in the
+    ModelAdmin's ``actions``; ``export_fields`` picks the columns.
+    """
+    columns = export_columns(modeladmin.model, getattr(modeladmin, 'export_fields', None))
+    # Streamed after the view returns, so the replica is chosen explicitly.
+    queryset = queryset.using(read_alias(request))
+    response = StreamingHttpResponse(
+        stream_csv(queryset, columns), content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{_export_filename(modeladmin, "csv")}"'
+    return response
+
+
+@admin.action(description='Export ke Excel (.xlsx)', permissions=['view'])
+def export_as_xlsx(modeladmin, request, queryset):
+    columns = export_columns(modeladmin.model, getattr(modeladmin, 'export_fields', None))
+    try:
+        output = write_xlsx(queryset.using(read_alias(request)), columns)
+    except ValueError as exc:
+        modeladmin.message_user(request, str(exc), messages.ERROR)
+        return None
+    return FileResponse(
+        output, as_attachment=True, filename=_export_filename(modeladmin, 'xlsx'),
+    )
+
+
+class JobAdmin(admin.ModelAdmin):
+    """The jobs of the database broker, to look into failures and retry them."""
+    list_display = ['task', 'queue', 'status', 'attempts', 'eta', 'started_at', 'finished_at']
+    list_filter = ['status', 'queue']
+    search_fields = ['task']
+    ordering = ['-eta']
+    readonly_fields = [field.name for field in Job._meta.fields]
+    actions = ['retry']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Jalankan ulang', permissions=['change'])
+    def retry(self, request, queryset):
+        rows = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.PENDING, eta=timezone.now(), finished_at=None,
+        )
+        self.message_user(request, f'{rows} job dijadwalkan ulang.', messages.SUCCESS)
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,21 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.core'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from apps.core import search
+        from apps.core.auth import connect_auth_invalidation
+        from apps.core.blobs import connect_blob_tracking
+        from apps.core.cache import connect_model_invalidation
+        from apps.core.expiry import connect_expiry_tracking
+
+        connect_blob_tracking()
+        connect_model_invalidation()
+        connect_auth_invalidation()
+        connect_expiry_tracking()
+        post_migrate.connect(search.populate_empty_index, sender=self)
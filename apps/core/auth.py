@@ -0,0 +1,101 @@
+"""
+Authentication backend that serves the logged-in user and their permissions
+from the cache (apps.core.cache), so an admin page no longer reads
+``auth_user``, ``auth_user_user_permissions`` and ``auth_group_permissions``
+on every request.
+
+Entries are versioned per user, and the permission entries also on Group
+and Permission; the receivers below bump those versions when a user is
+saved or deleted (deactivation, password change, staff or superuser flag)
+or when a user's groups or permissions, or a group's permissions, change.
+It only caches with AUTH_CACHE, on by default with a cache shared by every
+process (CACHE_URL): a per-process cache would only forget the entries of
+the process that made the change. Otherwise it is Django's ModelBackend.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Group, Permission
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from apps.core import cache
+
+USER_CACHE_TIMEOUT = 300
+
+
+def _user_namespace(pk):
+    return f'auth:user:{pk}'
+
+
+def invalidate_user(pk):
+    cache.invalidate(_user_namespace(pk))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        if not settings.AUTH_CACHE:
+            return super().get_user(user_id)
+        UserModel = get_user_model()
+
+        def load():
+            # Cached as None too, so a stale session costs no query either.
+            return UserModel._default_manager.filter(pk=user_id).first()
+
+        key = cache.cache_key(_user_namespace(user_id), 'user')
+        user = cache.get_or_set(key, load, USER_CACHE_TIMEOUT)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not settings.AUTH_CACHE:
+            return super().get_all_permissions(user_obj, obj)
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            key = cache.cache_key(_user_namespace(user_obj.pk), 'perms', models=[Group, Permission])
+            compute = partial(super().get_all_permissions, user_obj)
+            user_obj._perm_cache = cache.get_or_set(key, compute, USER_CACHE_TIMEOUT)
+        return user_obj._perm_cache
+
+
+# Invalidated when the change commits: a request that reads the old rows
+# before then cannot cache them under the new version.
+
+def _user_changed(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    transaction.on_commit(partial(invalidate_user, instance.pk), using=using)
+
+
+def _user_relations_changed(sender, instance, action, reverse, pk_set, using=DEFAULT_DB_ALIAS, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        transaction.on_commit(partial(invalidate_user, instance.pk), using=using)
+    elif action == 'post_clear':
+        # A group or permission was detached from every user: pk_set is None.
+        transaction.on_commit(partial(cache.invalidate_models, Group, Permission), using=using)
+    else:
+        for pk in pk_set:
+            transaction.on_commit(partial(invalidate_user, pk), using=using)
+
+
+def _permissions_changed(sender, action='post_delete', using=DEFAULT_DB_ALIAS, **kwargs):
+    if action.startswith('post_'):
+        transaction.on_commit(partial(cache.invalidate_models, Group, Permission), using=using)
+
+
+def connect_auth_invalidation():
+    UserModel = get_user_model()
+    post_save.connect(_user_changed, sender=UserModel, dispatch_uid='auth-cache-user-save')
+    post_delete.connect(_user_changed, sender=UserModel, dispatch_uid='auth-cache-user-delete')
+    for relation in ('groups', 'user_permissions'):
+        field = UserModel._meta.get_field(relation)
+        m2m_changed.connect(
+            _user_relations_changed, sender=field.remote_field.through,
+            dispatch_uid=f'auth-cache-user-{relation}',
+        )
+    m2m_changed.connect(_permissions_changed, sender=Group.permissions.through, dispatch_uid='auth-cache-group')
+    # Deleting them drops their rows in the m2m tables without m2m_changed.
+    for model in (Group, Permission):
+        post_delete.connect(_permissions_changed, sender=model, dispatch_uid=f'auth-cache-delete-{model.__name__}')
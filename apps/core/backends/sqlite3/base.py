@@ -0,0 +1,30 @@
+"""
+SQLite backend with an opt-in production profile (SQLITE_TUNED).
+
+New connections get SQLITE_PRAGMAS (WAL, busy timeout, cache, ...), and
+transactions start with BEGIN IMMEDIATE, as Django 5.1's ``transaction_mode``
+option does. A deferred BEGIN takes the write lock only at the first write;
+if another worker committed since the transaction's first read, SQLite
+cannot upgrade it and fails at once with "database is locked", without
+waiting for busy_timeout. Taking the lock up front makes concurrent writers
+queue instead, at the cost of serializing atomic blocks that only read.
+"""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        self.tuned = getattr(settings, 'SQLITE_TUNED', False)
+        if self.tuned:
+            for name, value in settings.SQLITE_PRAGMAS.items():
+                conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if getattr(self, 'tuned', False):
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
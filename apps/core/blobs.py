@@ -0,0 +1,133 @@
+"""
+Reference counting for content-addressed blobs.
+
+Every model file field stored in a ContentAddressedStorageMixin storage is
+tracked: saving a row that points at a new blob increments its count, and
+replacing the file or deleting the row decrements the old one. Counts are
+only lowered here; ``gc_blobs`` deletes blobs that stayed unreferenced for a
+grace period, and can recount them from the tables if they drift (e.g. after
+``QuerySet.update`` or raw inserts).
+
+A blob's name is its hash, so a model keeps the name a file was uploaded
+under in ``<field>_name`` (e.g. ``file_name``), when it has one; downloads
+are presigned with it (apps.core.utils.content_disposition).
+"""
+import posixpath
+from collections import Counter
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, F, FileField
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.utils import timezone
+
+from apps.core.storage import ContentAddressedStorageMixin
+
+_tracked = {}
+
+
+def tracked_fields():
+    """``{model: [file fields]}`` for every content-addressed file field."""
+    return dict(_tracked)
+
+
+def adjust_ref_count(name, delta):
+    from apps.core.models import Blob
+
+    if name:
+        Blob.objects.filter(name=name).update(
+            ref_count=F('ref_count') + delta, updated_at=timezone.now(),
+        )
+
+
+def original_name_attname(model, field):
+    """Attname of the field keeping ``field``'s uploaded file name, or None."""
+    try:
+        return model._meta.get_field(f'{field.name}_name').attname
+    except FieldDoesNotExist:
+        return None
+
+
+def set_original_name(instance, field, filename):
+    attname = original_name_attname(type(instance), field)
+    if attname and filename:
+        setattr(instance, attname, posixpath.basename(filename)[:255])
+
+
+def _remember_original_names(sender, instance, raw=False, **kwargs):
+    # Before FileField.pre_save stores the file under its blob name.
+    if raw:
+        return
+    for field in _tracked[sender]:
+        if field.attname not in instance.__dict__:
+            continue
+        file = getattr(instance, field.attname)
+        if file and not file._committed:
+            set_original_name(instance, field, file.name)
+
+
+def _remember_files(sender, instance, **kwargs):
+    # Raw names straight from __dict__, without building FieldFiles. Deferred
+    # fields are absent and stay unknown.
+    instance._blob_names = {
+        field.attname: instance.__dict__[field.attname]
+        for field in _tracked[sender] if field.attname in instance.__dict__
+    }
+
+
+def _count_saved_files(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_blob_names', {})
+    for field in _tracked[sender]:
+        if update_fields is not None and field.name not in update_fields:
+            continue
+        if not created and field.attname not in previous:
+            continue
+        old = None if created else previous[field.attname]
+        new = getattr(instance, field.attname).name or None
+        old = getattr(old, 'name', old) or None
+        if new != old:
+            adjust_ref_count(new, 1)
+            adjust_ref_count(old, -1)
+        previous[field.attname] = new
+    instance._blob_names = previous
+
+
+def _count_deleted_files(sender, instance, **kwargs):
+    for field in _tracked[sender]:
+        if field.attname in instance.__dict__:
+            adjust_ref_count(getattr(instance, field.attname).name, -1)
+
+
+def connect_blob_tracking():
+    for model in apps.get_models():
+        fields = [
+            field for field in model._meta.concrete_fields
+            if isinstance(field, FileField)
+            and isinstance(field.storage, ContentAddressedStorageMixin)
+        ]
+        if not fields:
+            continue
+        _tracked[model] = fields
+        post_init.connect(_remember_files, sender=model, dispatch_uid=f'blobs-init-{model._meta.label}')
+        pre_save.connect(_remember_original_names, sender=model, dispatch_uid=f'blobs-names-{model._meta.label}')
+        post_save.connect(_count_saved_files, sender=model, dispatch_uid=f'blobs-save-{model._meta.label}')
+        post_delete.connect(_count_deleted_files, sender=model, dispatch_uid=f'blobs-delete-{model._meta.label}')
+
+
+def count_references():
+    """Number of rows referencing each file name, over all tracked fields."""
+    counts = Counter()
+    for model, fields in _tracked.items():
+        for field in fields:
+            rows = (
+                model._default_manager.exclude(**{field.attname: ''})
+                .exclude(**{f'{field.attname}__isnull': True})
+                .values_list(field.attname)
+                .annotate(references=Count('pk'))
+                .order_by()
+            )
+            for name, references in rows:
+                counts[name] += references
+    return counts
@@ -0,0 +1,382 @@
+"""
+Brokers of the background jobs (apps.core.jobs): where queued jobs wait
+until a worker takes them.
+
+A job travels as a message, a dict of ``id``, ``task``, ``queue``, ``args``,
+``kwargs``, ``attempts`` and the ``enqueued_at``, ``eta`` (due) and
+``started_at`` times in epoch seconds. Every broker provides:
+
+* ``enqueue(message, unique_key=None)``: queue it, unless a job with
+  ``unique_key`` was already queued; returns whether it was.
+* ``reserve(queues)``: take the oldest due job of ``queues``, or None.
+* ``ack``, ``retry(message, eta, error)``, ``fail(message, error)``: settle
+  a reserved job.
+* ``requeue_stale(timeout, max_attempts=None)``: put back jobs reserved
+  longer than ``timeout`` seconds ago, whose worker died, and fail those
+  that already ran ``max_attempts[task]`` times (a job that kills its
+  worker would otherwise run forever); returns how many were requeued and
+  how many failed.
+* ``stats(window)``: per queue, the jobs pending (due), scheduled (due
+  later), running and failed, and over the last ``window`` seconds the jobs
+  done, retried and failed and the latency (due to started) and runtime.
+* ``purge(older_than)``: forget jobs finished before then.
+"""
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max, Q
+from django.utils import timezone
+
+
+LOST = 'Worker lost'
+LOST_FOR_GOOD = 'Worker lost on every attempt'
+
+
+def _datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc) if timestamp is not None else None
+
+
+def _timestamp(value):
+    return value.timestamp() if value is not None else None
+
+
+def _seconds(duration):
+    return duration.total_seconds() if duration is not None else None
+
+
+def _str(value):
+    # Replies are bytes unless the client decodes them.
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _empty_stats():
+    return {
+        'pending': 0, 'scheduled': 0, 'running': 0, 'failed': 0,
+        'recent': {'done': 0, 'retried': 0, 'failed': 0},
+        'latency': {'avg': None, 'max': None},
+        'runtime': {'avg': None, 'max': None},
+    }
+
+
+class DatabaseBroker:
+    """
+    Jobs are rows of apps.core.models.Job. Queueing is part of the current
+    transaction: a job queued by a request that rolls back never runs, and
+    one that commits is never lost.
+
+    On PostgreSQL workers lock the job they take (SKIP LOCKED), so they never
+    wait on each other; on SQLite a conditional UPDATE decides which of two
+    workers got a job.
+    """
+    transactional = True
+
+    def __init__(self):
+        from apps.core.models import Job
+
+        self.Job = Job
+
+    def enqueue(self, message, unique_key=None):
+        job = self.Job(
+            task=message['task'],
+            queue=message['queue'],
+            args=message['args'],
+            kwargs=message['kwargs'],
+            unique_key=unique_key,
+            enqueued_at=_datetime(message['enqueued_at']),
+            eta=_datetime(message['eta']),
+        )
+        if unique_key is None:
+            job.save()
+        else:
+            try:
+                with transaction.atomic(using=router.db_for_write(self.Job)):
+                    job.save()
+            except IntegrityError:
+                return False
+        message['id'] = job.pk
+        return True
+
+    def reserve(self, queues):
+        Job = self.Job
+        using = router.db_for_write(Job)
+        now = timezone.now()
+        ready = (
+            Job.objects.using(using)
+            .filter(status=Job.PENDING, queue__in=queues, eta__lte=now)
+            .order_by('eta', 'pk')
+        )
+        with transaction.atomic(using=using):
+            if connections[using].features.has_select_for_update_skip_locked:
+                ready = ready.select_for_update(skip_locked=True)
+            for pk in list(ready.values_list('pk', flat=True)[:10]):
+                claimed = Job.objects.using(using).filter(pk=pk, status=Job.PENDING).update(
+                    status=Job.RUNNING, started_at=now, attempts=F('attempts') + 1,
+                )
+                if claimed:
+                    return self._message(Job.objects.using(using).get(pk=pk))
+        return None
+
+    def _message(self, job):
+        return {
+            'id': job.pk,
+            'task': job.task,
+            'queue': job.queue,
+            'args': job.args,
+            'kwargs': job.kwargs,
+            'attempts': job.attempts,
+            'enqueued_at': _timestamp(job.enqueued_at),
+            'eta': _timestamp(job.eta),
+            'started_at': _timestamp(job.started_at),
+        }
+
+    def _settle(self, message, **fields):
+        self.Job.objects.filter(pk=message['id'], status=self.Job.RUNNING).update(**fields)
+
+    def ack(self, message):
+        self._settle(message, status=self.Job.DONE, finished_at=timezone.now(), last_error='')
+
+    def retry(self, message, eta, error):
+        self._settle(message, status=self.Job.PENDING, eta=_datetime(eta), last_error=error)
+
+    def fail(self, message, error):
+        self._settle(message, status=self.Job.FAILED, finished_at=timezone.now(), last_error=error)
+
+    def requeue_stale(self, timeout, max_attempts=None):
+        Job = self.Job
+        now = timezone.now()
+        stale = Job.objects.filter(status=Job.RUNNING, started_at__lt=now - timedelta(seconds=timeout))
+        exhausted = Q(pk__in=[])
+        for task, attempts in (max_attempts or {}).items():
+            exhausted |= Q(task=task, attempts__gte=attempts)
+        failed = stale.filter(exhausted).update(status=Job.FAILED, finished_at=now, last_error=LOST_FOR_GOOD)
+        requeued = stale.exclude(exhausted).update(status=Job.PENDING, eta=now, last_error=LOST)
+        return requeued, failed
+
+    def stats(self, window=3600):
+        Job = self.Job
+        now = timezone.now()
+        since = now - timedelta(seconds=window)
+        stats = {}
+        current = Job.objects.exclude(status=Job.DONE).values_list('queue').annotate(
+            pending=Count('pk', filter=Q(status=Job.PENDING, eta__lte=now)),
+            scheduled=Count('pk', filter=Q(status=Job.PENDING, eta__gt=now)),
+            running=Count('pk', filter=Q(status=Job.RUNNING)),
+            failed=Count('pk', filter=Q(status=Job.FAILED)),
+        ).order_by()
+        for queue, pending, scheduled, running, failed in current:
+            stats[queue] = _empty_stats()
+            stats[queue].update(pending=pending, scheduled=scheduled, running=running, failed=failed)
+
+        latency = ExpressionWrapper(F('started_at') - F('eta'), output_field=DurationField())
+        runtime = ExpressionWrapper(F('finished_at') - F('started_at'), output_field=DurationField())
+        recent = Job.objects.filter(
+            Q(finished_at__gte=since) | Q(status=Job.PENDING, attempts__gt=0, started_at__gte=since)
+        ).values_list('queue').annotate(
+            done=Count('pk', filter=Q(status=Job.DONE)),
+            retried=Count('pk', filter=Q(status=Job.PENDING)),
+            failed=Count('pk', filter=Q(status=Job.FAILED)),
+            latency_avg=Avg(latency, filter=Q(status=Job.DONE)),
+            latency_max=Max(latency, filter=Q(status=Job.DONE)),
+            runtime_avg=Avg(runtime, filter=Q(status=Job.DONE)),
+            runtime_max=Max(runtime, filter=Q(status=Job.DONE)),
+        ).order_by()
+        for queue, done, retried, failed, *durations in recent:
+            entry = stats.setdefault(queue, _empty_stats())
+            entry['recent'] = {'done': done, 'retried': retried, 'failed': failed}
+            latency_avg, latency_max, runtime_avg, runtime_max = map(_seconds, durations)
+            entry['latency'] = {'avg': latency_avg, 'max': latency_max}
+            entry['runtime'] = {'avg': runtime_avg, 'max': runtime_max}
+        return stats
+
+    def purge(self, older_than):
+        cutoff = _datetime(older_than)
+        deleted, _ = self.Job.objects.filter(
+            status__in=[self.Job.DONE, self.Job.FAILED], finished_at__lt=cutoff,
+        ).delete()
+        return deleted
+
+
+class RedisBroker:
+    """
+    Jobs in a Redis-compatible server (TASK_BROKER_URL), for sites that run
+    many workers or queue jobs faster than the database should take them.
+
+    Each queue is a sorted set of job ids by due time, and its reserved jobs
+    another one by start time; a worker owns a job once it removed it from
+    the queue (ZREM is atomic). The message itself is a JSON string under
+    its own key. Recent counts and durations are kept in per-minute hashes
+    that expire after STATS_TTL (the maxima in sorted sets, raised with
+    ZADD GT, which needs Redis 6.2). Queueing happens when the current
+    transaction commits, so a job never runs before the rows it reads exist.
+    """
+    transactional = False
+    STATS_TTL = 24 * 3600
+
+    def __init__(self, url=None, client=None, prefix='jobs'):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url)
+        self.redis = client
+        self.prefix = prefix
+
+    def _key(self, *parts):
+        return ':'.join([self.prefix, *map(str, parts)])
+
+    def _save(self, message, pipe=None):
+        (pipe or self.redis).set(
+            self._key('job', message['id']), json.dumps(message),
+        )
+
+    def _load(self, job_id):
+        data = self.redis.get(self._key('job', job_id))
+        return json.loads(data) if data is not None else None
+
+    def _record(self, message, pipe, counts=(), maxima=()):
+        """Add ``counts`` to the sums, and ``maxima`` to the maxima, of this minute."""
+        minute = int(time.time() // 60)
+        sums, highs = self._key('stats', message['queue'], minute), self._key('max', message['queue'], minute)
+        for field, value in counts:
+            pipe.hincrbyfloat(sums, field, value)
+        if maxima:
+            # GT: only raises a member's score.
+            pipe.zadd(highs, dict(maxima), gt=True)
+        pipe.expire(sums, self.STATS_TTL)
+        pipe.expire(highs, self.STATS_TTL)
+
+    def enqueue(self, message, unique_key=None):
+        if unique_key is not None and not self.redis.set(
+            self._key('unique', unique_key), 1, nx=True, ex=self.STATS_TTL,
+        ):
+            return False
+        message['id'] = uuid.uuid4().hex
+        pipe = self.redis.pipeline()
+        self._save(message, pipe)
+        pipe.sadd(self._key('queues'), message['queue'])
+        pipe.zadd(self._key('queue', message['queue']), {message['id']: message['eta']})
+        pipe.execute()
+        return True
+
+    def reserve(self, queues):
+        now = time.time()
+        for queue in queues:
+            for job_id in self.redis.zrangebyscore(self._key('queue', queue), '-inf', now, start=0, num=10):
+                job_id = _str(job_id)
+                pipe = self.redis.pipeline()
+                pipe.zrem(self._key('queue', queue), job_id)
+                pipe.zadd(self._key('running', queue), {job_id: now})
+                removed, _ = pipe.execute()
+                if not removed:
+                    # Another worker took it (and added it to running too).
+                    continue
+                message = self._load(job_id)
+                if message is None:
+                    self.redis.zrem(self._key('running', queue), job_id)
+                    continue
+                message['attempts'] += 1
+                message['started_at'] = now
+                self._save(message)
+                return message
+        return None
+
+    def ack(self, message):
+        pipe = self.redis.pipeline()
+        pipe.zrem(self._key('running', message['queue']), message['id'])
+        pipe.delete(self._key('job', message['id']))
+        latency = message['started_at'] - message['eta']
+        runtime = time.time() - message['started_at']
+        self._record(
+            message, pipe,
+            counts=[('done', 1), ('latency', latency), ('runtime', runtime)],
+            maxima=[('latency', latency), ('runtime', runtime)],
+        )
+        pipe.execute()
+
+    def retry(self, message, eta, error):
+        message['eta'] = eta
+        message['last_error'] = error
+        pipe = self.redis.pipeline()
+        self._save(message, pipe)
+        pipe.zrem(self._key('running', message['queue']), message['id'])
+        pipe.zadd(self._key('queue', message['queue']), {message['id']: eta})
+        self._record(message, pipe, counts=[('retried', 1)])
+        pipe.execute()
+
+    def fail(self, message, error):
+        message['last_error'] = error
+        message['finished_at'] = time.time()
+        pipe = self.redis.pipeline()
+        self._save(message, pipe)
+        pipe.zrem(self._key('running', message['queue']), message['id'])
+        pipe.zadd(self._key('failed', message['queue']), {message['id']: message['finished_at']})
+        self._record(message, pipe, counts=[('failed', 1)])
+        pipe.execute()
+
+    def _queues(self):
+        return sorted(map(_str, self.redis.smembers(self._key('queues'))))
+
+    def requeue_stale(self, timeout, max_attempts=None):
+        now = time.time()
+        requeued = failed = 0
+        for queue in self._queues():
+            for job_id in self.redis.zrangebyscore(self._key('running', queue), '-inf', now - timeout):
+                if not self.redis.zrem(self._key('running', queue), job_id):
+                    # Settled meanwhile, or another worker requeued it.
+                    continue
+                message = self._load(_str(job_id))
+                if message is None:
+                    continue
+                if message['attempts'] >= (max_attempts or {}).get(message['task'], float('inf')):
+                    self.fail(message, LOST_FOR_GOOD)
+                    failed += 1
+                else:
+                    self.redis.zadd(self._key('queue', queue), {message['id']: now})
+                    requeued += 1
+        return requeued, failed
+
+    def stats(self, window=3600):
+        now = time.time()
+        minute = int(now // 60)
+        stats = {}
+        for queue in self._queues():
+            entry = stats[queue] = _empty_stats()
+            pipe = self.redis.pipeline()
+            pipe.zcount(self._key('queue', queue), '-inf', now)
+            pipe.zcount(self._key('queue', queue), f'({now}', '+inf')
+            pipe.zcard(self._key('running', queue))
+            pipe.zcard(self._key('failed', queue))
+            minutes = range(minute - window // 60, minute + 1)
+            for bucket in minutes:
+                pipe.hgetall(self._key('stats', queue, bucket))
+            for bucket in minutes:
+                pipe.zrange(self._key('max', queue, bucket), 0, -1, withscores=True)
+            pending, scheduled, running, failed, *buckets = pipe.execute()
+            entry.update(pending=pending, scheduled=scheduled, running=running, failed=failed)
+            sums, maxima = {}, {}
+            for bucket in buckets[:len(minutes)]:
+                for field, value in bucket.items():
+                    sums[_str(field)] = sums.get(_str(field), 0) + float(value)
+            for bucket in buckets[len(minutes):]:
+                for field, value in bucket:
+                    maxima[_str(field)] = max(maxima.get(_str(field), 0), value)
+            done = int(sums.get('done', 0))
+            entry['recent'] = {
+                'done': done, 'retried': int(sums.get('retried', 0)), 'failed': int(sums.get('failed', 0)),
+            }
+            if done:
+                entry['latency'] = {'avg': sums['latency'] / done, 'max': maxima.get('latency')}
+                entry['runtime'] = {'avg': sums['runtime'] / done, 'max': maxima.get('runtime')}
+        return stats
+
+    def purge(self, older_than):
+        purged = 0
+        for queue in self._queues():
+            key = self._key('failed', queue)
+            job_ids = self.redis.zrangebyscore(key, '-inf', older_than)
+            if job_ids:
+                self.redis.delete(*(self._key('job', _str(job_id)) for job_id in job_ids))
+                purged += self.redis.zremrangebyscore(key, '-inf', older_than)
+        return purged
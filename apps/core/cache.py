@@ -0,0 +1,162 @@
+"""
+Cache helpers on top of Django's default cache (CACHE_URL, see
+config/settings.py): a Redis-compatible server shared by every instance, or
+a per-process LRU cache when none is configured.
+
+Keys are namespaced and versioned. ``cache_key('projects:stats', digest,
+models=[Project])`` holds the version of the namespace and of each model;
+``invalidate(namespace)`` bumps a version, so every key built on it misses
+from then on and the old entries expire on their own. Every TimeStampedModel
+subclass bumps its model version when a transaction that saved, deleted or
+bulk updated its rows commits. Bulk inserts and raw SQL send no signals:
+call ``models_changed`` (the importers do) or ``invalidate_models`` after
+them.
+
+``get_or_set`` protects expensive values from stampedes: when a key is
+missing, one caller computes it while the others wait for its result, and a
+value past its timeout is served for a grace period while one caller
+refreshes it.
+"""
+import time
+from functools import partial
+from threading import local
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+
+from apps.core.signals import post_bulk_update
+
+# How long an expired value is still served while one caller refreshes it.
+STALE_GRACE = 60
+# How long a caller may hold the recompute lock of a key, and how long the
+# others wait for its value before computing it themselves (seconds).
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 5
+LOCK_POLL = 0.05
+
+_pending = local()
+
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+
+def model_namespace(model):
+    return f'model:{model._meta.label_lower}'
+
+
+def versions(namespaces):
+    """``{namespace: version}``, starting the versions not yet in the cache."""
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        # Seeded with a timestamp so an evicted version key never reuses a
+        # number that old entries were stored under.
+        cache.add(key, time.time_ns(), None)
+        found[key] = cache.get(key)
+    return {namespace: found[key] for key, namespace in keys.items()}
+
+
+def invalidate(namespace):
+    """Make every key built on ``namespace`` miss."""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), time.time_ns(), None)
+
+
+def invalidate_models(*models):
+    for model in models:
+        invalidate(model_namespace(model))
+
+
+def cache_key(namespace, *parts, models=()):
+    """
+    ``namespace:v<version>[:<model versions>]:<parts>``: a key that changes
+    when ``namespace`` or one of ``models`` is invalidated.
+    """
+    namespaces = [namespace, *map(model_namespace, models)]
+    current = versions(namespaces)
+    version = '.'.join(str(current[name]) for name in namespaces)
+    return ':'.join([namespace, f'v{version}', *map(str, parts)])
+
+
+def get_or_set(key, compute, timeout=DEFAULT_TIMEOUT):
+    """
+    The cached value of ``key``, or ``compute()`` stored under it for
+    ``timeout`` seconds (default: the cache's), with stampede protection
+    (see the module docstring).
+    """
+    if timeout is DEFAULT_TIMEOUT:
+        timeout = cache.default_timeout
+    lock_key = f'{key}:lock'
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires = entry
+        if expires is None or time.time() < expires or not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            return value
+        # Expired and this caller holds the lock: refresh it.
+        return _compute(key, lock_key, compute, timeout)
+
+    deadline = time.monotonic() + LOCK_WAIT
+    while not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            # The holder is slow or gone: don't wait any longer.
+            value = compute()
+            cache.set(key, (value, _expires(timeout)), _lifetime(timeout))
+            return value
+        time.sleep(LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    return _compute(key, lock_key, compute, timeout)
+
+
+def _compute(key, lock_key, compute, timeout):
+    try:
+        value = compute()
+        cache.set(key, (value, _expires(timeout)), _lifetime(timeout))
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+def _expires(timeout):
+    return None if timeout is None else time.time() + timeout
+
+
+def _lifetime(timeout):
+    return None if timeout is None else timeout + STALE_GRACE
+
+
+def models_changed(*models, using=DEFAULT_DB_ALIAS):
+    """Invalidate ``models`` when the current transaction commits."""
+    _pending.__dict__.setdefault(using, set()).update(models)
+    # One callback per change, as in apps.core.search: a callback registered
+    # in a savepoint that rolls back is dropped, a later one still flushes.
+    transaction.on_commit(partial(_flush, using), using=using)
+
+
+def _changed(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    models_changed(sender, using=using)
+
+
+def _flush(using):
+    invalidate_models(*_pending.__dict__.pop(using, ()))
+
+
+def connect_model_invalidation():
+    """Bump a TimeStampedModel subclass's version when its rows change."""
+    from apps.core.models import TimeStampedModel
+
+    for model in apps.get_models():
+        if not issubclass(model, TimeStampedModel):
+            continue
+        label = model._meta.label
+        post_save.connect(_changed, sender=model, dispatch_uid=f'cache-save-{label}')
+        post_delete.connect(_changed, sender=model, dispatch_uid=f'cache-delete-{label}')
+        post_bulk_update.connect(_changed, sender=model, dispatch_uid=f'cache-update-{label}')
@@ -0,0 +1,93 @@
+"""
+KPIs of the admin landing page, one cached section per source table.
+
+Each section is computed with one grouped query (two for documents) and
+cached under a key versioned on the models it reads (apps.core.cache): a
+change to a vendor recomputes the vendor section on the next load, while the
+other sections stay cached. The document section is also keyed on the day,
+as its window moves. ``warm()`` fills every section; it runs when a gunicorn
+worker starts (gunicorn.conf.py) and from ``manage.py warm_cache``.
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.core import cache
+from apps.persons.models import PersonDocument
+from apps.procurements.models import Procurement, ProcurementParticipant
+from apps.projects.models import Project
+from apps.projects.stats import project_statistics
+from apps.vendors.models import Vendor, VendorDocument
+
+CACHE_NAMESPACE = 'dashboard'
+CACHE_TIMEOUT = 3600
+
+
+def _counts_by(queryset, field, choices):
+    counts = dict(queryset.order_by().values_list(field).annotate(count=Count('pk')))
+    return {code: counts.get(code, 0) for code, _ in choices}
+
+
+def procurement_kpis():
+    by_status = _counts_by(Procurement.objects.all(), 'status', Procurement.STATUS)
+    return {'open': by_status['open'], 'by_status': by_status}
+
+
+def vendor_kpis():
+    by_type = _counts_by(Vendor.objects.all(), 'vendor_type', Vendor.VENDOR_TYPE)
+    return {'total': sum(by_type.values()), 'by_type': by_type}
+
+
+def document_kpis(today=None):
+    """Documents expired, and expiring within DASHBOARD_EXPIRING_DAYS."""
+    today = today or timezone.localdate()
+    horizon = today + datetime.timedelta(days=settings.DASHBOARD_EXPIRING_DAYS)
+    kpis = {'expired': 0, 'expiring': 0}
+    for model in (VendorDocument, PersonDocument):
+        row = model.objects.filter(expired_date__lte=horizon).aggregate(
+            expired=Count('pk', filter=Q(expired_date__lt=today)),
+            expiring=Count('pk', filter=Q(expired_date__gte=today)),
+        )
+        kpis['expired'] += row['expired']
+        kpis['expiring'] += row['expiring']
+    return kpis
+
+
+def bid_kpis():
+    """Bids still ``submitted``, and those of procurements under evaluation."""
+    return ProcurementParticipant.objects.filter(status='submitted').aggregate(
+        submitted=Count('pk'),
+        awaiting_evaluation=Count('pk', filter=Q(procurement__status='evaluation')),
+    )
+
+
+# name -> (compute, models read)
+SECTIONS = {
+    'procurements': (procurement_kpis, [Procurement]),
+    'vendors': (vendor_kpis, [Vendor]),
+    'documents': (document_kpis, [VendorDocument, PersonDocument]),
+    'bids': (bid_kpis, [ProcurementParticipant, Procurement]),
+}
+
+
+def section(name):
+    compute, models = SECTIONS[name]
+    parts = [name]
+    if name == 'documents':
+        parts.append(timezone.localdate().isoformat())
+    key = cache.cache_key(CACHE_NAMESPACE, *parts, models=models)
+    return cache.get_or_set(key, compute, CACHE_TIMEOUT)
+
+
+def kpis():
+    """Every section, plus the projects' totals shared with their changelist."""
+    data = {name: section(name) for name in SECTIONS}
+    # The same cache entry as the unfiltered project changelist.
+    data['projects'] = project_statistics(Project.objects.all())
+    return data
+
+
+def warm():
+    return kpis()
@@ -0,0 +1,504 @@
+"""
+Synthetic data for load tests and benchmarks.
+
+Every row is a pure function of (run salt, kind, index): ids, names and the
+attributes children depend on (a procurement's project value, type and
+status) are derived from a fast integer hash instead of shared state. Work
+is therefore split into independent chunks that stream through generators
+into batched multi-row inserts, in one process or many, and memory stays
+bounded by the batch size.
+
+Rows are plain dicts keyed by field attname. ``insert_rows`` compiles the
+INSERT once per model and adapts values with per-column backend converters;
+``bulk_create`` rebuilds and re-prepares the whole statement for every batch,
+which made it the bottleneck at this volume.
+"""
+import datetime
+import os
+import random
+import uuid
+from decimal import Decimal
+from functools import partial
+from itertools import islice
+from statistics import NormalDist
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from apps.core import cache, expiry, search
+from apps.core.utils import safe_name
+from apps.procurements import analytics
+from apps.persons.models import Person, PersonDocument
+from apps.procurements.models import Procurement, ProcurementParticipant
+from apps.projects.models import Project
+from apps.vendors.models import Vendor, VendorDocument
+
+MASK64 = (1 << 64) - 1
+TODAY = datetime.date.today()
+HISTORY_DAYS = 5 * 365
+
+FIRST_NAMES = [
+    'Agus', 'Budi', 'Citra', 'Dewi', 'Eko', 'Fitri', 'Gita', 'Hendra', 'Indah',
+    'Joko', 'Kartika', 'Lestari', 'Made', 'Nur', 'Putri', 'Rizky', 'Sari',
+    'Taufik', 'Wahyu', 'Yusuf',
+]
+LAST_NAMES = [
+    'Santoso', 'Wijaya', 'Saputra', 'Hidayat', 'Pratama', 'Kurniawan',
+    'Setiawan', 'Nugroho', 'Susanto', 'Halim', 'Siregar', 'Nasution',
+    'Lubis', 'Simanjuntak', 'Purba', 'Tanjung',
+]
+COMPANY_WORDS = [
+    'Karya', 'Mandiri', 'Sejahtera', 'Abadi', 'Jaya', 'Konstruksi', 'Nusantara',
+    'Teknik', 'Utama', 'Persada', 'Cipta', 'Graha', 'Mitra', 'Sentosa',
+    'Bangun', 'Prima',
+]
+ROLES = ['Direktur', 'Manajer Proyek', 'Site Engineer', 'Estimator', 'Staff Admin']
+
+# Weighted choices, roughly matching production mixes.
+VENDOR_TYPES = [('PT', 55), ('CV', 30), ('BUMN', 5), ('PERSONAL', 10)]
+PROJECT_STATUS = [('planning', 15), ('ongoing', 40), ('completed', 35), ('cancelled', 10)]
+PROCUREMENT_TYPES = [('lelang', 70), ('penunjukan', 30)]
+PROCUREMENT_STATUS = [('open', 20), ('evaluation', 15), ('winner_selected', 55), ('failed', 10)]
+
+# Mean bids per procurement: a lelang draws 2-20 bidders skewed low (mean 8),
+# a penunjukan has exactly one.
+MEAN_BIDS = 0.7 * 8 + 0.3 * 1
+
+# Row kinds, in dependency order: each phase only references earlier phases.
+PHASES = [
+    ['vendors', 'projects'],
+    ['persons', 'vendor_documents', 'procurements'],
+    ['person_documents', 'participants'],
+]
+KIND_CODES = {
+    'vendors': 1, 'persons': 2, 'vendor_documents': 3, 'person_documents': 4,
+    'projects': 5, 'procurements': 6, 'participants': 7,
+}
+
+_normal = NormalDist()
+
+
+def _mix(*parts):
+    """splitmix64 over the parts: a fast, well-distributed 64-bit hash."""
+    x = 0
+    for part in parts:
+        x = (x + part + 0x9E3779B97F4A7C15) & MASK64
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+        x ^= x >> 31
+    return x
+
+
+def _unit(*parts):
+    return _mix(*parts) / 2 ** 64
+
+
+def _fit_path(model, path):
+    """Shorten the directory part of ``path`` to fit the model's file column."""
+    max_length = model._meta.get_field('file').max_length
+    if len(path) <= max_length:
+        return path
+    directory, name = path.rsplit('/', 1)
+    return f'{directory[:max_length - len(name) - 1]}/{name}'
+
+
+def _weighted(u, choices):
+    total = sum(weight for _, weight in choices)
+    point = u * total
+    for value, weight in choices:
+        point -= weight
+        if point < 0:
+            return value
+    return choices[-1][0]
+
+
+def _column_converters(model, connection):
+    ops = connection.ops
+    converters = []
+    for field in model._meta.concrete_fields:
+        # Foreign keys store their target's type.
+        internal_type = (field.target_field if field.is_relation else field).get_internal_type()
+        if internal_type == 'UUIDField' and not connection.features.has_native_uuid_field:
+            convert = lambda value: value.hex if value is not None else None  # noqa: E731
+        elif internal_type == 'DateField':
+            convert = ops.adapt_datefield_value
+        elif internal_type == 'DateTimeField':
+            convert = ops.adapt_datetimefield_value
+        elif internal_type == 'DecimalField':
+            convert = partial(
+                ops.adapt_decimalfield_value,
+                max_digits=field.max_digits, decimal_places=field.decimal_places,
+            )
+        else:
+            convert = None
+        converters.append((field, convert))
+    return converters
+
+
+def insert_rows(model, rows, using='default'):
+    """
+    Insert an iterable of ``{attname: value}`` dicts in one transaction.
+
+    Missing fields take their default; ``auto_now``/``auto_now_add`` columns
+    get the current time. Returns the number of rows inserted.
+    """
+    connection = connections[using]
+    converters = _column_converters(model, connection)
+    now = timezone.now()
+    defaults = []
+    for field, convert in converters:
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            default = now
+        elif field.has_default() and not callable(field.default):
+            default = field.default
+        else:
+            default = None
+        defaults.append(convert(default) if convert and default is not None else default)
+
+    columns = [
+        (field.attname, convert, default)
+        for (field, convert), default in zip(converters, defaults)
+    ]
+
+    def prepare(row):
+        values = []
+        for attname, convert, default in columns:
+            if attname not in row:
+                values.append(default)
+                continue
+            value = row[attname]
+            values.append(convert(value) if convert and value is not None else value)
+        return values
+
+    params = [prepare(row) for row in rows]
+    if not params:
+        return 0
+
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    names = ', '.join(quote(field.column) for field, _ in converters)
+    placeholder = '(' + ', '.join(['%s'] * len(converters)) + ')'
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(f'INSERT INTO {table} ({names}) VALUES {placeholder}', params)
+        else:
+            per_statement = max(1, 60000 // len(converters))
+            for start in range(0, len(params), per_statement):
+                chunk = params[start:start + per_statement]
+                cursor.execute(
+                    f'INSERT INTO {table} ({names}) VALUES ' + ', '.join([placeholder] * len(chunk)),
+                    [value for row in chunk for value in row],
+                )
+    return len(params)
+
+
+class Dataset:
+    """Row counts and deterministic per-row attributes for one run."""
+
+    def __init__(self, scale, seed=0, salt=None):
+        self.scale = scale
+        self.seed = seed
+        self.salt = salt if salt is not None else int.from_bytes(os.urandom(6), 'big')
+        # Keeps full_name and the other names unique across several runs into
+        # one database; generate() checks the NPWPs, which only fit part of it.
+        self.run_tag = f'{self.salt:012x}'
+        self.env = getattr(settings, 'ENVIRONMENT', 'dev')
+
+        procurements = max(1, round(scale / MEAN_BIDS))
+        vendors = max(25, scale // 20)
+        self.counts = {
+            'vendors': vendors,
+            'persons': vendors * 3,
+            'vendor_documents': vendors * 3,
+            'person_documents': vendors * 3,
+            'projects': max(1, round(procurements / 1.2)),
+            'procurements': procurements,
+            # Approximate: each procurement draws its own number of bids.
+            'participants': scale,
+        }
+
+    def uid(self, kind, index):
+        # Sequential within a kind, so inserts append to the primary key index.
+        return uuid.UUID(int=(self.salt << 80) | (KIND_CODES[kind] << 64) | index)
+
+    def u(self, kind, index, field):
+        return _unit(self.seed, KIND_CODES[kind], index, field)
+
+    # Attributes other rows depend on.
+
+    def vendor_name(self, index):
+        first = COMPANY_WORDS[int(self.u('vendors', index, 1) * len(COMPANY_WORDS))]
+        second = COMPANY_WORDS[int(self.u('vendors', index, 2) * len(COMPANY_WORDS))]
+        return f'{first} {second} {self.run_tag}{index:06d}'
+
+    def npwp(self, index):
+        # 15 digits: six of the salt, then the index.
+        npwp = f'{(self.salt % 10 ** 6) * 10 ** 9 + index:015d}'
+        return f'{npwp[:2]}.{npwp[2:5]}.{npwp[5:8]}.{npwp[8]}-{npwp[9:12]}.{npwp[12:]}'
+
+    def person_vendor(self, index):
+        return int(self.u('persons', index, 1) * self.counts['vendors'])
+
+    def person_name(self, index):
+        first = FIRST_NAMES[int(self.u('persons', index, 2) * len(FIRST_NAMES))]
+        last = LAST_NAMES[int(self.u('persons', index, 3) * len(LAST_NAMES))]
+        return f'{first} {last} {self.run_tag}{index:07d}'
+
+    def project_name(self, index):
+        return f'Proyek {self.run_tag}-{index:07d}'
+
+    def project_value(self, index):
+        # Log-normal around Rp 5 M with a long tail, clipped to Rp 100 jt - 500 M.
+        z = _normal.inv_cdf(min(max(self.u('projects', index, 1), 1e-9), 1 - 1e-9))
+        value = 5e9 * (2.718281828 ** (1.2 * z))
+        value = min(max(value, 1e8), 5e11)
+        return Decimal(int(value // 1000) * 1000)
+
+    def procurement_project(self, index):
+        return index % self.counts['projects']
+
+    def procurement_type(self, index):
+        return _weighted(self.u('procurements', index, 1), PROCUREMENT_TYPES)
+
+    def procurement_status(self, index):
+        return _weighted(self.u('procurements', index, 2), PROCUREMENT_STATUS)
+
+    def procurement_start(self, index):
+        return TODAY - datetime.timedelta(days=int(self.u('procurements', index, 3) * HISTORY_DAYS))
+
+    def bid_count(self, index):
+        if self.procurement_type(index) == 'penunjukan':
+            return 1
+        bids = 2 + int(self.u('procurements', index, 4) ** 2 * 19)
+        return min(bids, self.counts['vendors'])
+
+    # Row builders, one chunk [start, stop) at a time.
+
+    def vendors(self, start, stop, rng):
+        for i in range(start, stop):
+            yield dict(
+                id=self.uid('vendors', i),
+                name=self.vendor_name(i),
+                npwp=self.npwp(i),
+                vendor_type=_weighted(rng.random(), VENDOR_TYPES),
+                address=f'Jl. {rng.choice(COMPANY_WORDS)} No. {rng.randint(1, 300)}, Jakarta',
+                email=f'vendor{self.run_tag}{i}@example.com',
+                phone=f'08{rng.randint(10 ** 9, 10 ** 10 - 1)}',
+            )
+
+    def persons(self, start, stop, rng):
+        for i in range(start, stop):
+            yield dict(
+                id=self.uid('persons', i),
+                vendor_id=self.uid('vendors', self.person_vendor(i)),
+                full_name=self.person_name(i),
+                role=rng.choice(ROLES),
+                email=f'person{self.run_tag}{i}@example.com',
+                phone=f'08{rng.randint(10 ** 9, 10 ** 10 - 1)}',
+            )
+
+    def _validity(self, rng, document_type):
+        issued = TODAY - datetime.timedelta(days=rng.randrange(6 * 365))
+        if document_type in ('portfolio', 'cv'):
+            return issued, None
+        years = rng.choice([1, 1, 2, 3, 5])
+        return issued, issued + datetime.timedelta(days=365 * years)
+
+    def vendor_documents(self, start, stop, rng):
+        for i in range(start, stop):
+            vendor = i % self.counts['vendors']
+            document_type = rng.choice(VendorDocument.DOCUMENT_TYPE)[0]
+            issued, expired = self._validity(rng, document_type)
+            yield dict(
+                id=self.uid('vendor_documents', i),
+                vendor_id=self.uid('vendors', vendor),
+                document_type=document_type,
+                title=f'{document_type.upper()} {issued.year}',
+                file=_fit_path(
+                    VendorDocument,
+                    f'{self.env}/vendors/{safe_name(self.vendor_name(vendor))}/{document_type}_{i}.pdf',
+                ),
+                file_name=f'{document_type}_{i}.pdf',
+                issued_date=issued,
+                expired_date=expired,
+            )
+
+    def person_documents(self, start, stop, rng):
+        for i in range(start, stop):
+            person = i % self.counts['persons']
+            vendor_name = safe_name(self.vendor_name(self.person_vendor(person)))
+            document_type = rng.choice(PersonDocument.DOCUMENT_TYPE)[0]
+            issued, expired = self._validity(rng, document_type)
+            yield dict(
+                id=self.uid('person_documents', i),
+                person_id=self.uid('persons', person),
+                document_type=document_type,
+                title=f'{document_type.upper()} {issued.year}',
+                file=_fit_path(
+                    PersonDocument,
+                    f'{self.env}/vendors/{vendor_name}/persons/'
+                    f'{safe_name(self.person_name(person))}/{document_type}_{i}.pdf',
+                ),
+                file_name=f'{document_type}_{i}.pdf',
+                issued_date=issued,
+                expired_date=expired,
+            )
+
+    def projects(self, start, stop, rng):
+        for i in range(start, stop):
+            start_date = TODAY - datetime.timedelta(days=rng.randrange(HISTORY_DAYS))
+            end_date = start_date + datetime.timedelta(days=int(rng.lognormvariate(5, 0.8)) + 7)
+            yield dict(
+                id=self.uid('projects', i),
+                project_name=self.project_name(i),
+                project_value=self.project_value(i),
+                start_date=start_date,
+                end_date=end_date,
+                # Rows skip save(), which normally fills this in
+                duration_days=(end_date - start_date).days,
+                status=_weighted(rng.random(), PROJECT_STATUS),
+            )
+
+    def procurements(self, start, stop, rng):
+        for i in range(start, stop):
+            start_date = self.procurement_start(i)
+            yield dict(
+                id=self.uid('procurements', i),
+                project_id=self.uid('projects', self.procurement_project(i)),
+                procurement_type=self.procurement_type(i),
+                start_date=start_date,
+                end_date=start_date + datetime.timedelta(days=rng.choice([14, 21, 30, 45])),
+                status=self.procurement_status(i),
+            )
+
+    def participants(self, start, stop, rng):
+        """Bids of procurements [start, stop); ``participant`` index = procurement index."""
+        for i in range(start, stop):
+            project = self.procurement_project(i)
+            value = self.project_value(project)
+            status = self.procurement_status(i)
+            submitted = self.procurement_start(i)
+            vendors = rng.sample(range(self.counts['vendors']), self.bid_count(i))
+            # Bids cluster a little under the owner's estimate.
+            bids = [
+                (value * Decimal(min(max(rng.gauss(0.92, 0.06), 0.7), 1.2))).quantize(Decimal('0.01'))
+                for _ in vendors
+            ]
+            # One winner per settled procurement: the first lowest bid.
+            winner = bids.index(min(bids)) if status == 'winner_selected' else None
+            project_name = safe_name(self.project_name(project))
+            for n, (vendor, bid) in enumerate(zip(vendors, bids)):
+                if winner is not None:
+                    bid_status = 'winner' if n == winner else 'loser'
+                elif status == 'failed':
+                    bid_status = 'loser'
+                elif status == 'evaluation':
+                    bid_status = 'evaluated'
+                else:
+                    bid_status = 'submitted'
+                yield dict(
+                    id=uuid.UUID(int=self.uid('participants', i).int ^ (n << 56)),
+                    procurement_id=self.uid('procurements', i),
+                    vendor_id=self.uid('vendors', vendor),
+                    bid_value=bid,
+                    file=_fit_path(
+                        ProcurementParticipant,
+                        f'{self.env}/vendors/{safe_name(self.vendor_name(vendor))}/'
+                        f'{project_name}/penawaran.pdf',
+                    ),
+                    file_name='penawaran.pdf',
+                    submission_date=submitted + datetime.timedelta(days=rng.randrange(14)),
+                    status=bid_status,
+                )
+
+    MODELS = {
+        'vendors': Vendor,
+        'persons': Person,
+        'vendor_documents': VendorDocument,
+        'person_documents': PersonDocument,
+        'projects': Project,
+        'procurements': Procurement,
+        'participants': ProcurementParticipant,
+    }
+
+    def range_of(self, kind):
+        # Participants are generated per procurement, so they chunk by it.
+        return self.counts['procurements' if kind == 'participants' else kind]
+
+    def chunks(self, kinds, chunk_size):
+        for kind in kinds:
+            total = self.range_of(kind)
+            for start in range(0, total, chunk_size):
+                yield kind, start, min(start + chunk_size, total)
+
+    def write_chunk(self, kind, start, stop, batch_size, using='default'):
+        rng = random.Random(_mix(self.seed, self.salt, KIND_CODES[kind], start))
+        rows = getattr(self, kind)(start, stop, rng)
+        model = self.MODELS[kind]
+        written = 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return kind, written
+            written += insert_rows(model, batch, using=using)
+
+
+def _worker_init():
+    # Forked workers must not share the parent's database connection.
+    for conn in connections.all():
+        conn.close()
+
+
+def _run_chunk(args):
+    dataset, kind, start, stop, batch_size = args
+    return dataset.write_chunk(kind, start, stop, batch_size)
+
+
+def generate(scale, batch_size=2000, seed=0, workers=1, chunk_size=50000, log=None):
+    """
+    Seed a dataset of about ``scale`` bids. Returns rows written per kind.
+
+    With ``workers`` > 1 the chunks of each phase are spread over a process
+    pool; phases still run in order so foreign keys always resolve.
+    """
+    dataset = Dataset(scale, seed=seed)
+    # The salt's six NPWP digits are the first eight characters: draw again
+    # if an earlier run into this database used the same ones.
+    while Vendor.objects.filter(npwp__startswith=dataset.npwp(0)[:8]).exists():
+        dataset = Dataset(scale, seed=seed)
+    written = dict.fromkeys(dataset.MODELS, 0)
+
+    pool = None
+    if workers > 1:
+        import multiprocessing
+
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise ValueError('Parallel generation needs the fork start method (Linux/macOS).')
+        for conn in connections.all():
+            conn.close()
+        pool = multiprocessing.get_context('fork').Pool(workers, initializer=_worker_init)
+    try:
+        for kinds in PHASES:
+            tasks = [
+                (dataset, kind, start, stop, batch_size)
+                for kind, start, stop in dataset.chunks(kinds, chunk_size)
+            ]
+            results = pool.imap_unordered(_run_chunk, tasks) if pool else map(_run_chunk, tasks)
+            for kind, count in results:
+                written[kind] += count
+            if log:
+                log(', '.join(f'{kind}: {written[kind]}' for kind in kinds))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    # Raw inserts bypass the signals that keep the search index and the
+    # cached values current.
+    search.rebuild(log=log)
+    expiry.run(full=True)
+    analytics.rebuild(Vendor.objects.values_list('pk', flat=True), workers=workers, log=log)
+    cache.invalidate_models(
+        Vendor, Person, VendorDocument, PersonDocument, Project, Procurement, ProcurementParticipant,
+    )
+    return written
@@ -0,0 +1,87 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+# Apps always read from the primary: a revoked permission or a new session
+# must take effect at once, and their queries are small anyway.
+PRIMARY_ONLY_APPS = {'auth', 'sessions'}
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def choose_replica():
+    """A random replica alias, or the primary when none is configured."""
+    replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+    return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def read_from_replica(alias=None):
+    """
+    Send the reads of the block to ``alias`` (default: a random replica).
+    Writes still go to the primary.
+    """
+    token = _read_alias.set(alias or choose_replica())
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def read_alias(request):
+    """
+    Alias for reads of ``request`` that may lag behind the primary a little,
+    such as exports. A request pinned to the primary after a write gets the
+    primary. Use it with ``QuerySet.using()`` for querysets evaluated after
+    the view returns (streamed responses), where read_from_replica() no
+    longer applies.
+    """
+    if getattr(request, 'read_pinned', True):
+        return DEFAULT_DB_ALIAS
+    return choose_replica()
+
+
+class ReplicaRouter:
+    """
+    Route reads inside read_from_replica() to the chosen replica; every write,
+    and every read outside it, goes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's rows.
+        aliases = {DEFAULT_DB_ALIAS, *getattr(settings, 'DATABASE_REPLICAS', [])}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+def iterate(queryset, chunk_size=2000):
+    """
+    ``queryset.iterator(chunk_size)`` that stays valid behind a
+    transaction-pooling PgBouncer.
+
+    On PostgreSQL ``iterator()`` streams through a server-side cursor, which
+    Django declares WITH HOLD in autocommit mode so that it outlives the
+    query's transaction; a transaction pooler may hand the next fetch to
+    another server connection where that cursor does not exist. Inside a
+    transaction the cursor is an ordinary one, bound to the connection the
+    pooler pins for the transaction, so the iteration runs in one.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or not connection.get_autocommit():
+        yield from queryset.iterator(chunk_size=chunk_size)
+        return
+    with transaction.atomic(using=queryset.db):
+        yield from queryset.iterator(chunk_size=chunk_size)
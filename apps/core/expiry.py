@@ -0,0 +1,226 @@
+"""
+Document expiry tracking for the models owning expiring documents (vendors
+and persons, see DocumentOwnerModel).
+
+Each owner stores the date its documents expire on and a compliance status
+derived from it: ``expired`` before today, ``expiring`` within
+COMPLIANCE_EXPIRING_DAYS, ``valid`` after that, ``none`` without dated
+documents. A document type counts by its latest document, so a renewed
+certificate replaces the old one; a type with an undated document never
+expires. The owner's date is the earliest over its types.
+
+Owners are recomputed from their documents when a transaction that saved
+or deleted one of them commits. ``run()`` (hourly, apps.core.tasks, or
+``manage.py refresh_compliance``) handles the rest incrementally, from the
+time of its previous run:
+
+* owners whose date entered the expiring window or passed since then change
+  status, found by a range over the indexed ``documents_expire_on``;
+* owners of documents updated since then (``updated_at``, indexed) are
+  recomputed, for inserts that send no signals (``bulk_create``, imports).
+
+The time of the last run is a Checkpoint row, so every process sees it.
+Without a previous run (or with ``full=True``) it recomputes every owner; a
+``QuerySet.update`` of the expiry columns makes the next run a full one.
+Raw deletes and a change of COMPLIANCE_EXPIRING_DAYS need a full run.
+"""
+import datetime
+from collections import defaultdict
+from functools import partial
+from threading import local
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+
+from apps.core.db import iterate
+from apps.core.models import Checkpoint, DocumentOwnerModel
+from apps.core.signals import post_bulk_update
+
+CHECKPOINT = 'expiry'
+# Writes committed up to this long after their updated_at are still seen by
+# the next run.
+RUN_OVERLAP = datetime.timedelta(minutes=10)
+
+# document model -> name of its owner foreign key
+_tracked = {}
+_pending = local()
+
+
+def tracked():
+    return dict(_tracked)
+
+
+def compliance_status(expire_on, today=None, days=None):
+    if expire_on is None:
+        return DocumentOwnerModel.NONE
+    today = today or timezone.localdate()
+    days = settings.COMPLIANCE_EXPIRING_DAYS if days is None else days
+    if expire_on < today:
+        return DocumentOwnerModel.EXPIRED
+    if expire_on <= today + datetime.timedelta(days=days):
+        return DocumentOwnerModel.EXPIRING
+    return DocumentOwnerModel.VALID
+
+
+def documents_expire_on(document_model, owner_field, owner_ids=None):
+    """``{owner id: date}`` for the owners with documents (date may be None)."""
+    attname = document_model._meta.get_field(owner_field).attname
+    rows = document_model._default_manager.all()
+    if owner_ids is not None:
+        rows = rows.filter(**{f'{attname}__in': owner_ids})
+    rows = rows.values_list(attname, 'document_type').annotate(
+        latest=Max('expired_date'), dated=Count('expired_date'), total=Count('pk'),
+    ).order_by()
+    expire_on = {}
+    for owner_id, _, latest, dated, total in rows:
+        current = expire_on.setdefault(owner_id, None)
+        if dated < total:
+            # An undated document of this type: the type never expires.
+            continue
+        expire_on[owner_id] = latest if current is None else min(current, latest)
+    return expire_on
+
+
+def recompute(document_model, owner_field, owner_ids=None, today=None):
+    """
+    Store the date and status of the owners ``owner_ids`` (default: all)
+    from their documents; returns how many changed. Takes the models as
+    arguments so migrations can pass their historical ones.
+    """
+    owner_model = document_model._meta.get_field(owner_field).related_model
+    expire_on = documents_expire_on(document_model, owner_field, owner_ids)
+    owners = owner_model._default_manager.only('pk', 'compliance_status', 'documents_expire_on')
+    if owner_ids is not None:
+        owners = owners.filter(pk__in=owner_ids)
+    changed = []
+    for owner in iterate(owners):
+        date = expire_on.get(owner.pk)
+        status = compliance_status(date, today)
+        if (owner.documents_expire_on, owner.compliance_status) != (date, status):
+            owner.documents_expire_on, owner.compliance_status = date, status
+            changed.append(owner)
+    # bulk_update: leaves updated_at alone, this is not an edit of the owner.
+    owner_model._default_manager.bulk_update(
+        changed, ['documents_expire_on', 'compliance_status'], batch_size=1000,
+    )
+    return len(changed)
+
+
+def advance(owner_model, since, today):
+    """
+    Move the owners whose date entered the expiring window, or passed,
+    between the days ``since`` and ``today`` to their new status.
+    """
+    days = datetime.timedelta(days=settings.COMPLIANCE_EXPIRING_DAYS)
+    owners = owner_model._default_manager
+    expired = owners.filter(
+        documents_expire_on__gte=since, documents_expire_on__lt=today,
+    ).exclude(compliance_status=owner_model.EXPIRED).update(compliance_status=owner_model.EXPIRED)
+    expiring = owners.filter(
+        documents_expire_on__gt=since + days, documents_expire_on__lte=today + days,
+    ).exclude(compliance_status=owner_model.EXPIRING).update(compliance_status=owner_model.EXPIRING)
+    return expired + expiring
+
+
+def run(full=False, now=None):
+    """Bring every owner up to date (see the module docstring)."""
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    previous = last_run_at()
+    last_run = None if full else previous
+    changed = 0
+    for document_model, owner_field in _tracked.items():
+        if last_run is None:
+            changed += recompute(document_model, owner_field, today=today)
+            continue
+        owner_model = document_model._meta.get_field(owner_field).related_model
+        changed += advance(owner_model, timezone.localdate(last_run), today)
+        attname = document_model._meta.get_field(owner_field).attname
+        owner_ids = set(
+            document_model._default_manager.filter(updated_at__gte=last_run - RUN_OVERLAP)
+            .values_list(attname, flat=True)
+        )
+        if owner_ids:
+            changed += recompute(document_model, owner_field, owner_ids, today=today)
+    # Only from the checkpoint this run read: one forgotten meanwhile (an
+    # update of the documents) must still make the next run a full one.
+    if previous is None:
+        Checkpoint.objects.get_or_create(name=CHECKPOINT, defaults={'value': now})
+    else:
+        Checkpoint.objects.filter(name=CHECKPOINT, value=previous).update(value=now)
+    return changed
+
+
+def last_run_at():
+    return Checkpoint.objects.filter(name=CHECKPOINT).values_list('value', flat=True).first()
+
+
+def _forget_last_run(using):
+    Checkpoint.objects.using(using).filter(name=CHECKPOINT).delete()
+
+
+def expiring_within(owner_model, days):
+    """Owners whose documents expire (or expired) within ``days`` days."""
+    horizon = timezone.localdate() + datetime.timedelta(days=days)
+    return owner_model._default_manager.filter(documents_expire_on__lte=horizon)
+
+
+def documents_changed(document_model, owner_ids, using=DEFAULT_DB_ALIAS):
+    """Recompute the owners ``owner_ids`` when the current transaction commits."""
+    pending = _pending.__dict__.setdefault(using, defaultdict(set))
+    pending[document_model].update(owner_ids)
+    transaction.on_commit(partial(_flush, using), using=using)
+
+
+def _flush(using):
+    for document_model, owner_ids in _pending.__dict__.pop(using, {}).items():
+        recompute(document_model, _tracked[document_model], owner_ids)
+
+
+def _owner_id(sender, instance):
+    # From __dict__: a deferred owner column stays unknown, without a query.
+    return instance.__dict__.get(sender._meta.get_field(_tracked[sender]).attname)
+
+
+def _remember_owner(sender, instance, **kwargs):
+    # The owner a document is moved away from needs recomputing too.
+    instance._expiry_owner = _owner_id(sender, instance)
+
+
+def _document_saved(sender, instance, raw=False, using=DEFAULT_DB_ALIAS, **kwargs):
+    if raw:
+        return
+    owner_ids = {_owner_id(sender, instance), getattr(instance, '_expiry_owner', None)} - {None}
+    instance._expiry_owner = _owner_id(sender, instance)
+    documents_changed(sender, owner_ids, using=using)
+
+
+def _document_deleted(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    documents_changed(sender, {_owner_id(sender, instance)}, using=using)
+
+
+def _documents_updated(sender, fields, using=DEFAULT_DB_ALIAS, **kwargs):
+    # The updated rows are unknown here, and update() leaves updated_at
+    # alone: the next run recomputes every owner.
+    if fields & {'expired_date', 'document_type', _tracked[sender]}:
+        transaction.on_commit(partial(_forget_last_run, using), using=using)
+
+
+def track(document_model, owner_field):
+    _tracked[document_model] = owner_field
+    label = document_model._meta.label
+    post_init.connect(_remember_owner, sender=document_model, dispatch_uid=f'expiry-init-{label}')
+    post_save.connect(_document_saved, sender=document_model, dispatch_uid=f'expiry-save-{label}')
+    post_delete.connect(_document_deleted, sender=document_model, dispatch_uid=f'expiry-delete-{label}')
+    post_bulk_update.connect(_documents_updated, sender=document_model, dispatch_uid=f'expiry-update-{label}')
+
+
+def connect_expiry_tracking():
+    from apps.persons.models import PersonDocument
+    from apps.vendors.models import VendorDocument
+
+    track(VendorDocument, 'vendor')
+    track(PersonDocument, 'person')
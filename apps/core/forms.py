@@ -0,0 +1,172 @@
+import json
+import posixpath
+
+from botocore.exceptions import ClientError
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import models
+from django.urls import reverse
+
+from apps.core.blobs import original_name_attname, set_original_name
+from apps.core.storage import ContentAddressedStorageMixin, blob_sha256
+
+
+class DirectUploadWidget(forms.Widget):
+    """
+    File picker that uploads straight to the bucket with a presigned POST and
+    submits only the resulting name. The file input has no ``name``, so the
+    browser never sends the file body to Django.
+    """
+    template_name = 'admin/widgets/direct_upload.html'
+
+    class Media:
+        js = ['admin/js/direct_upload.js']
+
+    def __init__(self, model_field, related=None, attrs=None):
+        super().__init__(attrs)
+        self.model_field = model_field
+        self.related = related or {}
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        opts = self.model_field.model._meta
+        context['widget'].update({
+            'current': value if value and getattr(value, 'name', None) else None,
+            'clear_name': f'{name}-clear',
+            'filename_name': f'{name}-filename',
+            'presign_url': reverse('direct_upload_presign'),
+            'model': opts.label_lower,
+            'field': self.model_field.name,
+            'related': json.dumps(self.related),
+            'related_fields': json.dumps([
+                field.name for field in opts.concrete_fields
+                if isinstance(field, models.ForeignKey)
+            ]),
+            'is_required': self.is_required,
+        })
+        return context
+
+    def value_from_datadict(self, data, files, name):
+        key = data.get(name)
+        if key:
+            return key
+        if data.get(f'{name}-clear'):
+            return False
+        return None
+
+    def value_omitted_from_data(self, data, files, name):
+        return name not in data and f'{name}-clear' not in data
+
+
+class DirectUploadField(forms.FileField):
+    """
+    Form field for a name uploaded with ``DirectUploadWidget``: a new name
+    (``str``), ``False`` to clear, or the initial file when nothing changed.
+    """
+
+    def clean(self, data, initial=None):
+        if data is False:
+            if self.required:
+                raise ValidationError(self.error_messages['required'], code='required')
+            return False
+        if not data:
+            if self.required and not initial:
+                raise ValidationError(self.error_messages['required'], code='required')
+            return initial
+        if self.max_length is not None and len(data) > self.max_length:
+            raise ValidationError(
+                self.error_messages['max_length'],
+                code='max_length',
+                params={'max': self.max_length, 'length': len(data)},
+            )
+        return data
+
+    def bound_data(self, data, initial):
+        return initial if data in (None, False) else data
+
+
+class DirectUploadForm(forms.ModelForm):
+    """
+    ModelForm whose ``direct_upload_fields`` are uploaded by the browser
+    instead of through the worker. A submitted blob name is only accepted when
+    the stored object hashes to it; any other name must be exactly what
+    ``upload_to`` gives this instance, and the object must be in storage.
+    """
+    direct_upload_fields = ('file',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        opts = self._meta.model._meta
+        related = {
+            field.name: str(getattr(self.instance, field.attname))
+            for field in opts.concrete_fields
+            if isinstance(field, models.ForeignKey) and getattr(self.instance, field.attname) is not None
+        }
+        for name in self.direct_upload_fields:
+            if name not in self.fields:
+                continue
+            model_field = opts.get_field(name)
+            formfield = self.fields[name]
+            self.fields[name] = DirectUploadField(
+                required=formfield.required,
+                label=formfield.label,
+                help_text=formfield.help_text,
+                max_length=model_field.max_length,
+                widget=DirectUploadWidget(model_field, related=related),
+            )
+
+    def _post_clean(self):
+        uploaded = {
+            name: self.cleaned_data[name] for name in self.direct_upload_fields
+            if isinstance(self.cleaned_data.get(name), str)
+        }
+        super()._post_clean()
+        for name, file_name in uploaded.items():
+            if name not in self._errors:
+                self.verify_upload(name, file_name)
+            if name not in self._errors:
+                self.set_original_name(name, file_name)
+        for name in self.direct_upload_fields:
+            if self.cleaned_data.get(name) is False:
+                self.set_original_name(name, '')
+
+    def set_original_name(self, name, file_name):
+        # The widget posts the file's own name next to the stored one; a name
+        # that is not a blob's still ends with it.
+        model_field = self._meta.model._meta.get_field(name)
+        if not file_name:
+            attname = original_name_attname(self._meta.model, model_field)
+            if attname:
+                setattr(self.instance, attname, '')
+            return
+        filename = self.data.get(f'{self.add_prefix(name)}-filename')
+        if not filename and not blob_sha256(file_name):
+            filename = file_name
+        set_original_name(self.instance, model_field, filename)
+
+    def verify_upload(self, name, file_name):
+        model_field = self._meta.model._meta.get_field(name)
+        storage = model_field.storage
+        if isinstance(storage, ContentAddressedStorageMixin) and blob_sha256(file_name):
+            # The size limit was enforced by the presigned POST policy.
+            if not storage.adopt_blob(file_name):
+                self.add_error(name, 'File belum terunggah atau isinya tidak sesuai, silakan unggah ulang.')
+            return
+
+        try:
+            expected = model_field.generate_filename(self.instance, posixpath.basename(file_name))
+        except ObjectDoesNotExist:
+            # A relation the key depends on is missing; that field reports it.
+            return
+        if file_name != expected:
+            self.add_error(name, 'Lokasi file tidak sesuai, silakan unggah ulang.')
+            return
+
+        try:
+            size = model_field.storage.size(file_name)
+        except (OSError, ClientError):
+            self.add_error(name, 'File belum terunggah ke storage, silakan unggah ulang.')
+            return
+        if size > settings.DIRECT_UPLOAD_MAX_SIZE:
+            self.add_error(name, 'Ukuran file melebihi batas.')
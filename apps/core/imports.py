@@ -0,0 +1,241 @@
+"""
+Streaming CSV/XLSX import.
+
+Files are read row by row and written in batches: each batch resolves its
+foreign keys with one ``__in`` query per relation, upserts on the natural key
+and commits in its own transaction. A bad row is reported with its line
+number and skipped; it never aborts the rest of the file.
+"""
+import csv
+import io
+import os
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from apps.core import cache, search
+
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.failed += 1
+        # Keep memory flat on files where every row is broken.
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    @property
+    def processed(self):
+        return self.created + self.updated + self.failed
+
+    def __str__(self):
+        return f'{self.created} dibuat, {self.updated} diperbarui, {self.failed} gagal'
+
+
+def read_rows(fileobj, filename):
+    """Yield ``(line_number, {column: value})`` from a CSV or XLSX file."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.xlsx':
+        yield from _read_xlsx(fileobj)
+    elif extension in ('.csv', '.txt'):
+        yield from _read_csv(fileobj)
+    else:
+        raise ValueError(f'Unsupported file type "{extension}", use .csv or .xlsx')
+
+
+def _normalize_header(header):
+    return [str(name or '').strip().lower() for name in header]
+
+
+def _read_csv(fileobj):
+    if isinstance(fileobj, io.TextIOBase):
+        text = fileobj
+    else:
+        text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    header = _normalize_header(next(reader, []))
+    for line, values in enumerate(reader, start=2):
+        if any(value.strip() for value in values):
+            yield line, dict(zip(header, (value.strip() for value in values)))
+
+
+def _xlsx_value(value):
+    # Numbers become text as a CSV would give them, so a numeric NPWP cell
+    # matches the stored key; dates keep their type.
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return str(value)
+    return value
+
+
+def _read_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:  # pragma: no cover - optional dependency
+        raise ValueError('Reading .xlsx files requires openpyxl (pip install openpyxl)')
+
+    # read_only streams rows from the zip instead of building the sheet.
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _normalize_header(next(rows, []))
+        for line, values in enumerate(rows, start=2):
+            if any(value not in (None, '') for value in values):
+                yield line, {column: _xlsx_value(value) for column, value in zip(header, values)}
+    finally:
+        workbook.close()
+
+
+class BaseImporter:
+    """
+    Subclasses set ``model``, ``fields`` (model fields read straight from the
+    same-named columns), ``key_fields`` (the natural key to upsert on),
+    ``required_columns`` (the key and the model's required fields, checked
+    per row) and may override ``resolve`` to turn lookup columns into foreign
+    keys.
+
+    Only the columns present in the file are written: an update leaves the
+    other fields as they are, and a new row gets the model defaults and
+    ``create_defaults``. An empty cell clears an optional field and leaves a
+    required one unchanged.
+    """
+    model = None
+    fields = ()
+    key_fields = ()
+    required_columns = ()
+    create_defaults = {}
+    batch_size = 1000
+
+    def __init__(self, batch_size=None, dry_run=False):
+        self.batch_size = batch_size or self.batch_size
+        self.dry_run = dry_run
+        self.result = ImportResult()
+
+    def run(self, fileobj, filename):
+        rows = read_rows(fileobj, filename)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+        return self.result
+
+    def clean_row(self, row):
+        missing = [column for column in self.required_columns if row.get(column) in (None, '')]
+        if missing:
+            raise ValidationError(f'Kolom wajib kosong: {", ".join(missing)}')
+
+        values = {}
+        errors = []
+        for name in self.fields:
+            if name not in row:
+                continue
+            field = self.model._meta.get_field(name)
+            raw = row[name]
+            if raw in (None, ''):
+                if not field.blank:
+                    continue
+                raw = field.get_default() if field.has_default() else ('' if not field.null else None)
+            try:
+                values[name] = field.clean(raw, None)
+            except ValidationError as exc:
+                errors.append(f'{name}: {"; ".join(exc.messages)}')
+        if errors:
+            raise ValidationError(errors)
+        return values
+
+    def resolve(self, rows):
+        """
+        Set foreign keys on ``[(line, row, values)]`` with set-based lookups.
+        Return the rows that resolved; report the others via ``self.fail``.
+        """
+        return rows
+
+    def fail(self, line, error):
+        if isinstance(error, ValidationError):
+            error = '; '.join(error.messages)
+        self.result.add_error(line, str(error))
+
+    def key_of(self, values):
+        return tuple(values[name] for name in self.key_fields)
+
+    def existing(self, keys):
+        """Map natural key -> existing instance for the given keys."""
+        raise NotImplementedError
+
+    def import_batch(self, batch):
+        cleaned = []
+        for line, row in batch:
+            try:
+                cleaned.append((line, row, self.clean_row(row)))
+            except ValidationError as exc:
+                self.fail(line, exc)
+        cleaned = self.resolve(cleaned)
+
+        # Later rows win when the file repeats a key.
+        by_key = {}
+        for line, row, values in cleaned:
+            by_key[self.key_of(values)] = (line, values)
+        if not by_key:
+            return
+
+        try:
+            self.write_atomic(by_key)
+        except DatabaseError:
+            # Isolate the offending rows instead of dropping the whole batch.
+            for key, (line, values) in by_key.items():
+                try:
+                    self.write_atomic({key: (line, values)})
+                except DatabaseError as exc:
+                    self.fail(line, exc)
+
+    def write_atomic(self, by_key):
+        with transaction.atomic():
+            created, updated = self.write(by_key)
+            if self.dry_run:
+                transaction.set_rollback(True)
+        self.result.created += created
+        self.result.updated += updated
+
+    def write(self, by_key):
+        existing = self.existing(list(by_key))
+        now = timezone.now()
+        to_create, to_update = [], []
+        # The columns the rows carry; the other fields keep their values.
+        update_fields = {}
+        for key, (line, values) in by_key.items():
+            obj = existing.get(key)
+            if obj is None:
+                to_create.append(self.model(**{**self.create_defaults, **values}))
+            else:
+                for name, value in values.items():
+                    setattr(obj, name, value)
+                    if name not in self.key_fields:
+                        update_fields[name] = None
+                obj.updated_at = now
+                to_update.append(obj)
+
+        self.model.objects.bulk_create(to_create)
+        if to_update:
+            self.model.objects.bulk_update(to_update, [*update_fields, 'updated_at'])
+        self.written(to_create + to_update)
+        return len(to_create), len(to_update)
+
+    def written(self, objs):
+        """Update what post_save would have: bulk_create and bulk_update send none."""
+        search.objects_changed(self.model, objs)
+        cache.models_changed(self.model)
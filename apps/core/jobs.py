@@ -0,0 +1,239 @@
+"""
+Background jobs: work that should not hold up a request, retried when it
+fails, and periodic work, run by ``manage.py run_worker``.
+
+A task is a function decorated with ``@task``, in the ``tasks`` module of
+an app (imported by every worker)::
+
+    @task(max_retries=5, retry_backoff=60)
+    def send_reminder(vendor_id):
+        ...
+
+    send_reminder.delay(str(vendor.pk))
+
+``delay`` queues a job with JSON-serializable arguments (pass primary keys,
+not instances); ``enqueue`` also takes a ``countdown`` or an ``eta``. A job
+that raises is retried after ``retry_backoff * 2 ** (attempt - 1)`` seconds
+(capped at ``retry_backoff_max``, with jitter) until it has run
+``max_retries + 1`` times, and is then kept as failed. Jobs may run twice,
+e.g. when a worker dies mid-job, so tasks should be idempotent; a job whose
+worker is lost (or that outruns TASK_VISIBILITY_TIMEOUT) counts as an
+attempt too.
+
+``@task(every=seconds)`` runs a task without arguments periodically: every
+worker queues the run of the current period, and the broker keeps only the
+first of them (``unique_key``).
+
+The broker is the database (apps.core.brokers.DatabaseBroker) unless
+TASK_BROKER_URL points at a Redis server. With TASK_EAGER, ``delay`` runs
+the task in the calling process when the transaction commits instead (for
+development without a worker).
+"""
+import logging
+import random
+import signal
+import time
+import traceback
+from datetime import datetime
+from functools import lru_cache, partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import autodiscover_modules
+
+from apps.core.brokers import DatabaseBroker, RedisBroker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = 'default'
+# How often a worker queues due periodic runs and requeues lost jobs (seconds).
+SCHEDULE_INTERVAL = 10
+
+_registry = {}
+
+
+@lru_cache(maxsize=None)
+def _broker(url):
+    if url:
+        return RedisBroker(url, prefix=f'procurement-{settings.ENVIRONMENT}:jobs')
+    return DatabaseBroker()
+
+
+def get_broker():
+    return _broker(settings.TASK_BROKER_URL)
+
+
+def registered_tasks():
+    return dict(_registry)
+
+
+def _timestamp(value):
+    return value.timestamp() if isinstance(value, datetime) else value
+
+
+class Task:
+    def __init__(self, func, name, queue, max_retries, retry_backoff, retry_backoff_max, every):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.every = every
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f'<Task {self.name}>'
+
+    def message(self, args=(), kwargs=None, eta=None):
+        now = time.time()
+        return {
+            'task': self.name,
+            'queue': self.queue,
+            'args': list(args),
+            'kwargs': kwargs or {},
+            'attempts': 0,
+            'enqueued_at': now,
+            'eta': now if eta is None else _timestamp(eta),
+            'started_at': None,
+        }
+
+    def enqueue(self, args=(), kwargs=None, countdown=None, eta=None, unique_key=None, using=None):
+        """
+        Queue a run of the task, due at ``eta`` (a datetime or timestamp) or
+        ``countdown`` seconds from now. ``unique_key``: skip it if a job with
+        that key was already queued.
+        """
+        if countdown is not None:
+            eta = time.time() + countdown
+        message = self.message(args, kwargs, eta)
+        if settings.TASK_EAGER:
+            transaction.on_commit(partial(self.func, *message['args'], **message['kwargs']), using=using)
+            return
+        broker = get_broker()
+        if broker.transactional:
+            broker.enqueue(message, unique_key)
+        else:
+            transaction.on_commit(partial(broker.enqueue, message, unique_key), using=using)
+
+    def delay(self, *args, **kwargs):
+        self.enqueue(args, kwargs)
+
+    def backoff(self, attempt):
+        """Seconds to wait before retrying after the ``attempt``-th run failed."""
+        delay = min(self.retry_backoff * 2 ** (attempt - 1), self.retry_backoff_max)
+        # Jitter, so jobs that failed together do not retry together.
+        return delay * random.uniform(0.8, 1.2)
+
+
+def task(func=None, *, name=None, queue=DEFAULT_QUEUE, max_retries=3, retry_backoff=30,
+         retry_backoff_max=3600, every=None):
+    """Register ``func`` as a task (see the module docstring)."""
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        _registry[task_name] = Task(func, task_name, queue, max_retries, retry_backoff, retry_backoff_max, every)
+        return _registry[task_name]
+
+    return register(func) if func is not None else register
+
+
+def autodiscover():
+    autodiscover_modules('tasks')
+
+
+def schedule_periodic(broker, queues, now=None):
+    """Queue the run of the current period of every periodic task of ``queues``."""
+    now = time.time() if now is None else now
+    queued = 0
+    for task_ in _registry.values():
+        if task_.every is None or task_.queue not in queues:
+            continue
+        period = int(now // task_.every)
+        queued += broker.enqueue(task_.message(), unique_key=f'periodic:{task_.name}:{period}')
+    return queued
+
+
+class Worker:
+    """
+    Takes jobs of ``queues`` from the broker and runs them one at a time;
+    ``manage.py run_worker`` runs one per process.
+    """
+
+    def __init__(self, queues=(DEFAULT_QUEUE,), broker=None, poll_interval=1.0):
+        self.queues = list(queues)
+        self.broker = broker or get_broker()
+        self.poll_interval = poll_interval
+        self.stopping = False
+        self.scheduled_at = 0
+
+    def stop(self, *args):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info('Worker started on %s', ', '.join(self.queues))
+        while not self.stopping:
+            if not self.run_once():
+                time.sleep(self.poll_interval)
+        logger.info('Worker stopped')
+
+    def run_once(self):
+        """Schedule when due, then run one job; whether there was one."""
+        close_old_connections()
+        try:
+            if time.monotonic() - self.scheduled_at >= SCHEDULE_INTERVAL:
+                self.schedule()
+            message = self.broker.reserve(self.queues)
+            if message is not None:
+                self.execute(message)
+            return message is not None
+        finally:
+            close_old_connections()
+
+    def schedule(self):
+        self.scheduled_at = time.monotonic()
+        schedule_periodic(self.broker, self.queues)
+        requeued, failed = self.broker.requeue_stale(
+            settings.TASK_VISIBILITY_TIMEOUT,
+            {task_.name: task_.max_retries + 1 for task_ in _registry.values()},
+        )
+        if requeued:
+            logger.warning('Requeued %d job(s) of lost workers', requeued)
+        if failed:
+            logger.error('Failed %d job(s) that lost their worker on every attempt', failed)
+
+    def execute(self, message):
+        task_ = _registry.get(message['task'])
+        if task_ is None:
+            logger.error('Unknown task %s', message['task'])
+            self.broker.fail(message, f'Unknown task {message["task"]}')
+            return
+        latency = message['started_at'] - message['eta']
+        started = time.monotonic()
+        try:
+            task_.func(*message['args'], **message['kwargs'])
+        except Exception:
+            error = traceback.format_exc()
+            if message['attempts'] <= task_.max_retries:
+                delay = task_.backoff(message['attempts'])
+                logger.warning(
+                    'Job %s %s failed (attempt %d), retrying in %.0fs',
+                    message['id'], task_.name, message['attempts'], delay, exc_info=True,
+                )
+                self.broker.retry(message, time.time() + delay, error)
+            else:
+                logger.error(
+                    'Job %s %s failed after %d attempts',
+                    message['id'], task_.name, message['attempts'], exc_info=True,
+                )
+                self.broker.fail(message, error)
+        else:
+            self.broker.ack(message)
+            logger.info(
+                'Job %s %s done: waited %.3fs, ran %.3fs',
+                message['id'], task_.name, latency, time.monotonic() - started,
+            )
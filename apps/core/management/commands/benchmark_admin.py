@@ -0,0 +1,226 @@
+import json
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from apps.core import datagen
+from apps.core.middleware import count_queries
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed throwaway databases at the given sizes and measure latency, query '
+        'count and peak memory of every admin changelist, filter, search and '
+        'change form. Writes one JSON object per measurement.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[10000, 100000, 1000000],
+            help='Dataset sizes, in ProcurementParticipant rows.',
+        )
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Append JSON lines here instead of stdout.')
+        parser.add_argument(
+            '--compare',
+            help='Previous output to compare against; exits non-zero on regressions.',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Allowed relative latency growth before --compare flags it.',
+        )
+
+    def handle(self, *args, **options):
+        self.run_id = datetime.now(timezone.utc).isoformat()
+        self.revision = _git_revision()
+        results = []
+
+        media_root = tempfile.mkdtemp(prefix='benchmark-media-')
+        # Local stand-in for S3: files are never read and URLs are signed
+        # offline with dummy credentials.
+        with override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=media_root,
+            AWS_ACCESS_KEY_ID='benchmark',
+            AWS_SECRET_ACCESS_KEY='benchmark',
+            AWS_STORAGE_BUCKET_NAME='benchmark-bucket',
+            QUERY_BUDGET_STRICT=False,
+            DEBUG=False,
+        ):
+            for size in options['sizes']:
+                results.extend(self.benchmark_size(size, options))
+
+        lines = [json.dumps(result, sort_keys=True) for result in results]
+        if options['output']:
+            with open(options['output'], 'a') as fh:
+                fh.write(''.join(line + '\n' for line in lines))
+        else:
+            for line in lines:
+                self.stdout.write(line)
+
+        if options['compare']:
+            regressions = self.compare(results, options['compare'], options['tolerance'])
+            if regressions:
+                for message in regressions:
+                    self.stderr.write(message)
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}')
+
+    def benchmark_size(self, size, options):
+        self.stderr.write(f'Seeding dataset of {size} bids...')
+        if connection.vendor == 'sqlite':
+            # A file, not the shared in-memory test database, so every size
+            # starts empty and large datasets are not limited by RAM.
+            connection.settings_dict['TEST']['NAME'] = (
+                f'{tempfile.gettempdir()}/benchmark-{size}.sqlite3'
+            )
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            started = time.perf_counter()
+            datagen.generate(size, seed=options['seed'], log=lambda msg: self.stderr.write(f'  {msg}'))
+            self.stderr.write(f'  seeded in {time.perf_counter() - started:.1f}s')
+
+            user = get_user_model().objects.create_superuser('benchmark', 'b@example.com', 'benchmark')
+            # Record broken pages as their status code instead of aborting.
+            client = Client(raise_request_exception=False)
+            client.force_login(user)
+
+            results = []
+            for label, model_admin, url in self.admin_urls(user):
+                result = self.measure(client, url, options['repeat'])
+                result.update({
+                    'run': self.run_id,
+                    'revision': self.revision,
+                    'vendor': connection.vendor,
+                    'size': size,
+                    'view': label,
+                    'url': url,
+                    'budget': self.budget_for(model_admin, label),
+                })
+                results.append(result)
+                self.stderr.write(
+                    f'  {label:60s} {result["latency_ms"]["median"]:9.1f}ms '
+                    f'{result["queries"]:4d}q {result["peak_kb"]:9.0f}KB'
+                )
+            return results
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def admin_urls(self, user):
+        factory = RequestFactory()
+        for model, model_admin in admin.site._registry.items():
+            opts = model._meta
+            name = f'{opts.app_label}.{opts.model_name}'
+            changelist = reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist')
+            yield f'{name}:changelist', model_admin, changelist
+
+            request = factory.get(changelist)
+            request.user = user
+            cl = model_admin.get_changelist_instance(request)
+            for spec in cl.filter_specs:
+                # First non-"All" choice of each filter, as the admin links it.
+                choices = [c for c in spec.choices(cl) if not c.get('selected')]
+                if choices:
+                    yield (
+                        f'{name}:filter:{spec.title}', model_admin,
+                        changelist + choices[0]['query_string'],
+                    )
+
+            if model_admin.search_fields:
+                sample = model._default_manager.order_by().first()
+                term = str(sample).split('-')[0][:12] if sample else 'a'
+                yield f'{name}:search', model_admin, f'{changelist}?q={term}'
+
+            obj = model._default_manager.order_by().first()
+            if obj is not None:
+                yield (
+                    f'{name}:change', model_admin,
+                    reverse(f'admin:{opts.app_label}_{opts.model_name}_change', args=[obj.pk]),
+                )
+
+    def budget_for(self, model_admin, label):
+        budget = getattr(model_admin, 'query_budget', None)
+        if isinstance(budget, dict):
+            view = 'change' if label.endswith(':change') else 'changelist'
+            budget = budget.get(view)
+        return budget
+
+    def measure(self, client, url, repeat):
+        timings = []
+        queries = 0
+        status = None
+        for _ in range(max(1, repeat)):
+            with count_queries() as counter:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = counter.count
+            status = response.status_code
+
+        # A separate pass: tracing every allocation slows the request down
+        # several times over, so it must not overlap the timed ones.
+        tracemalloc.start()
+        try:
+            client.get(url)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return {
+            'status': status,
+            'queries': queries,
+            'peak_kb': peak / 1024,
+            'latency_ms': {
+                'min': min(timings),
+                'median': statistics.median(timings),
+                'max': max(timings),
+            },
+        }
+
+    def compare(self, results, path, tolerance):
+        baseline = {}
+        with open(path) as fh:
+            for line in fh:
+                if line.strip():
+                    row = json.loads(line)
+                    # Later runs in the file win.
+                    baseline[(row['vendor'], row['size'], row['view'])] = row
+
+        regressions = []
+        for row in results:
+            where = f'{row["view"]} @ {row["size"]}'
+            if row['status'] >= 500:
+                regressions.append(f'{where}: HTTP {row["status"]}')
+            if row['budget'] is not None and row['queries'] > row['budget']:
+                regressions.append(f'{where}: {row["queries"]} queries over budget {row["budget"]}')
+
+            old = baseline.get((row['vendor'], row['size'], row['view']))
+            if old is None:
+                continue
+            if row['queries'] > old['queries']:
+                regressions.append(f'{where}: queries {old["queries"]} -> {row["queries"]}')
+            old_ms, new_ms = old['latency_ms']['median'], row['latency_ms']['median']
+            if new_ms > old_ms * (1 + tolerance):
+                regressions.append(f'{where}: median {old_ms:.1f}ms -> {new_ms:.1f}ms')
+        return regressions
@@ -0,0 +1,100 @@
+import json
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from apps.vendors.models import Vendor
+
+VERSIONS = ('v4', 'v7')
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-insert vendors into a scratch database once with random (v4) '
+        'and once with time-ordered (v7) primary keys, and report insert '
+        'throughput and the size of the table\'s indexes. Writes one JSON '
+        'object per key version.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--output', help='Append JSON lines here instead of stdout.')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Index sizes are not implemented for {connection.vendor}')
+
+        results = [self.benchmark(version, options) for version in VERSIONS]
+        lines = [json.dumps(result, sort_keys=True) for result in results]
+        if options['output']:
+            with open(options['output'], 'a') as fh:
+                fh.write(''.join(line + '\n' for line in lines))
+        else:
+            for line in lines:
+                self.stdout.write(line)
+
+    def benchmark(self, version, options):
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = (
+                f'{tempfile.gettempdir()}/benchmark-pk-{version}.sqlite3'
+            )
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            rows, batch_size = options['rows'], options['batch_size']
+            timings = []
+            with override_settings(PRIMARY_KEY_UUID=version):
+                for start in range(0, rows, batch_size):
+                    batch = [
+                        Vendor(
+                            name=f'Vendor {index}',
+                            vendor_type=Vendor.VENDOR_TYPE[index % len(Vendor.VENDOR_TYPE)][0],
+                            email=f'vendor{index}@example.com',
+                            phone='0',
+                        )
+                        for index in range(start, min(rows, start + batch_size))
+                    ]
+                    started = time.perf_counter()
+                    Vendor.objects.bulk_create(batch)
+                    timings.append((len(batch), time.perf_counter() - started))
+
+            # Throughput over the last tenth shows how it degrades as the
+            # indexes outgrow the cache.
+            tail = timings[-max(1, len(timings) // 10):]
+            result = {
+                'vendor': connection.vendor,
+                'version': version,
+                'rows': rows,
+                'rows_per_s': rows / sum(seconds for _, seconds in timings),
+                'tail_rows_per_s': sum(n for n, _ in tail) / sum(seconds for _, seconds in tail),
+                'index_kb': self.index_sizes(Vendor._meta.db_table),
+            }
+            self.stderr.write(
+                f'  {version}: {result["rows_per_s"]:9.0f} rows/s '
+                f'(last 10%: {result["tail_rows_per_s"]:9.0f}), indexes '
+                + ', '.join(f'{name} {kb:.0f}KB' for name, kb in sorted(result['index_kb'].items()))
+            )
+            return result
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def index_sizes(self, table):
+        """KiB on disk of each index of ``table``."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(
+                    'SELECT s.name, SUM(s.pgsize) FROM dbstat s '
+                    'JOIN sqlite_schema m ON m.name = s.name '
+                    "WHERE m.type = 'index' AND m.tbl_name = %s GROUP BY s.name",
+                    [table],
+                )
+            else:
+                cursor.execute(
+                    'SELECT indexrelid::regclass::text, pg_relation_size(indexrelid) '
+                    'FROM pg_index WHERE indrelid = %s::regclass',
+                    [table],
+                )
+            return {name: size / 1024 for name, size in cursor.fetchall()}
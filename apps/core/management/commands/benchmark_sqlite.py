@@ -0,0 +1,151 @@
+import json
+import multiprocessing
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.test.utils import override_settings
+
+from apps.core import datagen
+from apps.procurements.models import ProcurementParticipant
+
+PROFILES = ('default', 'tuned')
+PAGE_SIZE = 100
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+def _worker(path, tuned, seconds, write_ratio, seed, ids, results):
+    """One gunicorn-like worker: changelist reads and admin-style saves."""
+    connection.settings_dict['NAME'] = path
+    rng = random.Random(seed)
+    reads, writes, errors = [], [], 0
+    statuses = [code for code, _ in ProcurementParticipant.STATUS]
+    with override_settings(SQLITE_TUNED=tuned):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if rng.random() < write_ratio:
+                    # Read then write in one transaction, like a change form.
+                    with transaction.atomic():
+                        bid = ProcurementParticipant.objects.get(pk=rng.choice(ids))
+                        bid.status = rng.choice(statuses)
+                        bid.save(update_fields=['status'])
+                    writes.append(time.perf_counter() - started)
+                else:
+                    offset = rng.randrange(0, max(1, len(ids) - PAGE_SIZE))
+                    queryset = ProcurementParticipant.objects.select_related(
+                        'procurement__project', 'vendor',
+                    ).order_by('-submission_date')
+                    queryset.count()
+                    list(queryset[offset:offset + PAGE_SIZE])
+                    reads.append(time.perf_counter() - started)
+            except OperationalError:
+                # "database is locked"
+                errors += 1
+        connection.close()
+    results.put({'reads': reads, 'writes': writes, 'errors': errors})
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent read/write throughput of an SQLite database with '
+        'Django\'s defaults and with the SQLITE_TUNED profile: several worker '
+        'processes serve changelist pages and save bids for a fixed time on '
+        'copies of the same seeded database. Writes one JSON object per profile.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=20000, help='ProcurementParticipant rows to seed.')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--write-ratio', type=float, default=0.2)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Append JSON lines here instead of stdout.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('benchmark_sqlite needs an SQLite default database')
+
+        workdir = tempfile.mkdtemp(prefix='benchmark-sqlite-')
+        connection.settings_dict['TEST']['NAME'] = f'{workdir}/seed.sqlite3'
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.stderr.write(f'Seeding dataset of {options["size"]} bids...')
+            datagen.generate(options['size'], seed=options['seed'], log=lambda msg: self.stderr.write(f'  {msg}'))
+            ids = list(ProcurementParticipant.objects.values_list('pk', flat=True))
+            seed_path = connection.settings_dict['NAME']
+            # Closing the last connection also folds any WAL back into the file.
+            connections.close_all()
+
+            results = []
+            for profile in PROFILES:
+                path = f'{workdir}/{profile}.sqlite3'
+                shutil.copyfile(seed_path, path)
+                with sqlite3.connect(path) as db:
+                    # The journal mode is stored in the file; start each
+                    # profile from Django's default.
+                    db.execute('PRAGMA journal_mode = DELETE')
+                results.append(self.run_profile(profile, path, ids, options))
+                connection.settings_dict['NAME'] = seed_path
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        lines = [json.dumps(result, sort_keys=True) for result in results]
+        if options['output']:
+            with open(options['output'], 'a') as fh:
+                fh.write(''.join(line + '\n' for line in lines))
+        else:
+            for line in lines:
+                self.stdout.write(line)
+
+    def run_profile(self, profile, path, ids, options):
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        workers = [
+            context.Process(target=_worker, args=(
+                path, profile == 'tuned', options['seconds'], options['write_ratio'],
+                options['seed'] + index, ids, queue,
+            ))
+            for index in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        # Drain before joining: a child cannot exit while its result is unread.
+        outcomes = [queue.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+        reads = [value for outcome in outcomes for value in outcome['reads']]
+        writes = [value for outcome in outcomes for value in outcome['writes']]
+        errors = sum(outcome['errors'] for outcome in outcomes)
+        seconds = options['seconds']
+        result = {
+            'profile': profile,
+            'size': len(ids),
+            'workers': options['workers'],
+            'seconds': seconds,
+            'write_ratio': options['write_ratio'],
+            'reads_per_s': len(reads) / seconds,
+            'writes_per_s': len(writes) / seconds,
+            'locked_errors': errors,
+            'read_ms': {'p50': _percentile(reads, 0.5), 'p95': _percentile(reads, 0.95)},
+            'write_ms': {'p50': _percentile(writes, 0.5), 'p95': _percentile(writes, 0.95)},
+        }
+        self.stderr.write(
+            f'  {profile:8s} {result["reads_per_s"]:8.1f} reads/s {result["writes_per_s"]:8.1f} writes/s '
+            f'{errors:5d} locked  read p95 {result["read_ms"]["p95"] or 0:7.1f}ms '
+            f'write p95 {result["write_ms"]["p95"] or 0:7.1f}ms'
+        )
+        return result
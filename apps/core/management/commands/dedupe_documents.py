@@ -0,0 +1,74 @@
+import posixpath
+
+from botocore.exceptions import ClientError
+from django.core.management.base import BaseCommand
+from django.db.models import Case, F, Value, When
+
+from apps.core.blobs import adjust_ref_count, count_references, original_name_attname, tracked_fields
+from apps.core.storage import blob_sha256
+
+
+class Command(BaseCommand):
+    help = (
+        'Move files saved before content-addressed storage into blobs: each '
+        'distinct file is stored once, rows are repointed (keeping the old '
+        'file name for downloads) and the old copies are deleted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-old', action='store_true',
+            help='Repoint rows but leave the old objects in the bucket.',
+        )
+
+    def handle(self, *args, **options):
+        moved = {}
+        rows = missing = 0
+        for model, fields in tracked_fields().items():
+            for field in fields:
+                storage = field.storage
+                name_attname = original_name_attname(model, field)
+                manager = model._default_manager
+                # Materialized: the loop below rewrites the rows it reads.
+                names = list(
+                    manager.exclude(**{field.attname: ''})
+                    .exclude(**{f'{field.attname}__isnull': True})
+                    .values_list(field.attname, flat=True)
+                    .distinct()
+                    .order_by()
+                )
+                for name in names:
+                    if blob_sha256(name):
+                        continue
+                    if name not in moved:
+                        try:
+                            with storage.open(name) as fh:
+                                moved[name] = (storage.save(name, fh), storage)
+                        except (OSError, ClientError) as exc:
+                            missing += 1
+                            self.stderr.write(f'{model._meta.label}.{field.name}: {name}: {exc}')
+                            continue
+                    blob = moved[name][0]
+                    changes = {field.attname: blob}
+                    if name_attname:
+                        changes[name_attname] = Case(
+                            When(**{name_attname: ''}, then=Value(posixpath.basename(name))),
+                            default=F(name_attname),
+                        )
+                    updated = manager.filter(**{field.attname: name}).update(**changes)
+                    adjust_ref_count(blob, updated)
+                    rows += updated
+
+        deleted = 0
+        if not options['keep_old']:
+            # Only delete an old object once no row anywhere points at it.
+            referenced = count_references()
+            for name, (blob, storage) in moved.items():
+                if not referenced.get(name):
+                    storage.delete(name)
+                    deleted += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(moved)} file(s) moved into {len({blob for blob, _ in moved.values()})} blob(s), '
+            f'{rows} row(s) repointed, {deleted} old object(s) deleted, {missing} missing'
+        ))
@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.blobs import count_references
+from apps.core.db import iterate
+from apps.core.models import Blob
+from apps.core.storage import ContentAddressedStorageMixin
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount references to content-addressed blobs and delete the ones '
+        'that have been unreferenced for longer than the grace period, and '
+        'objects under the blob prefix that were uploaded but never saved.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=24,
+            help='Keep unreferenced blobs this long, for uploads not yet saved.',
+        )
+        parser.add_argument('--no-recount', action='store_true', help='Trust the stored counts.')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if not options['no_recount']:
+            fixed = self.recount(options['dry_run'])
+            self.stdout.write(f'{fixed} reference count(s) corrected')
+
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        candidates = Blob.objects.filter(ref_count__lte=0, updated_at__lt=cutoff)
+        deleted = freed = 0
+        # Materialized: the loop deletes the rows it reads.
+        for pk, name, size in list(candidates.values_list('pk', 'name', 'size')):
+            if options['dry_run']:
+                deleted, freed = deleted + 1, freed + size
+                continue
+            with transaction.atomic():
+                # Re-check in the DELETE itself: a blob touched by an upload
+                # in the meantime is no longer past the cutoff and survives.
+                removed, _ = Blob.objects.filter(
+                    pk=pk, ref_count__lte=0, updated_at__lt=cutoff,
+                ).delete()
+                if not removed:
+                    continue
+                # Before the commit: the deleted row stays locked, so an
+                # upload's touch_blob waits, then finds no row and uploads
+                # the object again, after this delete instead of before it.
+                default_storage.delete(name)
+            deleted, freed = deleted + 1, freed + size
+
+        orphans = self.sweep(cutoff, options['dry_run'])
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {deleted} blob(s), {freed / 1024 / 1024:,.1f} MB, '
+            f'and {orphans} orphaned upload(s)'
+        ))
+
+    def recount(self, dry_run):
+        counts = count_references()
+        changed = []
+        for blob in iterate(Blob.objects.only('pk', 'name', 'ref_count')):
+            actual = counts.get(blob.name, 0)
+            if blob.ref_count != actual:
+                blob.ref_count = actual
+                changed.append(blob)
+        if changed and not dry_run:
+            Blob.objects.bulk_update(changed, ['ref_count'], batch_size=1000)
+        return len(changed)
+
+    def sweep(self, cutoff, dry_run):
+        """Delete blob-named objects without a Blob row, e.g. abandoned uploads."""
+        storage = default_storage
+        if not isinstance(storage, ContentAddressedStorageMixin):
+            return 0
+        root = storage.blob_root()
+        orphans = 0
+        for directory in storage.listdir(root)[0]:
+            names = [f'{root}/{directory}/{name}' for name in storage.listdir(f'{root}/{directory}')[1]]
+            known = set(Blob.objects.filter(name__in=names).values_list('name', flat=True))
+            for name in names:
+                if name in known or storage.get_modified_time(name) >= cutoff:
+                    continue
+                orphans += 1
+                if not dry_run:
+                    storage.delete(name)
+        return orphans
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import datagen
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with synthetic vendors, persons, documents, projects, '
+        'procurements and bids for load testing.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scale', type=int,
+            help='Approximate number of ProcurementParticipant rows; other tables scale with it.',
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--chunk-size', type=int, default=50000,
+            help='Rows per unit of work handed to a worker.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Worker processes. SQLite serializes writers, so this mostly helps on PostgreSQL.',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Seed for value distributions.')
+
+    def handle(self, *args, **options):
+        if options['scale'] < 1:
+            raise CommandError('scale must be positive')
+
+        started = time.perf_counter()
+        try:
+            written = datagen.generate(
+                options['scale'],
+                batch_size=options['batch_size'],
+                seed=options['seed'],
+                workers=options['workers'],
+                chunk_size=options['chunk_size'],
+                log=lambda message: self.stdout.write(f'  {message}'),
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        total = sum(written.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)'
+        ))
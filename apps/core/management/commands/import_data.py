@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+IMPORTERS = {
+    'vendors': 'apps.vendors.importers.VendorImporter',
+    'persons': 'apps.persons.importers.PersonImporter',
+    'bids': 'apps.procurements.importers.ProcurementParticipantImporter',
+}
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV/XLSX file of vendors, persons or bids into the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Validate and roll back.')
+
+    def handle(self, *args, **options):
+        importer = import_string(IMPORTERS[options['kind']])(
+            batch_size=options['batch_size'], dry_run=options['dry_run'],
+        )
+        try:
+            with open(options['path'], 'rb') as fh:
+                result = importer.run(fh, options['path'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        for line, message in result.errors:
+            self.stderr.write(f'baris {line}: {message}')
+        if result.failed > len(result.errors):
+            self.stderr.write(f'... {result.failed - len(result.errors)} error lain tidak ditampilkan')
+        style = self.style.WARNING if result.failed else self.style.SUCCESS
+        self.stdout.write(style(str(result)))
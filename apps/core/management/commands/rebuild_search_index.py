@@ -0,0 +1,43 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.core import search
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the admin search index from the tables, in batches that '
+        'commit one by one, and drop the entries of deleted objects. Run it '
+        'after writes that bypass model signals, such as QuerySet.update on '
+        'indexed fields or raw inserts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help='Only these models, as app_label.model_name.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        models = []
+        for label in options['models']:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError) as exc:
+                raise CommandError(str(exc))
+            if model not in search.registered_models():
+                raise CommandError(f'{model._meta.label} is not indexed for search')
+            models.append(model)
+
+        started = time.perf_counter()
+        counts = search.rebuild(
+            models or None,
+            batch_size=options['batch_size'],
+            using=options['database'],
+            log=lambda message: self.stdout.write(f'  {message}'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{sum(counts.values())} entries in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core import expiry
+
+
+class Command(BaseCommand):
+    help = (
+        'Bring the document compliance status of vendors and persons up to '
+        'date: the owners whose documents entered the expiring window or '
+        'expired since the last run, and those with documents changed since '
+        'then. The workers run it hourly.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Recompute every owner, e.g. after raw deletes or a new COMPLIANCE_EXPIRING_DAYS.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        changed = expiry.run(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{changed} owner(s) changed in {time.perf_counter() - started:.1f}s'
+        ))
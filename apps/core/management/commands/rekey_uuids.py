@@ -0,0 +1,91 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.db.models import Case, Value, When
+
+from apps.core.ids import uuid7
+from apps.core.models import SearchEntry, TimeStampedModel
+
+
+def _remap(column, mapping, output_field):
+    return Case(
+        *[When(**{column: old}, then=Value(new)) for old, new in mapping.items()],
+        output_field=output_field,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Replace the random (version 4) primary keys of TimeStampedModel rows '
+        'by UUIDv7 keys derived from their created_at, and repoint every '
+        'foreign key, admin log entry and search index entry to them. Each '
+        'batch commits on its own, consistently (foreign keys are checked at '
+        'commit), so the command can be stopped and rerun. Ids saved outside the database, '
+        'e.g. in exported files or bookmarked admin URLs, stop resolving.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help='Only these models, as app_label.model_name.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        wanted = {label.lower() for label in options['models']}
+        for model in apps.get_models():
+            if not issubclass(model, TimeStampedModel):
+                continue
+            if wanted and model._meta.label_lower not in wanted:
+                continue
+            rekeyed = self.rekey(model, options['batch_size'], options['dry_run'])
+            verb = 'would rekey' if options['dry_run'] else 'rekeyed'
+            self.stdout.write(f'{model._meta.label}: {verb} {rekeyed} row(s)')
+
+    def references(self, model):
+        """Foreign keys (field, model) that point at ``model``'s primary key."""
+        for relation in model._meta.related_objects:
+            field = relation.field
+            if isinstance(field, models.ForeignKey) and field.target_field.primary_key:
+                yield field, relation.related_model
+
+    def rekey(self, model, batch_size, dry_run):
+        # Oldest first, so the new keys of one batch increase with created_at.
+        # Materialized: the loop changes the keys it reads.
+        rows = [
+            (pk, created_at) for pk, created_at in
+            model._base_manager.order_by('created_at', 'pk').values_list('pk', 'created_at')
+            if pk.version != 7
+        ]
+        if dry_run:
+            return len(rows)
+
+        pk_field = model._meta.pk
+        references = list(self.references(model))
+        log_entries = None
+        if apps.is_installed('django.contrib.admin'):
+            from django.contrib.admin.models import LogEntry
+            from django.contrib.contenttypes.models import ContentType
+
+            log_entries = LogEntry.objects.filter(
+                content_type=ContentType.objects.get_for_model(model, for_concrete_model=False),
+            )
+
+        for start in range(0, len(rows), batch_size):
+            mapping = {pk: uuid7(created_at) for pk, created_at in rows[start:start + batch_size]}
+            with transaction.atomic():
+                for field, related_model in references:
+                    related_model._base_manager.filter(**{f'{field.attname}__in': mapping}).update(
+                        **{field.attname: _remap(field.attname, mapping, pk_field)}
+                    )
+                model._base_manager.filter(pk__in=mapping).update(
+                    **{pk_field.attname: _remap(pk_field.attname, mapping, pk_field)}
+                )
+                # Search entries hold the key without a foreign key.
+                SearchEntry.objects.filter(model=model._meta.label_lower, object_id__in=mapping).update(
+                    object_id=_remap('object_id', mapping, SearchEntry._meta.get_field('object_id')),
+                )
+                if log_entries is not None:
+                    ids = {str(old): str(new) for old, new in mapping.items()}
+                    log_entries.filter(object_id__in=ids).update(
+                        object_id=_remap('object_id', ids, models.TextField()),
+                    )
+        return len(rows)
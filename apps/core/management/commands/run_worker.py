@@ -0,0 +1,65 @@
+import logging
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.core import jobs
+
+
+def _work(queues, poll_interval):
+    jobs.Worker(queues, poll_interval=poll_interval).run()
+
+
+class Command(BaseCommand):
+    help = (
+        'Run background jobs (apps.core.jobs) from the given queues, and queue '
+        'the periodic ones, in one or more worker processes until stopped '
+        'with SIGTERM or Ctrl-C; a stopping worker finishes its current job.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queue', dest='queues', action='append',
+            help=f'Queue to take jobs from; repeat for several (default: {jobs.DEFAULT_QUEUE}).',
+        )
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Seconds to wait before asking again when the queues are empty.',
+        )
+
+    def handle(self, *args, **options):
+        if not logging.getLogger().handlers:
+            logging.basicConfig(level=logging.INFO, format='%(asctime)s %(process)d %(levelname)s %(message)s')
+        jobs.autodiscover()
+        queues = options['queues'] or [jobs.DEFAULT_QUEUE]
+        self.stdout.write(
+            f'{len(jobs.registered_tasks())} task(s); taking jobs from {", ".join(queues)} '
+            f'with {options["processes"]} process(es)'
+        )
+        if options['processes'] <= 1:
+            _work(queues, options['poll_interval'])
+            return
+
+        # Connections must not be shared with the forked workers.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=_work, args=(queues, options['poll_interval']), daemon=False)
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+
+        def forward(signum, frame):
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+        signal.signal(signal.SIGTERM, forward)
+        # Ctrl-C reaches every process of the group already.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Refresh the SQLite query planner statistics (PRAGMA optimize) and '
+        'checkpoint the write-ahead log back into the database file. Meant to '
+        'run periodically, e.g. hourly, on sites using SQLITE_TUNED.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--mode', default='TRUNCATE', choices=['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'],
+            help='wal_checkpoint mode; TRUNCATE also shrinks the -wal file to zero bytes.',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'{options["database"]} is not an SQLite database')
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA optimize')
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+            if journal_mode != 'wal':
+                self.stdout.write(f'Optimized; journal mode is {journal_mode}, nothing to checkpoint')
+                return
+            cursor.execute(f'PRAGMA wal_checkpoint({options["mode"]})')
+            busy = cursor.fetchone()[0]
+
+        if busy:
+            # A writer or a long reader held the log; the next run catches up.
+            self.stderr.write('Optimized; checkpoint incomplete, the WAL was in use')
+        else:
+            self.stdout.write(f'Optimized and checkpointed the WAL ({options["mode"]})')
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.core import jobs
+
+
+def _seconds(value):
+    return '-' if value is None else f'{value:.2f}s'
+
+
+class Command(BaseCommand):
+    help = (
+        'Report the background job queues: jobs waiting, running and failed, '
+        'and the jobs done, retried and failed over a recent window with '
+        'their latency (due to started) and runtime.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, default=3600, help='Seconds back for the recent figures.')
+        parser.add_argument('--json', action='store_true', help='Print the figures as JSON, e.g. for monitoring.')
+
+    def handle(self, *args, **options):
+        stats = jobs.get_broker().stats(options['window'])
+        if options['json']:
+            self.stdout.write(json.dumps(stats, sort_keys=True))
+            return
+        if not stats:
+            self.stdout.write('No jobs')
+            return
+        minutes = options['window'] // 60
+        for queue, entry in sorted(stats.items()):
+            recent = entry['recent']
+            self.stdout.write(
+                f'{queue}: {entry["pending"]} pending, {entry["scheduled"]} scheduled, '
+                f'{entry["running"]} running, {entry["failed"]} failed\n'
+                f'  last {minutes} min: {recent["done"]} done, {recent["retried"]} retried, '
+                f'{recent["failed"]} failed; latency avg {_seconds(entry["latency"]["avg"])} '
+                f'max {_seconds(entry["latency"]["max"])}; runtime avg {_seconds(entry["runtime"]["avg"])} '
+                f'max {_seconds(entry["runtime"]["max"])}'
+            )
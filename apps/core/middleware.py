@@ -0,0 +1,137 @@
+import logging
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from apps.core.db import read_from_replica
+
+logger = logging.getLogger(__name__)
+
+
+REPLICA_PIN_COOKIE = 'db_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """Database execute wrapper that counts the queries it sees."""
+
+    def __init__(self):
+        self.count = 0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        if len(self.queries) < 200:
+            self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries(using=None):
+    """Count queries on ``using`` (or every configured database)."""
+    counter = QueryCounter()
+    aliases = [using] if using else list(connections)
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(counter))
+        yield counter
+
+
+@contextmanager
+def query_budget(budget, using=None, label='block'):
+    """Raise QueryBudgetExceeded if the block runs more than ``budget`` queries."""
+    with count_queries(using) as counter:
+        yield counter
+    if counter.count > budget:
+        raise QueryBudgetExceeded(
+            f'{label} ran {counter.count} queries, budget is {budget}'
+        )
+
+
+def _view_budget(view_func, request):
+    """
+    Budget declared on the ModelAdmin that owns the view, either a single
+    number or a dict keyed by view ('changelist', 'change', 'add', ...).
+    """
+    model_admin = getattr(view_func, 'model_admin', None)
+    budget = getattr(model_admin, 'query_budget', None)
+    if isinstance(budget, dict):
+        url_name = getattr(request.resolver_match, 'url_name', '') or ''
+        budget = budget.get(url_name.rsplit('_', 1)[-1])
+    if budget is None:
+        budget = getattr(settings, 'QUERY_BUDGET_DEFAULT', None)
+    return budget
+
+
+class QueryBudgetMiddleware:
+    """
+    Fail a request that runs more queries than its view's declared budget.
+
+    Admin views take their budget from ``ModelAdmin.query_budget``. An
+    overrun is logged as a warning, or raises with QUERY_BUDGET_STRICT.
+    Budgets cover page reads only; a save legitimately runs one write per
+    changed inline row.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.query_budget = None
+        with count_queries() as counter:
+            response = self.get_response(request)
+
+        budget = request.query_budget
+        if budget is not None and counter.count > budget:
+            message = (
+                f'{request.method} {request.path} ran {counter.count} queries, '
+                f'budget is {budget}'
+            )
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in ('GET', 'HEAD'):
+            request.query_budget = _view_budget(view_func, request)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serve the reads of safe requests (changelists, change pages, stats) from
+    a read replica, one replica per request.
+
+    Any other request may write, so it reads from the primary and pins the
+    client to the primary for DATABASE_REPLICA_PIN_SECONDS with a cookie: the
+    pages it is redirected to show its own changes even while the replicas
+    lag behind. ``request.read_pinned`` tells views (e.g. exports, see
+    apps.core.db.read_alias) whether a replica may be used.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        request.read_pinned = not replicas or REPLICA_PIN_COOKIE in request.COOKIES
+        if request.method in SAFE_METHODS and not request.read_pinned:
+            with read_from_replica():
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+
+        if replicas and request.method not in SAFE_METHODS:
+            response.set_cookie(
+                REPLICA_PIN_COOKIE, '1',
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
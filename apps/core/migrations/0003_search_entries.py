@@ -0,0 +1,106 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:03
+
+from django.db import DatabaseError, OperationalError, migrations, models, transaction
+
+FTS_TABLE = 'core_searchentry_fts'
+
+SQLITE_FTS = [
+    # External content: the FTS table indexes core_searchentry.text without
+    # storing a second copy of it.
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        text, content='core_searchentry', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER core_searchentry_ai AFTER INSERT ON core_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER core_searchentry_ad AFTER DELETE ON core_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER core_searchentry_au AFTER UPDATE ON core_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+
+POSTGRESQL_TRGM = 'CREATE INDEX core_searchentry_text_trgm ON core_searchentry USING gin (text gin_trgm_ops)'
+# Built in, for servers without the pg_trgm (contrib) extension.
+POSTGRESQL_TSVECTOR = (
+    "CREATE INDEX core_searchentry_text_tsv ON core_searchentry "
+    "USING gin (to_tsvector('simple', text))"
+)
+
+
+def install_pg_trgm(schema_editor):
+    """Whether pg_trgm is installed, installing it where the role may."""
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone() is not None:
+            return True
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return False
+    try:
+        # A savepoint: a role without CREATE on the database (or, before
+        # PostgreSQL 13, without superuser) fails here, and the migration
+        # goes on with the built-in index.
+        with transaction.atomic(using=connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except DatabaseError:
+        return False
+    return True
+
+
+def create_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(POSTGRESQL_TRGM if install_pg_trgm(schema_editor) else POSTGRESQL_TSVECTOR)
+    elif vendor == 'sqlite':
+        try:
+            schema_editor.execute(SQLITE_FTS[0])
+        except OperationalError:
+            # No FTS5, or SQLite before 3.34 without the trigram tokenizer:
+            # apps.core.search falls back to scanning the entries.
+            return
+        for sql in SQLITE_FTS[1:]:
+            schema_editor.execute(sql)
+
+
+def drop_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS core_searchentry_text_trgm')
+        schema_editor.execute('DROP INDEX IF EXISTS core_searchentry_text_tsv')
+    elif vendor == 'sqlite':
+        for trigger in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS core_searchentry_{trigger}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.UUIDField()),
+                ('text', models.TextField()),
+            ],
+            options={
+                'verbose_name_plural': 'search entries',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(fields=('model', 'object_id'), name='searchentry_object_uniq'),
+        ),
+        # Any later migration that rebuilds core_searchentry on SQLite drops
+        # the triggers with it and must recreate them.
+        migrations.RunPython(create_text_index, drop_text_index),
+    ]
@@ -1,11 +1,144 @@
 # apps/core/models.py
-import uuid
 from django.db import models
 
+from apps.core.ids import new_uuid
+from apps.core.signals import post_bulk_update, pre_bulk_update
+
+
+class TimeStampedQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        pre_bulk_update.send(sender=self.model, fields=set(kwargs), queryset=self, using=self.db)
+        rows = super().update(**kwargs)
+        post_bulk_update.send(sender=self.model, fields=set(kwargs), rows=rows, queryset=self, using=self.db)
+        return rows
+
+    update.alters_data = True
+
+
 class TimeStampedModel(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Time-ordered by default, see apps.core.ids.
+    id = models.UUIDField(primary_key=True, default=new_uuid, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TimeStampedQuerySet.as_manager()
+
     class Meta:
         abstract = True
+
+
+class DocumentOwnerModel(TimeStampedModel):
+    """
+    A TimeStampedModel whose documents expire. apps.core.expiry keeps the
+    date the documents expire on and the status derived from it current, so
+    lists filter and sort on them without reading the documents.
+    """
+    NONE = 'none'
+    VALID = 'valid'
+    EXPIRING = 'expiring'
+    EXPIRED = 'expired'
+    COMPLIANCE_STATUS = [
+        (VALID, 'Valid'),
+        (EXPIRING, 'Segera kedaluwarsa'),
+        (EXPIRED, 'Kedaluwarsa'),
+        (NONE, 'Tanpa masa berlaku'),
+    ]
+
+    compliance_status = models.CharField(
+        'status dokumen', max_length=10, choices=COMPLIANCE_STATUS, default=NONE, editable=False,
+    )
+    documents_expire_on = models.DateField('dokumen berlaku s.d.', null=True, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+
+class Blob(TimeStampedModel):
+    """
+    One stored object of a content-addressed storage, shared by every file
+    field that holds the same bytes. ``ref_count`` is the number of rows
+    referencing ``name``; unreferenced blobs are deleted by ``gc_blobs``.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField()
+    ref_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return self.name
+
+
+class SearchEntry(models.Model):
+    """
+    The searchable text of one object of a model registered with
+    apps.core.search. Queried through the full-text index the migration
+    builds on ``text``, never with the ORM's lookups.
+    """
+    model = models.CharField(max_length=100)
+    object_id = models.UUIDField()
+    text = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'object_id'], name='searchentry_object_uniq'),
+        ]
+        verbose_name_plural = 'search entries'
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}'
+
+
+class Checkpoint(models.Model):
+    """
+    When an incremental process last ran (e.g. the expiry runs of
+    apps.core.expiry), shared by every process and kept across restarts,
+    unlike a per-process cache.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.name} {self.value:%Y-%m-%d %H:%M:%S}'
+
+
+class Job(models.Model):
+    """
+    One run of a background task queued in the database broker
+    (apps.core.brokers.DatabaseBroker). Finished jobs are kept for
+    TASK_RESULT_TTL seconds, for the admin and the queue statistics.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=200)
+    queue = models.CharField(max_length=50, default='default')
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # Set on the runs of periodic tasks, so the workers queue each run once.
+    unique_key = models.CharField(max_length=200, null=True, blank=True, unique=True)
+    enqueued_at = models.DateTimeField()
+    # When the job is due: its enqueue time, countdown or retry time.
+    eta = models.DateTimeField()
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers take the oldest due job of their queues.
+            models.Index(fields=['status', 'queue', 'eta'], name='job_ready_idx'),
+            models.Index(fields=['status', 'finished_at'], name='job_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.task} ({self.status})'
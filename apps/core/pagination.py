@@ -0,0 +1,229 @@
+"""
+Changelist paging for tables too big to count or to OFFSET through.
+
+``FastPaginator`` counts exactly up to PAGINATION_COUNT_THRESHOLD rows, with
+a ``COUNT`` over a ``LIMIT``-ed subquery, and estimates beyond it:
+
+* PostgreSQL: the planner's row estimate for the filtered query (EXPLAIN),
+  which follows the table statistics ANALYZE / autovacuum keep.
+* SQLite: the row count ANALYZE stores in ``sqlite_stat1`` (refreshed by
+  ``manage.py sqlite_maintenance``), for unfiltered lists only; filtered
+  lists are still counted.
+
+The links to the pages next to the current one carry a cursor holding the
+ordering values of the current page's last (or first) row, and those pages
+are fetched with a seek (``WHERE (a, b) > (x, y)``) down the ordering index
+instead of an OFFSET, so paging on stays as fast on page 5000 as on page 2.
+Seeking needs an ordering of non-null local columns that ends in a unique
+one; the ChangeList adds ``-pk`` to make its ordering deterministic, so
+this holds unless a list sorts by a relation, a nullable column or an
+annotation. Other pages, and lists that cannot seek, use OFFSET.
+"""
+import json
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import F, OrderBy, Q, QuerySet
+from django.utils.functional import cached_property
+
+CURSOR_VAR = 'cursor'
+CURSOR_SALT = 'apps.core.pagination'
+
+
+def estimated_count(queryset):
+    """
+    The database's estimate of how many rows ``queryset`` returns, or None
+    where it has none.
+    """
+    query = queryset.query
+    if query.distinct or query.combinator or query.is_sliced:
+        return None
+    connection = connections[queryset.db]
+    try:
+        if connection.vendor == 'postgresql':
+            plan = json.loads(queryset.order_by().explain(format='json'))
+            return int(plan[0]['Plan']['Plan Rows'])
+        if connection.vendor == 'sqlite' and not query.where and query.group_by is None:
+            with connection.cursor() as cursor:
+                # Every row of the table, or of one of its indexes, starts
+                # with the table's row count.
+                cursor.execute(
+                    'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+    except EmptyResultSet:
+        return 0
+    except DatabaseError:
+        # No statistics yet (sqlite_stat1 exists after the first ANALYZE).
+        return None
+    return None
+
+
+class CursorSerializer:
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':')).encode('latin-1')
+
+    def loads(self, data):
+        return json.loads(data.decode('latin-1'))
+
+
+def _keyset(queryset):
+    """
+    ``[(field, descending), ...]`` for the ordering of ``queryset``, or None
+    if rows cannot be sought by it.
+    """
+    if not isinstance(queryset, QuerySet) or queryset.query.distinct:
+        return None
+    opts = queryset.model._meta
+    keyset = []
+    for item in queryset.query.order_by:
+        if isinstance(item, OrderBy) and isinstance(item.expression, F):
+            if item.nulls_first or item.nulls_last:
+                return None
+            name, descending = item.expression.name, item.descending
+        elif isinstance(item, str):
+            name, descending = item.lstrip('-'), item.startswith('-')
+        else:
+            return None
+        try:
+            field = opts.pk if name == 'pk' else opts.get_field(name)
+        except FieldDoesNotExist:
+            # An annotation (e.g. search_rank) or a path across relations.
+            return None
+        if not field.concrete or field.null:
+            return None
+        if field.is_relation and field.related_model._meta.ordering:
+            # Orders by the related model's columns, not by this one.
+            return None
+        keyset.append((field, descending))
+    if not keyset or not (keyset[-1][0].primary_key or keyset[-1][0].unique):
+        return None
+    return keyset
+
+
+def _seek(keyset, values, before=False, inclusive=False):
+    """
+    Q for the rows after (``before``: before) the row whose ordering values
+    are ``values``. The leading column also gets a plain range condition so
+    the database can start the index scan there.
+    """
+    def lookup(descending, strict=True):
+        forward = descending == before
+        return ('gt' if forward else 'lt') + ('' if strict else 'e')
+
+    condition = Q()
+    for i in reversed(range(len(keyset))):
+        field, descending = keyset[i]
+        strict = i < len(keyset) - 1 or not inclusive
+        step = Q(**{f'{field.attname}__{lookup(descending, strict)}': values[i]})
+        if i < len(keyset) - 1:
+            step |= Q(**{field.attname: values[i]}) & condition
+        condition = step
+    field, descending = keyset[0]
+    return Q(**{f'{field.attname}__{lookup(descending, strict=False)}': values[0]}) & condition
+
+
+class FastPaginator(Paginator):
+    """
+    Paginator with estimated counts above ``count_threshold`` rows and seek
+    paging from ``cursor`` (see the module docstring). ``estimated`` tells
+    whether ``count`` is an estimate.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True,
+                 count_threshold=None, cursor=None):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        if count_threshold is None:
+            count_threshold = settings.PAGINATION_COUNT_THRESHOLD
+        self.count_threshold = count_threshold
+        self.cursor = cursor
+        self.estimated = False
+        self.current_page = None
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        exact = self.object_list.order_by().values('pk')[:self.count_threshold + 1].count()
+        if exact <= self.count_threshold:
+            return exact
+        estimate = estimated_count(self.object_list)
+        if estimate is None:
+            return self.object_list.count()
+        self.estimated = True
+        return max(estimate, exact)
+
+    def validate_number(self, number):
+        if self.count and self.estimated and isinstance(number, int) and number > self.num_pages:
+            # The last page is only approximately known: pages past it are
+            # empty rather than missing.
+            return number
+        return super().validate_number(number)
+
+    @cached_property
+    def keyset(self):
+        return _keyset(self.object_list)
+
+    def _ordering_names(self):
+        return [('-' if descending else '') + field.attname for field, descending in self.keyset]
+
+    def page(self, number):
+        number = self.validate_number(number)
+        object_list = self._seek_page(number)
+        if object_list is None and self.estimated:
+            # Paginator.page() would cut the slice at the estimated count.
+            bottom = (number - 1) * self.per_page
+            object_list = self.object_list[bottom:bottom + self.per_page]
+        if object_list is None:
+            page = super().page(number)
+        else:
+            page = self._get_page(object_list, number, self)
+        self.current_page = page
+        return page
+
+    def _seek_page(self, number):
+        if not self.cursor or not self.keyset:
+            return None
+        try:
+            cursor = signing.loads(self.cursor, salt=CURSOR_SALT, serializer=CursorSerializer)
+            if cursor['page'] != number or cursor['ordering'] != self._ordering_names():
+                return None
+            values = [field.to_python(value) for (field, _), value in zip(self.keyset, cursor['values'])]
+        except (signing.BadSignature, KeyError, TypeError, ValueError, ValidationError):
+            return None
+        queryset = self.object_list
+        if cursor['before']:
+            # The page ends just before ``values``: find its first row by
+            # seeking backwards, then list forwards from there.
+            reverse = queryset.filter(_seek(self.keyset, values, before=True)).reverse()
+            fields = [field.attname for field, _ in self.keyset]
+            first = list(reverse.values_list(*fields)[self.per_page - 1:self.per_page])
+            if not first:
+                return queryset.filter(_seek(self.keyset, values, before=True))[:self.per_page]
+            values = first[0]
+            return queryset.filter(_seek(self.keyset, values, inclusive=True))[:self.per_page]
+        return queryset.filter(_seek(self.keyset, values))[:self.per_page]
+
+    def cursor_for(self, number):
+        """
+        Cursor that fetches page ``number`` by seeking from the current page,
+        or None when it is not next to it or the list cannot seek.
+        """
+        page = self.current_page
+        if page is None or not self.keyset or abs(number - page.number) != 1:
+            return None
+        rows = page.object_list
+        if not rows:
+            return None
+        before = number < page.number
+        row = rows[0] if before else rows[len(rows) - 1]
+        return signing.dumps({
+            'page': number,
+            'ordering': self._ordering_names(),
+            'values': [field.value_to_string(row) for field, _ in self.keyset],
+            'before': before,
+        }, salt=CURSOR_SALT, serializer=CursorSerializer, compress=True)
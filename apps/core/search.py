@@ -0,0 +1,356 @@
+"""
+Full-text search index for the admin search box.
+
+Each registered model gets one ``SearchEntry`` row per object whose ``text``
+holds the searchable values: its own fields and fields one relation away
+(e.g. the names of a vendor's persons). Queries hit one indexed table
+instead of ``icontains`` scans over joins:
+
+* SQLite: an FTS5 table with the trigram tokenizer over the entries, kept in
+  sync by triggers and ranked with bm25.
+* PostgreSQL: a pg_trgm GIN index on the entries, ranked by word similarity;
+  where the pg_trgm extension is not installed, a GIN index on their
+  tsvector, which matches word prefixes only, ranked with ts_rank.
+
+Trigram indexes match substrings of three or more characters
+case-insensitively, like the admin's ``icontains``. Shorter terms cannot use
+them; callers fall back to the ordinary search for those.
+
+Entries are rebuilt from the database after every save and delete of a
+registered model or of a related model its text reads, once per object when
+the transaction commits. ``QuerySet.update``, ``bulk_create`` and raw
+inserts send no signals: call ``objects_changed`` (the importers do) or
+``manage.py rebuild_search_index``.
+"""
+import re
+from collections import defaultdict
+from functools import partial
+from threading import local
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils.text import smart_split, unescape_string_literal
+
+MIN_TERM_LENGTH = 3
+FTS_TABLE = 'core_searchentry_fts'
+TRIGRAM_INDEX = 'core_searchentry_text_trgm'
+TSVECTOR_INDEX = 'core_searchentry_text_tsv'
+
+_registry = {}
+# model -> [(indexed model, relation field, reverse)] for the related paths
+# that read ``model``.
+_dependents = defaultdict(list)
+# model -> FK attnames to remember at load, to reindex a parent the object
+# moves away from.
+_remembered = defaultdict(set)
+_pending = local()
+_text_indexes = {}
+
+
+def register(model, fields):
+    """
+    Index ``fields`` of ``model``: field names, or ``relation__field`` paths
+    one relation away (a foreign key or the reverse of one).
+    """
+    _registry[model] = list(fields)
+    _connect(model)
+    for path in fields:
+        if '__' not in path:
+            continue
+        relation_name, _, target = path.partition('__')
+        if '__' in target:
+            raise ValueError(f'{model._meta.label}: search path "{path}" spans more than one relation')
+        relation = model._meta.get_field(relation_name)
+        related_model = relation.related_model
+        # A reverse relation is the related model's foreign key to ``model``.
+        reverse = relation.auto_created and not relation.concrete
+        field = relation.field if reverse else relation
+        entry = (model, field, reverse)
+        if entry not in _dependents[related_model]:
+            _dependents[related_model].append(entry)
+        if reverse:
+            _remembered[related_model].add(field.attname)
+            post_init.connect(
+                _remember_relations, sender=related_model,
+                dispatch_uid=f'search-init-{related_model._meta.label}',
+            )
+        _connect(related_model)
+
+
+def registered_models():
+    return list(_registry)
+
+
+def _connect(model):
+    label = model._meta.label
+    post_save.connect(_saved, sender=model, dispatch_uid=f'search-save-{label}')
+    post_delete.connect(_deleted, sender=model, dispatch_uid=f'search-delete-{label}')
+
+
+def _remember_relations(sender, instance, **kwargs):
+    instance._search_relations = {
+        attname: instance.__dict__[attname]
+        for attname in _remembered[sender] if attname in instance.__dict__
+    }
+
+
+def _saved(sender, instance, raw=False, using=DEFAULT_DB_ALIAS, **kwargs):
+    if not raw:
+        objects_changed(sender, [instance], using)
+        _remember_relations(sender, instance)
+
+
+def _deleted(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    objects_changed(sender, [instance], using)
+
+
+def objects_changed(model, instances, using=DEFAULT_DB_ALIAS):
+    """
+    Queue the entries of ``instances`` and of the objects whose text includes
+    them for a rebuild when the current transaction commits.
+    """
+    if model not in _registry and model not in _dependents:
+        return
+    pending = _pending.__dict__.setdefault(using, defaultdict(set))
+    if model in _registry:
+        pending[model, None].update(instance.pk for instance in instances)
+    for indexed_model, field, reverse in _dependents.get(model, ()):
+        if reverse:
+            # The instances point at the objects to reindex, before and after.
+            for instance in instances:
+                pending[indexed_model, None].add(getattr(instance, field.attname))
+                previous = getattr(instance, '_search_relations', {})
+                pending[indexed_model, None].add(previous.get(field.attname))
+        else:
+            # The objects to reindex point at the instances.
+            pending[indexed_model, field].update(instance.pk for instance in instances)
+    # One callback per change: a callback registered in a savepoint that
+    # rolls back is dropped, a later one still flushes everything queued.
+    transaction.on_commit(partial(_flush, using), using=using)
+
+
+def _flush(using):
+    pending = _pending.__dict__.pop(using, None)
+    if not pending:
+        return
+    by_model = defaultdict(set)
+    for (model, field), pks in pending.items():
+        pks.discard(None)
+        if field is None:
+            by_model[model] |= pks
+        elif pks:
+            by_model[model].update(
+                model._base_manager.using(using)
+                .filter(**{f'{field.attname}__in': pks}).values_list('pk', flat=True)
+            )
+    with transaction.atomic(using=using):
+        for model, pks in by_model.items():
+            if pks:
+                reindex(model, pks, using)
+
+
+def document_texts(model, pks, using=DEFAULT_DB_ALIAS):
+    """``{pk: text}`` of the given objects that exist."""
+    queryset = model._base_manager.using(using).filter(pk__in=pks).order_by()
+    local_fields = [path for path in _registry[model] if '__' not in path]
+    parts = {}
+    for row in queryset.values_list('pk', *local_fields):
+        parts[row[0]] = [str(value) for value in row[1:] if value not in (None, '')]
+    for path in _registry[model]:
+        if '__' in path:
+            for pk, value in queryset.filter(**{f'{path}__isnull': False}).values_list('pk', path):
+                if value != '' and pk in parts:
+                    parts[pk].append(str(value))
+    return {pk: '\n'.join(values) for pk, values in parts.items()}
+
+
+def reindex(model, pks, using=DEFAULT_DB_ALIAS):
+    """Rebuild the entries of ``pks`` now, dropping those of deleted objects."""
+    from apps.core.models import SearchEntry
+
+    pks = set(pks)
+    label = model._meta.label_lower
+    texts = document_texts(model, pks, using)
+    SearchEntry.objects.using(using).bulk_create(
+        [SearchEntry(model=label, object_id=pk, text=text) for pk, text in texts.items()],
+        update_conflicts=True,
+        unique_fields=['model', 'object_id'],
+        update_fields=['text'],
+    )
+    gone = pks - set(texts)
+    if gone:
+        SearchEntry.objects.using(using).filter(model=label, object_id__in=gone).delete()
+    return len(texts)
+
+
+def rebuild(models=None, batch_size=1000, using=DEFAULT_DB_ALIAS, log=None):
+    """Rebuild every entry of ``models`` (default: all registered ones)."""
+    from apps.core.models import SearchEntry
+
+    counts = {}
+    for model in models or registered_models():
+        label = model._meta.label_lower
+        manager = model._base_manager.using(using)
+        counts[label] = 0
+        last = None
+        while True:
+            # Keyset batches: no offset scans, no list of every key in memory.
+            queryset = manager.order_by('pk')
+            if last is not None:
+                queryset = queryset.filter(pk__gt=last)
+            pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            with transaction.atomic(using=using):
+                counts[label] += reindex(model, pks, using)
+            last = pks[-1]
+        SearchEntry.objects.using(using).filter(model=label).exclude(
+            object_id__in=manager.values('pk'),
+        ).delete()
+        if log:
+            log(f'{model._meta.label}: {counts[label]} entries')
+
+    connection = connections[using]
+    if text_index(connection) == 'fts5':
+        with connection.cursor() as cursor:
+            # Merge the b-trees written by the batches into one.
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return counts
+
+
+def populate_empty_index(sender, using=DEFAULT_DB_ALIAS, verbosity=1, **kwargs):
+    """
+    post_migrate: fill the index on the migrate that creates it, with every
+    model at its current schema.
+    """
+    from apps.core.models import SearchEntry
+
+    try:
+        # Absent when migrated back before the table.
+        kwargs['apps'].get_model('core', 'SearchEntry')
+    except LookupError:
+        return
+    if SearchEntry.objects.using(using).exists():
+        return
+    counts = rebuild(using=using)
+    if verbosity >= 1 and any(counts.values()):
+        print(f'  Indexed {sum(counts.values())} object(s) for search.')
+
+
+def text_index(connection):
+    """
+    The full-text index the migration could build on this database:
+    'fts5', 'trigram', 'tsvector', or None to scan the entries.
+    """
+    key = (connection.alias, str(connection.settings_dict['NAME']))
+    if key not in _text_indexes:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute("SELECT 'fts5' FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            elif connection.vendor == 'postgresql':
+                cursor.execute(
+                    "SELECT CASE indexname WHEN %s THEN 'trigram' ELSE 'tsvector' END FROM pg_indexes "
+                    "WHERE tablename = 'core_searchentry' AND indexname IN (%s, %s)",
+                    [TRIGRAM_INDEX, TRIGRAM_INDEX, TSVECTOR_INDEX],
+                )
+            row = cursor.fetchone() if connection.vendor in ('sqlite', 'postgresql') else None
+        _text_indexes[key] = row[0] if row else None
+    return _text_indexes[key]
+
+
+def _like_pattern(word):
+    return '%' + re.sub(r'([%_\\])', r'\\\1', word) + '%'
+
+
+def terms(term):
+    """The words of a search box ``term``, split as the admin splits them: quoted phrases stay whole."""
+    words = []
+    for bit in smart_split(term):
+        if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+            bit = unescape_string_literal(bit)
+        if bit:
+            words.append(bit)
+    return words
+
+
+def indexable(words):
+    """Whether the index can serve ``words``: one of them is long enough for a trigram."""
+    return any(len(word) >= MIN_TERM_LENGTH for word in words)
+
+
+def _query(model, words, using):
+    """
+    ``(sql, params, order_by, order_params)``: the entries of ``model``
+    objects containing every one of ``words``, selecting their
+    ``object_id``, and their ranking, best match first.
+    """
+    label = model._meta.label_lower
+    long_words = [word for word in words if len(word) >= MIN_TERM_LENGTH]
+    index = text_index(connections[using]) if long_words else None
+
+    if index == 'fts5':
+        # Each word a quoted phrase, so FTS5 syntax in the term stays literal.
+        # Words too short for a trigram are checked on the matching rows.
+        query = ' '.join('"%s"' % word.replace('"', '""') for word in long_words)
+        short_words = [word for word in words if len(word) < MIN_TERM_LENGTH]
+        conditions = ''.join(" AND e.text LIKE %s ESCAPE '\\'" for _ in short_words)
+        sql = (
+            f'SELECT e.object_id FROM {FTS_TABLE} '
+            f'JOIN core_searchentry e ON e.id = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s AND e.model = %s{conditions}'
+        )
+        return sql, [query, label, *map(_like_pattern, short_words)], f'{FTS_TABLE}.rank', []
+    if index == 'trigram':
+        conditions = ' AND '.join(['text ILIKE %s'] * len(words))
+        sql = f'SELECT object_id FROM core_searchentry WHERE model = %s AND {conditions}'
+        return sql, [label, *map(_like_pattern, words)], 'word_similarity(%s, text) DESC, id', [' '.join(words)]
+    if index == 'tsvector':
+        # Without pg_trgm: words match from their start ("karya" finds
+        # "karyawan", not "bekarya").
+        query = ' & '.join(
+            "'%s':*" % part.replace("'", "''").replace('\\', '\\\\')
+            for word in words for part in word.split()
+        )
+        sql = (
+            "SELECT object_id FROM core_searchentry, to_tsquery('simple', %s) query "
+            "WHERE model = %s AND to_tsvector('simple', text) @@ query"
+        )
+        return sql, [query, label], "ts_rank(to_tsvector('simple', text), query) DESC, id", []
+
+    # No index, or no word it can serve: scan the entries.
+    from apps.core.models import SearchEntry
+
+    queryset = SearchEntry.objects.using(using).filter(model=label)
+    for word in words:
+        queryset = queryset.filter(text__icontains=word)
+    sql, params = queryset.values('object_id').query.get_compiler(using).as_sql()
+    return sql, list(params), 'id', []
+
+
+def match_sql(model, words, using=DEFAULT_DB_ALIAS):
+    """
+    ``(sql, params)`` selecting, unordered and unlimited, the primary keys of
+    the ``model`` objects whose entry contains every one of ``words``: a
+    subquery to filter on, e.g. ``pk__in=RawSQL(sql, params)``.
+    """
+    sql, params, order_by, order_params = _query(model, words, using)
+    return sql, params
+
+
+def search(model, term, using=DEFAULT_DB_ALIAS, limit=None):
+    """
+    Primary keys of the ``model`` objects whose entry contains every word of
+    ``term``, best match first, at most ``limit`` (SEARCH_RESULT_LIMIT).
+    Returns None when no word is long enough for the index.
+    """
+    words = terms(term)
+    if not indexable(words):
+        return None
+    if limit is None:
+        limit = settings.SEARCH_RESULT_LIMIT
+    sql, params, order_by, order_params = _query(model, words, using)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'{sql} ORDER BY {order_by} LIMIT %s', [*params, *order_params, limit])
+        pk_field = model._meta.pk
+        return [pk_field.to_python(value) for value, in cursor.fetchall()]
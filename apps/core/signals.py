@@ -0,0 +1,13 @@
+from django.dispatch import Signal
+
+# Sent before QuerySet.update() on a TimeStampedModel subclass, for receivers
+# that need the rows as they were (the update may change the very fields the
+# queryset filters on). Receivers get ``sender``, ``fields``, ``queryset``
+# (the queryset being updated) and ``using``.
+pre_bulk_update = Signal()
+
+# Sent after QuerySet.update() on a TimeStampedModel subclass, which bypasses
+# the per-instance post_save signal. Receivers get ``sender`` (the model),
+# ``fields`` (the updated field names), ``rows`` (number of rows updated),
+# ``queryset`` and ``using`` (the database alias).
+post_bulk_update = Signal()
@@ -0,0 +1,121 @@
+"""
+Content-addressed file storage.
+
+Every file is stored once under a key derived from its SHA-256, so the same
+scan uploaded for ten vendors is one object in the bucket. ``Blob`` rows
+count the references; saving a file whose blob already exists skips the
+upload entirely.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.utils import timezone
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+BLOB_NAME_RE = re.compile(r'/blobs/[0-9a-f]{2}/(?P<sha256>[0-9a-f]{64})(?:\.\w+)?$')
+
+
+def file_sha256(content):
+    digest = hashlib.sha256()
+    # File.chunks() rewinds first.
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def blob_sha256(name):
+    """The SHA-256 a blob name was derived from, or None for other names."""
+    match = BLOB_NAME_RE.search(name or '')
+    return match.group('sha256') if match else None
+
+
+class ContentAddressedStorageMixin:
+    """
+    Storage mixin that ignores the requested path (e.g. from ``upload_to``)
+    except for its extension and saves under ``<env>/blobs/ab/<sha256>.ext``.
+    """
+
+    def blob_root(self):
+        return f"{getattr(settings, 'ENVIRONMENT', 'dev')}/blobs"
+
+    def blob_name(self, sha256, filename):
+        extension = os.path.splitext(filename)[1].lower()[:10]
+        return f'{self.blob_root()}/{sha256[:2]}/{sha256}{extension}'
+
+    def touch_blob(self, name):
+        """
+        Mark the blob as just used and report whether it exists. A blob
+        touched here is out of ``gc_blobs``' grace period, so it can be
+        referenced without re-uploading it.
+        """
+        from apps.core.models import Blob
+
+        return bool(Blob.objects.filter(name=name).update(updated_at=timezone.now()))
+
+    def get_available_name(self, name, max_length=None):
+        # Blob names are unique by construction; never rename them.
+        return name
+
+    def _save(self, name, content):
+        from apps.core.models import Blob
+
+        # Set by the hashing upload handlers while the upload streamed in.
+        sha256 = getattr(content, 'sha256', None) or file_sha256(content)
+        name = self.blob_name(sha256, name)
+        if self.touch_blob(name):
+            return name
+        content.seek(0)
+        name = super()._save(name, content)
+        Blob.objects.get_or_create(name=name, defaults={'sha256': sha256, 'size': content.size})
+        return name
+
+    def stored_sha256(self, name):
+        """SHA-256 of the stored object, or None when it does not exist."""
+        try:
+            with self.open(name) as fh:
+                return file_sha256(fh)
+        except (OSError, ClientError):
+            return None
+
+    def adopt_blob(self, name):
+        """
+        Register a blob uploaded directly to the bucket, after checking that
+        its content really hashes to its name. Returns False when it is
+        missing or its content does not match.
+        """
+        from apps.core.models import Blob
+
+        if self.touch_blob(name):
+            return True
+        sha256 = blob_sha256(name)
+        if sha256 is None or self.stored_sha256(name) != sha256:
+            return False
+        Blob.objects.get_or_create(name=name, defaults={'sha256': sha256, 'size': self.size(name)})
+        return True
+
+
+class ContentAddressedS3Storage(ContentAddressedStorageMixin, S3Boto3Storage):
+
+    def stored_sha256(self, name):
+        # Objects uploaded with a checksum carry it; avoid downloading them.
+        try:
+            head = self.connection.meta.client.head_object(
+                Bucket=self.bucket_name, Key=self._normalize_name(clean_name(name)),
+                ChecksumMode='ENABLED',
+            )
+        except ClientError:
+            return None
+        checksum = head.get('ChecksumSHA256')
+        if checksum and '-' not in checksum:
+            try:
+                return base64.b64decode(checksum).hex()
+            except (binascii.Error, ValueError):
+                pass
+        return super().stored_sha256(name)
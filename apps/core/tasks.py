@@ -0,0 +1,43 @@
+"""
+Periodic maintenance, run by the workers (apps.core.jobs) instead of cron.
+"""
+import io
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+
+from apps.core import dashboard, expiry
+from apps.core.jobs import get_broker, task
+
+HOUR = 3600
+
+
+@task(every=24 * HOUR, max_retries=0)
+def gc_blobs():
+    # Unreferenced blobs still have their grace period (see the command).
+    call_command('gc_blobs', stdout=io.StringIO())
+
+
+@task(every=HOUR, max_retries=0)
+def sqlite_maintenance():
+    if connection.vendor == 'sqlite' and settings.SQLITE_TUNED:
+        call_command('sqlite_maintenance', stdout=io.StringIO(), stderr=io.StringIO())
+
+
+@task(every=5 * 60, max_retries=0)
+def warm_dashboard():
+    # Recomputes only the sections invalidated since the last run, so the
+    # landing page rarely computes one itself.
+    dashboard.warm()
+
+
+@task(every=HOUR, max_retries=0)
+def refresh_compliance():
+    expiry.run()
+
+
+@task(every=HOUR, max_retries=0)
+def purge_jobs():
+    get_broker().purge(time.time() - settings.TASK_RESULT_TTL)
@@ -0,0 +1,17 @@
+from django import template
+
+from apps.core import dashboard
+
+register = template.Library()
+
+
+@register.simple_tag
+def dashboard_kpis():
+    """The cached landing page KPIs (apps.core.dashboard)."""
+    return dashboard.kpis()
+
+
+@register.filter
+def rupiah(value):
+    """10000000 -> 'Rp 10.000.000'"""
+    return f'Rp {value:,.0f}'.replace(',', '.')
@@ -1,24 +1,330 @@
 # utils/s3.py
+import base64
+import hashlib
+import hmac
+import os
+import posixpath
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from urllib.parse import quote
+
 import boto3
+from botocore.config import Config
 from django.conf import settings
-import re
+
 
 def safe_name(name):
     return re.sub(r'[^a-zA-Z0-9_-]', '_', name)
 
-def generate_presigned_url(key, expires_in=3600):
-    s3 = boto3.client(
-        "s3",
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        region_name=settings.AWS_S3_REGION_NAME,
+
+def storage_key(name):
+    """Object key in the bucket for a FileField name."""
+    return f"{settings.AWS_LOCATION}/{name}"
+
+
+def content_disposition(filename):
+    """
+    Content-Disposition for a presigned GET, so the browser names the file
+    ``filename`` instead of the object key's last part (a hash for blobs).
+    """
+    filename = posixpath.basename(filename.replace('\\', '/'))
+    # Plain ASCII for old browsers, the exact name in filename* (RFC 6266).
+    fallback = re.sub(r'[^\x20-\x7e]|["\\]', '_', filename)
+    return f"inline; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def _signing_item(item):
+    """(key, Content-Disposition or None) of a key or (key, filename) pair."""
+    key, filename = item if isinstance(item, tuple) else (item, None)
+    return key, content_disposition(filename) if filename else None
+
+
+def _cache_key(bucket, key, expires_in, disposition):
+    return (bucket, key, expires_in) if disposition is None else (bucket, key, expires_in, disposition)
+
+
+# boto3 sessions/clients are expensive to build (endpoint resolution, service
+# model loading), so keep one per process and credential set. Clients are
+# thread-safe; the session is only used to read (refreshable) credentials.
+_s3_pool = {}
+_s3_pool_lock = threading.Lock()
+
+
+def _get_s3_pool_entry():
+    pool_key = (
+        os.getpid(),
+        settings.AWS_ACCESS_KEY_ID,
+        settings.AWS_SECRET_ACCESS_KEY,
+        settings.AWS_S3_REGION_NAME,
+        getattr(settings, 'AWS_S3_ENDPOINT_URL', None),
     )
+    entry = _s3_pool.get(pool_key)
+    if entry is None:
+        with _s3_pool_lock:
+            entry = _s3_pool.get(pool_key)
+            if entry is None:
+                session = boto3.session.Session(
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                    region_name=settings.AWS_S3_REGION_NAME,
+                )
+                # SigV4 on the regional virtual-hosted endpoint, as sign_urls
+                # signs locally; botocore's defaults are SigV2 on the global
+                # endpoint. Custom endpoints keep botocore's addressing.
+                endpoint_url = getattr(settings, 'AWS_S3_ENDPOINT_URL', None)
+                config = Config(
+                    signature_version='s3v4',
+                    s3={'addressing_style': 'auto' if endpoint_url else 'virtual'},
+                )
+                entry = (session, session.client("s3", endpoint_url=endpoint_url, config=config))
+                _s3_pool[pool_key] = entry
+    return entry
+
+
+def get_s3_client():
+    return _get_s3_pool_entry()[1]
+
+
+def get_s3_credentials():
+    credentials = _get_s3_pool_entry()[0].get_credentials()
+    if credentials is None:
+        return None
+    return credentials.get_frozen_credentials()
+
+
+class PresignedURLCache:
+    """
+    LRU cache of presigned URLs keyed by (bucket, key, expires_in).
+
+    A cached URL is only handed out while at least ``min_ttl`` seconds of its
+    lifetime remain, so a page rendered from the cache never links to a URL
+    that is about to expire.
+    """
+
+    def __init__(self, max_entries=10000, min_ttl=900):
+        self.max_entries = max_entries
+        self.min_ttl = min_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, cache_key, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                url, expires_at = entry
+                if expires_at - now >= self.min_ttl:
+                    self._entries.move_to_end(cache_key)
+                    self.hits += 1
+                    return url
+                del self._entries[cache_key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def get_many(self, cache_keys, now=None):
+        now = time.time() if now is None else now
+        found = {}
+        with self._lock:
+            for cache_key in cache_keys:
+                entry = self._entries.get(cache_key)
+                if entry is not None:
+                    url, expires_at = entry
+                    if expires_at - now >= self.min_ttl:
+                        self._entries.move_to_end(cache_key)
+                        found[cache_key] = url
+                        continue
+                    del self._entries[cache_key]
+                    self.evictions += 1
+            self.hits += len(found)
+            self.misses += len(cache_keys) - len(found)
+        return found
+
+    def set(self, cache_key, url, expires_at):
+        with self._lock:
+            self._entries[cache_key] = (url, expires_at)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
 
-    return s3.generate_presigned_url(
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+presigned_url_cache = PresignedURLCache(
+    max_entries=getattr(settings, 'PRESIGNED_URL_CACHE_SIZE', 10000),
+    min_ttl=getattr(settings, 'PRESIGNED_URL_MIN_TTL', 900),
+)
+
+
+def generate_presigned_url(key, expires_in=3600, filename=None):
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    disposition = content_disposition(filename) if filename else None
+    cache_key = _cache_key(bucket, key, expires_in, disposition)
+
+    # A URL that cannot outlive min_ttl is never worth caching.
+    cacheable = expires_in > presigned_url_cache.min_ttl
+    if cacheable:
+        url = presigned_url_cache.get(cache_key)
+        if url is not None:
+            return url
+
+    signed_at = time.time()
+    params = {
+        "Bucket": bucket,
+        "Key": key,
+    }
+    if disposition:
+        params["ResponseContentDisposition"] = disposition
+    url = get_s3_client().generate_presigned_url(
         "get_object",
-        Params={
-            "Bucket": settings.AWS_STORAGE_BUCKET_NAME,
-            "Key": key,
-        },
+        Params=params,
         ExpiresIn=expires_in,
     )
+    if cacheable:
+        presigned_url_cache.set(cache_key, url, signed_at + expires_in)
+    return url
+
+
+def generate_presigned_post(key, max_size, expires_in=900, sha256=None):
+    """
+    Presigned POST that lets a browser upload one object of at most
+    ``max_size`` bytes straight to ``key``. Returns ``{'url', 'fields'}``.
+    With ``sha256`` (hex), S3 rejects a body whose checksum differs.
+    """
+    fields = {}
+    conditions = [['content-length-range', 1, max_size]]
+    if sha256:
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode('ascii')
+        fields['x-amz-checksum-sha256'] = checksum
+        conditions.append({'x-amz-checksum-sha256': checksum})
+    return get_s3_client().generate_presigned_post(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=key,
+        Fields=fields,
+        Conditions=conditions,
+        ExpiresIn=expires_in,
+    )
+
+
+def _hmac_sha256(key, msg):
+    return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+
+
+def _s3_host(bucket, region):
+    # Dotted bucket names break TLS on virtual-hosted URLs, use path style.
+    if '.' in bucket:
+        return f"s3.{region}.amazonaws.com", f"/{bucket}/"
+    return f"{bucket}.s3.{region}.amazonaws.com", "/"
+
+
+def sign_urls(keys, expires_in=3600, now=None):
+    """
+    Presign GET URLs for many object keys at once.
+
+    ``keys`` holds object keys, or ``(key, filename)`` pairs for a download
+    named ``filename`` (see content_disposition). Returns a ``{key: url}``
+    dict, keyed as given. URLs still in the presigned URL cache are
+    reused; the rest are signed locally with SigV4 (pure hashing, no network
+    and no per-key botocore request building), deriving the signing key only
+    once per batch. Fresh URLs are written back to the cache so that the
+    ``signed_file_url`` properties rendered afterwards are cache hits.
+    """
+    signing = {item: _signing_item(item) for item in keys}
+    signing = {item: pair for item, pair in signing.items() if pair[0]}
+    if not signing:
+        return {}
+
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    cacheable = expires_in > presigned_url_cache.min_ttl
+    cache_keys = {
+        item: _cache_key(bucket, key, expires_in, disposition) for item, (key, disposition) in signing.items()
+    }
+    urls = {}
+    if cacheable:
+        cached = presigned_url_cache.get_many(list(cache_keys.values()))
+        urls = {item: cached[cache_key] for item, cache_key in cache_keys.items() if cache_key in cached}
+    missing = [item for item in signing if item not in urls]
+    if not missing:
+        return urls
+
+    credentials = get_s3_credentials()
+    if credentials is None or getattr(settings, 'AWS_S3_ENDPOINT_URL', None):
+        # No static credentials to sign with (let botocore raise its usual
+        # error), or a custom endpoint whose URL layout botocore knows.
+        for item in missing:
+            key, filename = item if isinstance(item, tuple) else (item, None)
+            urls[item] = generate_presigned_url(key, expires_in=expires_in, filename=filename)
+        return urls
+
+    region = settings.AWS_S3_REGION_NAME
+    signed_at = datetime.now(timezone.utc) if now is None else now
+    amz_date = signed_at.strftime('%Y%m%dT%H%M%SZ')
+    datestamp = signed_at.strftime('%Y%m%d')
+    scope = f"{datestamp}/{region}/s3/aws4_request"
+
+    signing_key = _hmac_sha256(
+        ('AWS4' + credentials.secret_key).encode('utf-8'), datestamp
+    )
+    for part in (region, 's3', 'aws4_request'):
+        signing_key = _hmac_sha256(signing_key, part)
+
+    params = {
+        'X-Amz-Algorithm': 'AWS4-HMAC-SHA256',
+        'X-Amz-Credential': f"{credentials.access_key}/{scope}",
+        'X-Amz-Date': amz_date,
+        'X-Amz-Expires': str(expires_in),
+        'X-Amz-SignedHeaders': 'host',
+    }
+    if credentials.token:
+        params['X-Amz-Security-Token'] = credentials.token
+    query = '&'.join(
+        f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}"
+        for name, value in sorted(params.items())
+    )
+
+    host, prefix = _s3_host(bucket, region)
+    string_to_sign_head = f"AWS4-HMAC-SHA256\n{amz_date}\n{scope}\n"
+    expires_at = signed_at.timestamp() + expires_in
+
+    for item in missing:
+        key, disposition = signing[item]
+        path = quote(prefix + key, safe='/~')
+        query_string = canonical_query = query
+        if disposition:
+            param = f"response-content-disposition={quote(disposition, safe='-_.~')}"
+            # First in the URL, as botocore puts it; in the canonical query
+            # it sorts after the X-Amz-* names.
+            query_string, canonical_query = f"{param}&{query}", f"{query}&{param}"
+        canonical_request = 'GET\n' + path + f"\n{canonical_query}\nhost:{host}\n\nhost\nUNSIGNED-PAYLOAD"
+        string_to_sign = string_to_sign_head + hashlib.sha256(
+            canonical_request.encode('utf-8')
+        ).hexdigest()
+        signature = hmac.new(
+            signing_key, string_to_sign.encode('utf-8'), hashlib.sha256
+        ).hexdigest()
+        url = f"https://{host}{path}?{query_string}&X-Amz-Signature={signature}"
+        urls[item] = url
+        if cacheable:
+            presigned_url_cache.set(cache_keys[item], url, expires_at)
+    return urls
@@ -0,0 +1,90 @@
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import models
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+
+from apps.core.storage import ContentAddressedStorageMixin
+from apps.core.utils import generate_presigned_post, storage_key
+
+SHA256_RE = re.compile(r'[0-9a-f]{64}')
+
+
+@staff_member_required
+@require_POST
+def direct_upload_presign(request):
+    """
+    Presigned POST for one browser upload of ``model.field``.
+
+    With the file's SHA-256 and content-addressed storage, the key is the
+    blob name and an already stored blob is reported as ``exists`` so the
+    browser skips the transfer. Otherwise the key is what the field's
+    ``upload_to`` gives an instance carrying the posted relations.
+    DirectUploadForm checks the same name on save.
+    """
+    try:
+        model = apps.get_model(request.POST.get('model', ''))
+        field = model._meta.get_field(request.POST.get('field', ''))
+    except (LookupError, ValueError):
+        return JsonResponse({'error': 'Model atau field tidak dikenal.'}, status=400)
+    if not isinstance(field, models.FileField):
+        return JsonResponse({'error': 'Model atau field tidak dikenal.'}, status=400)
+
+    opts = model._meta
+    if not (
+        request.user.has_perm(f'{opts.app_label}.add_{opts.model_name}')
+        or request.user.has_perm(f'{opts.app_label}.change_{opts.model_name}')
+    ):
+        return JsonResponse({'error': 'Tidak punya izin.'}, status=403)
+
+    filename = request.POST.get('filename', '')
+    try:
+        size = int(request.POST.get('size', ''))
+    except ValueError:
+        size = 0
+    if not filename or size <= 0:
+        return JsonResponse({'error': 'File kosong.'}, status=400)
+    if size > settings.DIRECT_UPLOAD_MAX_SIZE:
+        return JsonResponse({'error': 'Ukuran file melebihi batas.'}, status=400)
+
+    storage = field.storage
+    sha256 = request.POST.get('sha256', '').lower()
+    if isinstance(storage, ContentAddressedStorageMixin) and SHA256_RE.fullmatch(sha256):
+        name = storage.blob_name(sha256, filename)
+        if storage.touch_blob(name):
+            # Already stored: nothing to transfer.
+            return JsonResponse({'name': name, 'exists': True})
+        post = generate_presigned_post(
+            storage_key(name),
+            max_size=settings.DIRECT_UPLOAD_MAX_SIZE,
+            expires_in=settings.DIRECT_UPLOAD_EXPIRES,
+            sha256=sha256,
+        )
+        return JsonResponse({'url': post['url'], 'fields': post['fields'], 'name': name, 'exists': False})
+
+    # No hash from the browser: upload to the upload_to path; the row's
+    # relations decide the key.
+    instance = model()
+    for related in opts.concrete_fields:
+        if isinstance(related, models.ForeignKey) and request.POST.get(related.name):
+            try:
+                setattr(instance, related.attname, related.to_python(request.POST[related.name]))
+            except ValidationError:
+                return JsonResponse({'error': f'{related.verbose_name} tidak valid.'}, status=400)
+    try:
+        name = field.generate_filename(instance, filename)
+    except ObjectDoesNotExist:
+        return JsonResponse(
+            {'error': 'Lengkapi dan simpan data terkait sebelum mengunggah file.'}, status=400
+        )
+
+    post = generate_presigned_post(
+        storage_key(name),
+        max_size=settings.DIRECT_UPLOAD_MAX_SIZE,
+        expires_in=settings.DIRECT_UPLOAD_EXPIRES,
+    )
+    return JsonResponse({'url': post['url'], 'fields': post['fields'], 'name': name, 'exists': False})
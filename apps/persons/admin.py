@@ -1,5 +1,16 @@
 from django.contrib import admin
 from apps.persons.models import Person, PersonDocument
+from apps.core.admin import (
+    DocumentComplianceMixin,
+    FastPaginationMixin,
+    ImportAdminMixin,
+    IndexedSearchMixin,
+    PresignedFileInlineFormSet,
+    export_as_csv,
+    export_as_xlsx,
+)
+from apps.core.forms import DirectUploadForm
+from apps.persons.importers import PersonImporter
 from django.utils.html import format_html
 
 
@@ -8,10 +19,15 @@ from django.utils.html import format_html
 # Register your models here.
 class PersonDocumentInline(admin.TabularInline):  # Atau gunakan StackedInline
     model = PersonDocument
+    form = DirectUploadForm
+    formset = PresignedFileInlineFormSet
     extra = 0  # Jumlah form kosong yang ditampilkan
     fields = ["title", 'file', 'file_link', 'issued_date']
     readonly_fields = ('file_link',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('person__vendor')
+
     def file_link(self, obj):
         if not obj.file:
             return "-"
@@ -22,13 +38,25 @@ class PersonDocumentInline(admin.TabularInline):  # Atau gunakan StackedInline
 
     file_link.short_description = "File URL"
 
-class PersonAdmin(admin.ModelAdmin):
+class PersonAdmin(FastPaginationMixin, DocumentComplianceMixin, ImportAdminMixin, IndexedSearchMixin, admin.ModelAdmin):
     model = Person
+    importer_class = PersonImporter
     ordering = ('vendor',)
-    list_display = ["full_name", "vendor", "role", "email", "phone"]
-    list_filter = ["vendor", ]
+    list_display = ["full_name", "vendor", "role", "email", "phone", "compliance"]
+    list_select_related = ('vendor',)
+    list_filter = ["vendor", "compliance_status"]
     search_fields = ("full_name", "email", )
+    autocomplete_fields = ("vendor",)
     inlines = [PersonDocumentInline] 
+    query_budget = {'changelist': 8, 'change': 12}
+    actions = [export_as_csv, export_as_xlsx]
+    export_fields = [
+        ('full_name', 'Nama Lengkap'),
+        ('vendor__name', 'Vendor'),
+        ('role', 'Jabatan'),
+        ('email', 'Email'),
+        ('phone', 'Telepon'),
+    ]
     
 
 
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class PersonsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.persons'
+
+    def ready(self):
+        from apps.core import search
+        from apps.persons.models import Person
+
+        search.register(Person, ['full_name', 'role', 'email', 'documents__title'])
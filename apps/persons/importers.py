@@ -0,0 +1,33 @@
+from apps.core.imports import BaseImporter
+from apps.persons.models import Person
+from apps.vendors.models import Vendor
+
+
+class PersonImporter(BaseImporter):
+    """
+    Columns: vendor_npwp, full_name, role and optionally email, phone.
+    Persons are attached to the vendor with that NPWP and upserted by
+    full_name.
+    """
+    model = Person
+    fields = ('full_name', 'role', 'email', 'phone')
+    key_fields = ('full_name',)
+    required_columns = ('vendor_npwp', 'full_name', 'role')
+
+    def resolve(self, rows):
+        npwps = {row['vendor_npwp'] for line, row, values in rows}
+        vendor_ids = dict(Vendor.objects.filter(npwp__in=npwps).values_list('npwp', 'id'))
+
+        resolved = []
+        for line, row, values in rows:
+            vendor_id = vendor_ids.get(row['vendor_npwp'])
+            if vendor_id is None:
+                self.fail(line, f'Vendor dengan NPWP {row["vendor_npwp"]} tidak ditemukan')
+                continue
+            values['vendor_id'] = vendor_id
+            resolved.append((line, row, values))
+        return resolved
+
+    def existing(self, keys):
+        names = [name for (name,) in keys]
+        return {(obj.full_name,): obj for obj in Person.objects.filter(full_name__in=names)}
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persons', '0004_alter_persondocument_file'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['vendor', '-id'], name='person_vendor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='persondocument',
+            index=models.Index(fields=['expired_date'], name='persondoc_expired_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:49
+
+import datetime
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+from django.utils import timezone
+
+# Frozen copy of apps.core.expiry, on the historical models. The first
+# expiry run has no checkpoint yet and recomputes every person with the
+# configured COMPLIANCE_EXPIRING_DAYS.
+EXPIRING_DAYS = 30
+
+
+def backfill_compliance(apps, schema_editor):
+    Person = apps.get_model('persons', 'Person')
+    PersonDocument = apps.get_model('persons', 'PersonDocument')
+    rows = PersonDocument.objects.values_list('person_id', 'document_type').annotate(
+        latest=Max('expired_date'), dated=Count('expired_date'), total=Count('pk'),
+    ).order_by()
+    expire_on = {}
+    for owner_id, _, latest, dated, total in rows:
+        current = expire_on.setdefault(owner_id, None)
+        if dated < total:
+            # An undated document of this type: the type never expires.
+            continue
+        expire_on[owner_id] = latest if current is None else min(current, latest)
+
+    today = timezone.localdate()
+    changed = []
+    for owner in Person.objects.filter(pk__in=expire_on).only('pk').iterator(chunk_size=2000):
+        date = expire_on[owner.pk]
+        if date is None:
+            continue
+        if date < today:
+            status = 'expired'
+        elif date <= today + datetime.timedelta(days=EXPIRING_DAYS):
+            status = 'expiring'
+        else:
+            status = 'valid'
+        owner.documents_expire_on, owner.compliance_status = date, status
+        changed.append(owner)
+    Person.objects.bulk_update(changed, ['documents_expire_on', 'compliance_status'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persons', '0006_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='person',
+            name='compliance_status',
+            field=models.CharField(choices=[('valid', 'Valid'), ('expiring', 'Segera kedaluwarsa'), ('expired', 'Kedaluwarsa'), ('none', 'Tanpa masa berlaku')], default='none', editable=False, max_length=10, verbose_name='status dokumen'),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='documents_expire_on',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='dokumen berlaku s.d.'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['compliance_status', 'id'], name='person_compliance_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['documents_expire_on', 'id'], name='person_expire_on_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='persondocument',
+            index=models.Index(fields=['updated_at'], name='persondoc_updated_idx'),
+        ),
+        migrations.RunPython(backfill_compliance, migrations.RunPython.noop),
+    ]
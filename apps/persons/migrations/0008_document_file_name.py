@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:31
+
+import posixpath
+
+from django.db import migrations, models
+
+
+def backfill_file_name(apps, schema_editor):
+    # Files not moved into blobs yet still carry their name; blob names are
+    # hashes, and dedupe_documents records the name when it moves a file.
+    PersonDocument = apps.get_model('persons', 'PersonDocument')
+    rows = PersonDocument.objects.exclude(file='').exclude(file__isnull=True).exclude(file__contains='/blobs/')
+    batch = []
+    for row in rows.only('pk', 'file').iterator(chunk_size=2000):
+        row.file_name = posixpath.basename(row.file.name)[:255]
+        batch.append(row)
+        if len(batch) == 1000:
+            PersonDocument.objects.bulk_update(batch, ['file_name'])
+            batch = []
+    PersonDocument.objects.bulk_update(batch, ['file_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persons', '0007_document_compliance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='persondocument',
+            name='file_name',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='nama file asli'),
+        ),
+        migrations.RunPython(backfill_file_name, migrations.RunPython.noop),
+    ]
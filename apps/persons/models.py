@@ -1,7 +1,7 @@
 from django.db import models
-from apps.core.models import TimeStampedModel
+from apps.core.models import DocumentOwnerModel, TimeStampedModel
 from django.conf import settings
-from apps.core.utils import generate_presigned_url, safe_name
+from apps.core.utils import generate_presigned_url, safe_name, storage_key
 
 
 def document_upload_to(instance, filename):
@@ -11,7 +11,7 @@ def document_upload_to(instance, filename):
     return f"{env}/vendors/{vendor_name}/persons/{person_name}/{filename}"
 
 # Create your models here.
-class Person(TimeStampedModel):
+class Person(DocumentOwnerModel):
     vendor = models.ForeignKey(
         'vendors.Vendor', on_delete=models.CASCADE, related_name='persons'
     )
@@ -20,6 +20,16 @@ class Person(TimeStampedModel):
     email = models.EmailField(blank=True)
     phone = models.CharField(max_length=50, blank=True)
 
+    class Meta:
+        indexes = [
+            # The changelist orders by vendor, then -id.
+            models.Index(fields=['vendor', '-id'], name='person_vendor_idx'),
+            # compliance_status filter, and the documents_expire_on column
+            # and range (apps.core.expiry).
+            models.Index(fields=['compliance_status', 'id'], name='person_compliance_idx'),
+            models.Index(fields=['documents_expire_on', 'id'], name='person_expire_on_idx'),
+        ]
+
     def __str__(self):
         return f'{self.vendor.name}-{self.full_name}'
 
@@ -36,9 +46,18 @@ class PersonDocument(TimeStampedModel):
     document_type = models.CharField(max_length=20, choices=DOCUMENT_TYPE)
     title = models.CharField(max_length=255)
     file = models.FileField(upload_to=document_upload_to)
+    # The uploaded file's own name; blob names are hashes (apps.core.blobs).
+    file_name = models.CharField('nama file asli', max_length=255, blank=True, editable=False)
     issued_date = models.DateField(null=True, blank=True)
     expired_date = models.DateField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['expired_date'], name='persondoc_expired_idx'),
+            # Documents changed since the last expiry run.
+            models.Index(fields=['updated_at'], name='persondoc_updated_idx'),
+        ]
+
     def __str__(self):
         return f'{self.person.vendor.name}-{self.person.full_name}'
     
@@ -46,9 +65,9 @@ class PersonDocument(TimeStampedModel):
     def signed_file_url(self):
         if not self.file:
             return None
-        key = f"{settings.AWS_LOCATION}/{self.file.name}"
         return generate_presigned_url(
-            key,
-            expires_in=3600
+            storage_key(self.file.name),
+            expires_in=3600,
+            filename=self.file_name,
         )
     
@@ -1,3 +1,19 @@
 from django.test import TestCase
 
-# Create your tests here.
+from apps.persons.importers import PersonImporter
+from apps.persons.models import Person
+from apps.vendors.models import Vendor
+from apps.vendors.tests import xlsx_file
+
+
+class PersonImportTests(TestCase):
+    def test_xlsx_numeric_npwp_finds_the_vendor(self):
+        vendor = Vendor.objects.create(
+            name='Alpha', npwp='123456789012345', vendor_type='PT', email='a@example.com', phone='021',
+        )
+        result = PersonImporter().run(xlsx_file(
+            ('vendor_npwp', 'full_name', 'role'),
+            (123456789012345, 'Budi Santoso', 'Direktur'),
+        ), 'persons.xlsx')
+        self.assertEqual((result.created, result.failed), (1, 0), result.errors)
+        self.assertEqual(Person.objects.get(full_name='Budi Santoso').vendor, vendor)
@@ -1,17 +1,78 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from apps.procurements import ranking
 from apps.procurements.models import Procurement, ProcurementParticipant
+from apps.core.admin import (
+    compliance_badge,
+    FastPaginationMixin,
+    ImportAdminMixin,
+    IndexedSearchMixin,
+    PresignedFileAdminMixin,
+    PresignedFileInlineFormSet,
+    SelectRelatedFieldListFilter,
+    export_as_csv,
+    export_as_xlsx,
+)
+from apps.core.forms import DirectUploadForm
+from apps.procurements.importers import ProcurementParticipantImporter
+from apps.projects.models import Project
+from apps.vendors.models import Vendor
 from django.utils.html import format_html
 
+
+def bid_rank_display(obj):
+    # bid_rank and friends come from apps.procurements.ranking.
+    if getattr(obj, 'bid_rank', None) is None:
+        return "-"
+    if obj.bid_ties > 1:
+        return format_html('#{} <small>(seri {})</small>', obj.bid_rank, obj.bid_ties)
+    return format_html('#{}', obj.bid_rank)
+bid_rank_display.short_description = "PERINGKAT"
+
+
+def bid_gap_display(obj):
+    gap = getattr(obj, 'bid_gap', None)
+    if gap is None:
+        return "-"
+    value = obj.bid_value - gap
+    percent = f" ({gap / value:+.1%})" if value else ""
+    color = '#dc3545' if gap > 0 else '#28a745'
+    return format_html(
+        '<span style="color: {};">{}</span>',
+        color, f"Rp {float(gap):+,.2f}".replace(',', '.') + percent,
+    )
+bid_gap_display.short_description = "SELISIH NILAI PROYEK"
+
+
 # Register your models here.
 class ProcurementParticipantInline(admin.TabularInline):  # Atau gunakan StackedInline
     model = ProcurementParticipant
+    formset = PresignedFileInlineFormSet
     extra = 0  # Jumlah form kosong yang ditampilkan
-    fields = ["procurement", "vendor", "bid_value_display", "file_link","submission_date", "status"]
-    readonly_fields = ("file_link", "bid_value_display",)
+    fields = [
+        "procurement", "vendor", "vendor_compliance", "bid_value_display", "bid_rank", "bid_gap",
+        "file_link", "submission_date", "status",
+    ]
+    # The inline cannot add bids; a bid's vendor is changed on the bid itself,
+    # so rows render it from select_related instead of a widget query each.
+    readonly_fields = ("vendor", "file_link", "bid_value_display", "vendor_compliance", "bid_rank", "bid_gap")
+    # Lowest bid first, as ranked.
+    ordering = ("bid_value", "submission_date")
 
     def has_add_permission(self, request, obj=None):
         return False  # semua user tidak bisa tambah data
 
+    def get_queryset(self, request):
+        # The formset keeps the bids of one procurement: the windows see all of them.
+        return ranking.ranked(super().get_queryset(request).select_related('procurement__project', 'vendor'))
+
+    def bid_rank(self, obj):
+        return bid_rank_display(obj)
+    bid_rank.short_description = bid_rank_display.short_description
+
+    def bid_gap(self, obj):
+        return bid_gap_display(obj)
+    bid_gap.short_description = bid_gap_display.short_description
+
     def file_link(self, obj):
         if not obj.file:
             return "-"
@@ -21,6 +82,10 @@ class ProcurementParticipantInline(admin.TabularInline):  # Atau gunakan Stacked
         )
     file_link.short_description = "DOC URL"
 
+    def vendor_compliance(self, obj):
+        return compliance_badge(obj.vendor)
+    vendor_compliance.short_description = "DOKUMEN VENDOR"
+
 
     def bid_value_display(self, obj):
         if obj.bid_value is None:
@@ -43,13 +108,26 @@ class ProcurementParticipantInline(admin.TabularInline):  # Atau gunakan Stacked
 
 
 
-class ProcurementAdmin(admin.ModelAdmin):
+class ProcurementAdmin(FastPaginationMixin, IndexedSearchMixin, admin.ModelAdmin):
     model = Procurement
     ordering = ('-start_date',)
     list_display = ["project", "colored_status", "procurement_type", "start_date", "end_date"]
+    list_select_related = ('project',)
     list_filter = ["status", "procurement_type"]
     search_fields = ("project__project_name",)
+    search_index = [("project", Project)]
+    autocomplete_fields = ("project",)
     inlines = [ProcurementParticipantInline]
+    query_budget = {'changelist': 8, 'change': 12}
+    actions = [export_as_csv, export_as_xlsx, "settle_bids"]
+    export_fields = [
+        ('project__project_name', 'Proyek'),
+        ('project__project_value', 'Nilai Proyek'),
+        ('procurement_type', 'Jenis Pengadaan'),
+        ('start_date', 'Tanggal Mulai'),
+        ('end_date', 'Tanggal Selesai'),
+        ('status', 'Status'),
+    ]
 
     fieldsets = (
         ('procurement Info', {
@@ -78,14 +156,42 @@ class ProcurementAdmin(admin.ModelAdmin):
     colored_status.short_description = 'Status'
     colored_status.admin_order_field = 'status'
 
+    @admin.action(description='Tetapkan pemenang (BID terendah)', permissions=['change'])
+    def settle_bids(self, request, queryset):
+        result = ranking.settle(queryset)
+        level = messages.WARNING if result.tied or result.skipped else messages.SUCCESS
+        self.message_user(request, f'Pengadaan: {result}.', level)
+
     
 
-class ProcurementParticipantAdmin(admin.ModelAdmin):
+class ProcurementParticipantAdmin(
+    FastPaginationMixin, ImportAdminMixin, IndexedSearchMixin, PresignedFileAdminMixin,
+    admin.ModelAdmin,
+):
     model = ProcurementParticipant
+    form = DirectUploadForm
+    importer_class = ProcurementParticipantImporter
     ordering = ('-submission_date',)
-    list_display = ["procurement", "vendor", "bid_value_display", "file_link", "submission_date", "status"]
-    list_filter = ["procurement", "vendor", "status"]
-    search_fields = ("procurement",)
+    list_display = [
+        "procurement", "vendor", "bid_value_display", "bid_rank", "bid_gap", "file_link", "submission_date", "status",
+    ]
+    list_select_related = ('procurement__project', 'vendor')
+    list_filter = [("procurement", SelectRelatedFieldListFilter), "vendor", "status"]
+    search_fields = ("procurement__project__project_name", "vendor__name")
+    search_index = [("procurement__project", Project), ("vendor", Vendor)]
+    autocomplete_fields = ("procurement", "vendor")
+    query_budget = {'changelist': 11, 'change': 12}
+    actions = [export_as_csv, export_as_xlsx]
+    export_fields = [
+        ('procurement__project__project_name', 'Proyek'),
+        ('procurement__procurement_type', 'Jenis Pengadaan'),
+        ('vendor__name', 'Vendor'),
+        ('vendor__npwp', 'NPWP'),
+        ('bid_value', 'BID'),
+        ('submission_date', 'Tanggal Submit'),
+        ('status', 'Status'),
+        ('file', 'DOC URL'),
+    ]
 
     fieldsets = (
         ('Procurement Info', {
@@ -98,6 +204,21 @@ class ProcurementParticipantAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_changelist_instance(self, request):
+        cl = super().get_changelist_instance(request)
+        # Ranked against every bid of the page's procurements, not only the
+        # filtered ones (see apps.procurements.ranking).
+        ranking.attach_ranks(cl.result_list, using=cl.result_list.db)
+        return cl
+
+    def bid_rank(self, obj):
+        return bid_rank_display(obj)
+    bid_rank.short_description = bid_rank_display.short_description
+
+    def bid_gap(self, obj):
+        return bid_gap_display(obj)
+    bid_gap.short_description = bid_gap_display.short_description
+
     def file_link(self, obj):
         if not obj.file:
             return "-"
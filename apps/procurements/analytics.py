@@ -0,0 +1,342 @@
+"""
+Per-vendor procurement figures: bids, decided bids (winners and losers),
+wins and win rate, bid total against the projects' values, and value
+awarded, per month of submission (VendorProcurementMonth) and overall
+(VendorProcurementSummary).
+
+They are kept incrementally. Saving or deleting a bid, changing a
+project's value, or moving a procurement to another project marks the
+(vendor, month) pairs it touches; when the transaction commits, those
+months are recomputed from their bids (one vendor's month is a range of
+participant_vendor_sub_idx) and the vendors' summaries from their months,
+whatever the number of bids elsewhere.
+``QuerySet.update`` of bids, projects and procurements is followed through
+pre_bulk_update/post_bulk_update (apps.core.signals). ``bulk_create`` sends
+no signals: call ``objects_changed`` after it (the importer does), or
+``manage.py rebuild_vendor_stats``, which rebuilds every vendor, in parallel
+across processes.
+"""
+import datetime
+from functools import partial
+from threading import local
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+
+from apps.core.signals import post_bulk_update, pre_bulk_update
+from apps.procurements.models import (
+    Procurement,
+    ProcurementParticipant,
+    VendorProcurementMonth,
+    VendorProcurementSummary,
+)
+from apps.projects.models import Project
+from apps.vendors.models import Vendor
+
+DECIDED = ('winner', 'loser')
+COUNTERS = ['participations', 'decided', 'wins', 'bid_total', 'project_value_total', 'awarded_total']
+STAT_FIELDS = [*COUNTERS, 'win_rate', 'bid_ratio']
+# (vendor, month) pairs per query.
+BATCH_SIZE = 500
+# Bid fields the figures read, and those that place a bid in a month.
+MONTH_FIELDS = {'vendor', 'vendor_id', 'submission_date'}
+BID_FIELDS = MONTH_FIELDS | {'status', 'bid_value', 'procurement', 'procurement_id'}
+
+_pending = local()
+
+
+def month_of(date):
+    return date.replace(day=1)
+
+
+def _next_month(month):
+    return (month + datetime.timedelta(days=32)).replace(day=1)
+
+
+def _stats(row):
+    stats = {name: row.get(name) or 0 for name in COUNTERS}
+    stats['win_rate'] = stats['wins'] / stats['decided'] if stats['decided'] else None
+    stats['bid_ratio'] = (
+        float(stats['bid_total'] / stats['project_value_total']) if stats['project_value_total'] else None
+    )
+    return stats
+
+
+def _bid_aggregates():
+    return {
+        'participations': Count('pk'),
+        'decided': Count('pk', filter=Q(status__in=DECIDED)),
+        'wins': Count('pk', filter=Q(status='winner')),
+        'bid_total': Sum('bid_value'),
+        'project_value_total': Sum('procurement__project__project_value'),
+        'awarded_total': Sum('bid_value', filter=Q(status='winner')),
+    }
+
+
+def _monthly_rows(participants):
+    return (
+        participants.annotate(month=TruncMonth('submission_date'))
+        .values('vendor_id', 'month')
+        .annotate(**_bid_aggregates())
+        .order_by()
+    )
+
+
+def _save_months(rows, using):
+    VendorProcurementMonth.objects.using(using).bulk_create(
+        [VendorProcurementMonth(vendor_id=row['vendor_id'], month=row['month'], **_stats(row)) for row in rows],
+        update_conflicts=True, unique_fields=['vendor', 'month'], update_fields=STAT_FIELDS,
+    )
+
+
+def _save_summaries(vendor_ids, using):
+    """Sum the months of ``vendor_ids`` into their summaries."""
+    rows = (
+        VendorProcurementMonth.objects.using(using).filter(vendor_id__in=vendor_ids)
+        .values('vendor_id')
+        .annotate(**{name: Sum(name) for name in COUNTERS})
+        .order_by()
+    )
+    summaries = [VendorProcurementSummary(vendor_id=row['vendor_id'], **_stats(row)) for row in rows]
+    VendorProcurementSummary.objects.using(using).bulk_create(
+        summaries, update_conflicts=True, unique_fields=['vendor'], update_fields=STAT_FIELDS,
+    )
+    VendorProcurementSummary.objects.using(using).filter(vendor_id__in=vendor_ids).exclude(
+        vendor_id__in=[summary.vendor_id for summary in summaries],
+    ).delete()
+
+
+def _lock_vendors(vendor_ids, using):
+    # Refreshes of one vendor read its bids and then write its figures: one
+    # after another, or the one that read first can write last. In pk order
+    # so two batches cannot deadlock.
+    list(
+        Vendor.objects.using(using).select_for_update()
+        .filter(pk__in=vendor_ids).order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def refresh(keys, using=DEFAULT_DB_ALIAS):
+    """Recompute the months ``keys`` ((vendor id, month) pairs) and their vendors' summaries."""
+    keys = sorted(set(keys))
+    for start in range(0, len(keys), BATCH_SIZE):
+        batch = keys[start:start + BATCH_SIZE]
+        with transaction.atomic(using=using):
+            _lock_vendors({vendor_id for vendor_id, _ in batch}, using)
+            condition = Q()
+            for vendor_id, month in batch:
+                condition |= Q(vendor_id=vendor_id, submission_date__gte=month, submission_date__lt=_next_month(month))
+            rows = list(_monthly_rows(ProcurementParticipant.objects.using(using).filter(condition)))
+            _save_months(rows, using)
+            empty = set(batch) - {(row['vendor_id'], row['month']) for row in rows}
+            if empty:
+                condition = Q()
+                for vendor_id, month in empty:
+                    condition |= Q(vendor_id=vendor_id, month=month)
+                VendorProcurementMonth.objects.using(using).filter(condition).delete()
+            _save_summaries({vendor_id for vendor_id, _ in batch}, using)
+
+
+def rebuild_vendors(vendor_ids, using=DEFAULT_DB_ALIAS):
+    """Rebuild every month and the summary of ``vendor_ids`` from their bids."""
+    with transaction.atomic(using=using):
+        _lock_vendors(vendor_ids, using)
+        VendorProcurementMonth.objects.using(using).filter(vendor_id__in=vendor_ids).delete()
+        rows = _monthly_rows(ProcurementParticipant.objects.using(using).filter(vendor_id__in=vendor_ids))
+        _save_months(list(rows), using)
+        _save_summaries(vendor_ids, using)
+    return len(vendor_ids)
+
+
+def _worker_init():
+    # Forked workers must not share the parent's database connection.
+    for conn in connections.all():
+        conn.close()
+
+
+def rebuild(vendor_ids, chunk_size=500, workers=1, using=DEFAULT_DB_ALIAS, log=None):
+    """
+    Rebuild the figures of ``vendor_ids`` in chunks that commit one by one,
+    over ``workers`` processes. Returns the number of vendors rebuilt.
+    """
+    vendor_ids = list(vendor_ids)
+    chunks = [vendor_ids[start:start + chunk_size] for start in range(0, len(vendor_ids), chunk_size)]
+    pool = None
+    if workers > 1:
+        import multiprocessing
+
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise ValueError('Parallel rebuilds need the fork start method (Linux/macOS).')
+        for conn in connections.all():
+            conn.close()
+        pool = multiprocessing.get_context('fork').Pool(workers, initializer=_worker_init)
+    done = 0
+    try:
+        results = (
+            pool.imap_unordered(partial(rebuild_vendors, using=using), chunks) if pool
+            else (rebuild_vendors(chunk, using) for chunk in chunks)
+        )
+        for count in results:
+            done += count
+            if log:
+                log(f'{done}/{len(vendor_ids)} vendors')
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return done
+
+
+def changed(keys, using=DEFAULT_DB_ALIAS):
+    """Refresh the months ``keys`` when the current transaction commits."""
+    _pending.__dict__.setdefault(using, set()).update(keys)
+    # One callback per change, as in apps.core.search.
+    transaction.on_commit(partial(_flush, using), using=using)
+
+
+def _flush(using):
+    refresh(_pending.__dict__.pop(using, ()), using)
+
+
+def _key(instance):
+    vendor_id = instance.__dict__.get('vendor_id')
+    date = instance.__dict__.get('submission_date')
+    if vendor_id is None or not isinstance(date, datetime.date):
+        return None
+    return vendor_id, month_of(date)
+
+
+def objects_changed(participants, using=DEFAULT_DB_ALIAS):
+    """Bids saved without signals: refresh the months they were and are in."""
+    keys = set()
+    for participant in participants:
+        keys.update({_key(participant), getattr(participant, '_analytics_key', None)})
+        participant._analytics_key = _key(participant)
+    keys.discard(None)
+    if keys:
+        changed(keys, using)
+
+
+def _keys(participants):
+    return set(
+        participants.annotate(month=TruncMonth('submission_date'))
+        .values_list('vendor_id', 'month').distinct().order_by()
+    )
+
+
+def participants_changed(queryset, using=DEFAULT_DB_ALIAS):
+    """Bids of ``queryset`` changed without signals (e.g. raw SQL)."""
+    keys = _keys(queryset)
+    if keys:
+        changed(keys, using)
+
+
+def _remember_participant(sender, instance, **kwargs):
+    # The month a bid moves out of (another vendor or date) changes too.
+    instance._analytics_key = _key(instance)
+
+
+def _participant_saved(sender, instance, raw=False, using=DEFAULT_DB_ALIAS, **kwargs):
+    if not raw:
+        objects_changed([instance], using)
+
+
+def _participant_deleted(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    changed({_key(instance), getattr(instance, '_analytics_key', None)} - {None}, using)
+
+
+def _remember_project_value(sender, instance, **kwargs):
+    instance._analytics_value = instance.__dict__.get('project_value')
+
+
+def _project_saved(sender, instance, created, raw=False, using=DEFAULT_DB_ALIAS, **kwargs):
+    previous = getattr(instance, '_analytics_value', None)
+    instance._analytics_value = instance.project_value
+    if created or raw or previous == instance.project_value:
+        return
+    participants_changed(
+        ProcurementParticipant.objects.using(using).filter(procurement__project=instance), using,
+    )
+
+
+def _remember_procurement_project(sender, instance, **kwargs):
+    instance._analytics_project = instance.__dict__.get('project_id')
+
+
+def _procurement_saved(sender, instance, created, raw=False, using=DEFAULT_DB_ALIAS, **kwargs):
+    # A bid's project value is its procurement's project's.
+    previous = getattr(instance, '_analytics_project', None)
+    instance._analytics_project = instance.project_id
+    if created or raw or previous == instance.project_id:
+        return
+    participants_changed(ProcurementParticipant.objects.using(using).filter(procurement=instance), using)
+
+
+def _participants_updating(sender, fields, queryset, using=DEFAULT_DB_ALIAS, **kwargs):
+    # The update may change the fields ``queryset`` filters on: take its
+    # months now, and the bids that move to other months, for afterwards.
+    if fields & BID_FIELDS:
+        queryset._analytics_keys = _keys(queryset)
+    if fields & MONTH_FIELDS:
+        queryset._analytics_moved = list(queryset.values_list('pk', flat=True))
+
+
+def _projects_updating(sender, fields, queryset, using=DEFAULT_DB_ALIAS, **kwargs):
+    if 'project_value' in fields:
+        queryset._analytics_keys = _keys(
+            ProcurementParticipant.objects.using(using).filter(procurement__project__in=queryset.values('pk'))
+        )
+
+
+def _procurements_updating(sender, fields, queryset, using=DEFAULT_DB_ALIAS, **kwargs):
+    if fields & {'project', 'project_id'}:
+        queryset._analytics_keys = _keys(
+            ProcurementParticipant.objects.using(using).filter(procurement__in=queryset.values('pk'))
+        )
+
+
+def _updated(sender, queryset, using=DEFAULT_DB_ALIAS, **kwargs):
+    # Only now: in autocommit, changed() refreshes right away.
+    keys = queryset.__dict__.pop('_analytics_keys', set())
+    moved = queryset.__dict__.pop('_analytics_moved', [])
+    for start in range(0, len(moved), BATCH_SIZE):
+        keys |= _keys(ProcurementParticipant.objects.using(using).filter(pk__in=moved[start:start + BATCH_SIZE]))
+    if keys:
+        changed(keys, using)
+
+
+def connect_analytics():
+    post_init.connect(_remember_participant, sender=ProcurementParticipant, dispatch_uid='analytics-bid-init')
+    post_save.connect(_participant_saved, sender=ProcurementParticipant, dispatch_uid='analytics-bid-save')
+    post_delete.connect(_participant_deleted, sender=ProcurementParticipant, dispatch_uid='analytics-bid-delete')
+    post_init.connect(_remember_project_value, sender=Project, dispatch_uid='analytics-project-init')
+    post_save.connect(_project_saved, sender=Project, dispatch_uid='analytics-project-save')
+    post_init.connect(
+        _remember_procurement_project, sender=Procurement, dispatch_uid='analytics-procurement-init',
+    )
+    post_save.connect(_procurement_saved, sender=Procurement, dispatch_uid='analytics-procurement-save')
+    for model, updating in (
+        (ProcurementParticipant, _participants_updating),
+        (Project, _projects_updating),
+        (Procurement, _procurements_updating),
+    ):
+        label = model._meta.label_lower
+        pre_bulk_update.connect(updating, sender=model, dispatch_uid=f'analytics-updating-{label}')
+        post_bulk_update.connect(_updated, sender=model, dispatch_uid=f'analytics-updated-{label}')
+
+
+def vendors_by_month(months=12):
+    """Every vendor's figures summed per month, the last ``months`` months."""
+    since = month_of(timezone.localdate())
+    for _ in range(months - 1):
+        since = month_of(since - datetime.timedelta(days=1))
+    rows = (
+        VendorProcurementMonth.objects.filter(month__gte=since)
+        .values('month')
+        .annotate(vendors=Count('vendor_id'), **{name: Sum(name) for name in COUNTERS})
+        .order_by('-month')
+    )
+    return [{**row, **_stats(row)} for row in rows]
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ProcurementsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.procurements'
+
+    def ready(self):
+        from apps.procurements.analytics import connect_analytics
+
+        connect_analytics()
@@ -0,0 +1,67 @@
+import uuid
+
+from apps.core.imports import BaseImporter
+from apps.procurements import analytics
+from apps.procurements.models import Procurement, ProcurementParticipant
+from apps.vendors.models import Vendor
+
+
+class ProcurementParticipantImporter(BaseImporter):
+    """
+    Columns: procurement (id), vendor_npwp, bid_value, submission_date and
+    optionally status (default: submitted). Upserts by (procurement, vendor).
+    """
+    model = ProcurementParticipant
+    fields = ('bid_value', 'submission_date', 'status')
+    key_fields = ('procurement_id', 'vendor_id')
+    required_columns = ('procurement', 'vendor_npwp', 'bid_value', 'submission_date')
+    # Updates without a status keep the bid's current one.
+    create_defaults = {'status': 'submitted'}
+
+    def resolve(self, rows):
+        procurement_ids = set()
+        for line, row, values in rows:
+            try:
+                procurement_ids.add(uuid.UUID(str(row['procurement'])))
+            except ValueError:
+                pass
+        npwps = {row['vendor_npwp'] for line, row, values in rows}
+
+        known_procurements = set(
+            Procurement.objects.filter(pk__in=procurement_ids).values_list('pk', flat=True)
+        )
+        vendor_ids = dict(Vendor.objects.filter(npwp__in=npwps).values_list('npwp', 'id'))
+
+        resolved = []
+        for line, row, values in rows:
+            try:
+                procurement_id = uuid.UUID(str(row['procurement']))
+            except ValueError:
+                procurement_id = None
+            if procurement_id not in known_procurements:
+                self.fail(line, f'Pengadaan {row["procurement"]} tidak ditemukan')
+                continue
+            vendor_id = vendor_ids.get(row['vendor_npwp'])
+            if vendor_id is None:
+                self.fail(line, f'Vendor dengan NPWP {row["vendor_npwp"]} tidak ditemukan')
+                continue
+            values['procurement_id'] = procurement_id
+            values['vendor_id'] = vendor_id
+            resolved.append((line, row, values))
+        return resolved
+
+    def existing(self, keys):
+        # Two IN lists instead of one OR per pair; extra pairs are dropped below.
+        wanted = set(keys)
+        candidates = ProcurementParticipant.objects.filter(
+            procurement_id__in={procurement_id for procurement_id, _ in keys},
+            vendor_id__in={vendor_id for _, vendor_id in keys},
+        )
+        return {
+            key: obj for obj in candidates
+            if (key := (obj.procurement_id, obj.vendor_id)) in wanted
+        }
+
+    def written(self, objs):
+        super().written(objs)
+        analytics.objects_changed(objs)
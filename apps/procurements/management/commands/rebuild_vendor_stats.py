@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.procurements import analytics
+from apps.vendors.models import Vendor
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the per-vendor and per-month procurement figures from the '
+        'bids, in chunks of vendors that commit one by one, optionally over '
+        'several processes. Run it after writes that bypass model signals, '
+        'such as raw inserts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--chunk-size', type=int, default=500, help='Vendors per transaction.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        vendor_ids = Vendor.objects.using(options['database']).values_list('pk', flat=True).order_by('pk')
+        done = analytics.rebuild(
+            vendor_ids,
+            chunk_size=options['chunk_size'],
+            workers=options['processes'],
+            using=options['database'],
+            log=lambda message: self.stdout.write(f'  {message}'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{done} vendors in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurements', '0004_alter_procurementparticipant_file'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='procurement',
+            index=models.Index(fields=['start_date', 'id'], name='procurement_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procurement',
+            index=models.Index(fields=['status', 'start_date', 'id'], name='procurement_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procurement',
+            index=models.Index(fields=['procurement_type', 'start_date', 'id'], name='procurement_type_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procurementparticipant',
+            index=models.Index(fields=['submission_date', 'id'], name='participant_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procurementparticipant',
+            index=models.Index(fields=['status', 'submission_date', 'id'], name='participant_status_sub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procurementparticipant',
+            index=models.Index(fields=['vendor', 'submission_date', 'id'], name='participant_vendor_sub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procurementparticipant',
+            index=models.Index(fields=['bid_value'], name='participant_bid_value_idx'),
+        ),
+    ]
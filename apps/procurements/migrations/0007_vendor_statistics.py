@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0010_document_compliance'),
+        ('procurements', '0006_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorProcurementSummary',
+            fields=[
+                ('participations', models.IntegerField(default=0, verbose_name='partisipasi')),
+                ('decided', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0, verbose_name='menang')),
+                ('bid_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('project_value_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('awarded_total', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='nilai menang')),
+                ('win_rate', models.FloatField(blank=True, null=True)),
+                ('bid_ratio', models.FloatField(blank=True, null=True)),
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='procurement_summary', serialize=False, to='vendors.vendor')),
+            ],
+            options={
+                'verbose_name_plural': 'vendor procurement summaries',
+                'indexes': [models.Index(fields=['awarded_total'], name='vendorprocsum_awarded_idx'), models.Index(fields=['win_rate'], name='vendorprocsum_win_rate_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VendorProcurementMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('participations', models.IntegerField(default=0, verbose_name='partisipasi')),
+                ('decided', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0, verbose_name='menang')),
+                ('bid_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('project_value_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('awarded_total', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='nilai menang')),
+                ('win_rate', models.FloatField(blank=True, null=True)),
+                ('bid_ratio', models.FloatField(blank=True, null=True)),
+                ('month', models.DateField()),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='procurement_months', to='vendors.vendor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month'], name='vendorprocmonth_month_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='vendorprocurementmonth',
+            constraint=models.UniqueConstraint(fields=('vendor', 'month'), name='vendorprocmonth_uniq'),
+        ),
+    ]
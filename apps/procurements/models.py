@@ -2,7 +2,7 @@ from django.db import models
 from apps.core.models import TimeStampedModel
 from apps.projects.models import Project
 from django.conf import settings
-from apps.core.utils import generate_presigned_url, safe_name
+from apps.core.utils import generate_presigned_url, safe_name, storage_key
 
 
 def document_upload_to(instance, filename):
@@ -34,6 +34,15 @@ class Procurement(TimeStampedModel):
     end_date = models.DateField()
     status = models.CharField(max_length=20, choices=STATUS)
 
+    class Meta:
+        # The changelist orders by -start_date, -id, optionally filtered by
+        # status or type; scanned backwards, these indexes return a page
+        # without sorting.
+        indexes = [
+            models.Index(fields=['start_date', 'id'], name='procurement_start_idx'),
+            models.Index(fields=['status', 'start_date', 'id'], name='procurement_status_start_idx'),
+            models.Index(fields=['procurement_type', 'start_date', 'id'], name='procurement_type_start_idx'),
+        ]
 
     def __str__(self):
         return f'{self.project.project_name}'
@@ -55,11 +64,21 @@ class ProcurementParticipant(TimeStampedModel):
     )
     bid_value = models.DecimalField(max_digits=15, decimal_places=2)
     file = models.FileField(upload_to=document_upload_to, null=True,)
+    # The uploaded file's own name; blob names are hashes (apps.core.blobs).
+    file_name = models.CharField('nama file asli', max_length=255, blank=True, editable=False)
     submission_date = models.DateField()
     status = models.CharField(max_length=20, choices=STATUS)
 
     class Meta:
         unique_together = ('procurement', 'vendor')
+        # Changelist order is -submission_date, -id; the status and vendor
+        # filters keep it. bid_value is a sortable column.
+        indexes = [
+            models.Index(fields=['submission_date', 'id'], name='participant_submitted_idx'),
+            models.Index(fields=['status', 'submission_date', 'id'], name='participant_status_sub_idx'),
+            models.Index(fields=['vendor', 'submission_date', 'id'], name='participant_vendor_sub_idx'),
+            models.Index(fields=['bid_value'], name='participant_bid_value_idx'),
+        ]
 
     def __str__(self):
         return f"{self.procurement}-{self.vendor}"
@@ -68,9 +87,67 @@ class ProcurementParticipant(TimeStampedModel):
     def signed_file_url(self):
         if not self.file:
             return None
-        key = f"{settings.AWS_LOCATION}/{self.file.name}"
         return generate_presigned_url(
-            key,
-            expires_in=3600
+            storage_key(self.file.name),
+            expires_in=3600,
+            filename=self.file_name,
         )
 
+
+
+class VendorProcurementStats(models.Model):
+    """
+    A vendor's bids, summed (apps.procurements.analytics). ``decided`` bids
+    are the winners and losers; ``win_rate`` and ``bid_ratio`` are stored
+    so lists can sort on them.
+    """
+    participations = models.IntegerField('partisipasi', default=0)
+    decided = models.IntegerField(default=0)
+    wins = models.IntegerField('menang', default=0)
+    bid_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    # The project values of the bids, for the bid / project value ratio.
+    project_value_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    awarded_total = models.DecimalField('nilai menang', max_digits=20, decimal_places=2, default=0)
+    # wins / decided, and bid_total / project_value_total.
+    win_rate = models.FloatField(null=True, blank=True)
+    bid_ratio = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+
+class VendorProcurementSummary(VendorProcurementStats):
+    vendor = models.OneToOneField(
+        'vendors.Vendor', on_delete=models.CASCADE, primary_key=True, related_name='procurement_summary'
+    )
+
+    class Meta:
+        verbose_name_plural = 'vendor procurement summaries'
+        indexes = [
+            # The report's top vendors.
+            models.Index(fields=['awarded_total'], name='vendorprocsum_awarded_idx'),
+            models.Index(fields=['win_rate'], name='vendorprocsum_win_rate_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.vendor_id}'
+
+
+class VendorProcurementMonth(VendorProcurementStats):
+    vendor = models.ForeignKey(
+        'vendors.Vendor', on_delete=models.CASCADE, related_name='procurement_months'
+    )
+    # First day of the month of the bids' submission_date.
+    month = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vendor', 'month'], name='vendorprocmonth_uniq'),
+        ]
+        indexes = [
+            # The report's per-month totals.
+            models.Index(fields=['month'], name='vendorprocmonth_month_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.vendor_id} {self.month:%Y-%m}'
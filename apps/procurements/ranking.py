@@ -0,0 +1,115 @@
+"""
+Bid ranking, computed by the database with window functions over the bids
+of each procurement:
+
+* ``bid_rank``: RANK() by bid value, lowest first, so equal bids share a
+  rank and the next one skips (1, 1, 3);
+* ``bid_ties``: how many bids of the procurement have the same value;
+* ``bid_gap``: the bid minus the project's value (negative: under it).
+
+The windows see the rows the query selects, so ``ranked`` is only right on
+whole procurements (a filter on the procurement, as in the inline); a
+changelist filtered by vendor or status takes its ranks from
+``attach_ranks``, one query per page.
+
+``settle`` awards procurements in evaluation from these ranks: the single
+lowest bid within the project's value wins and the other bids lose. A
+procurement whose lowest bid exceeds the project's value, or without bids,
+fails; one with a tie for the lowest bid is left for a manual decision.
+Whatever the number of procurements, it runs two UPDATEs in one transaction
+(participants, then procurements); the vendors' figures follow the first
+(apps.procurements.analytics).
+"""
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Case, Count, F, Value, When, Window
+from django.db.models.functions import Rank
+
+from apps.procurements.models import Procurement, ProcurementParticipant
+
+SETTLEABLE = ('evaluation',)
+
+
+def ranked(participants):
+    """Annotate ``participants`` with bid_rank, bid_ties and bid_gap."""
+    return participants.annotate(
+        # procurement_id is constant in the partition; as a second key it keeps
+        # Django's SQLite backend from wrapping a decimal ORDER BY in a CAST.
+        bid_rank=Window(
+            Rank(), partition_by=[F('procurement_id')], order_by=[F('bid_value').asc(), F('procurement_id').asc()],
+        ),
+        bid_ties=Window(Count('pk'), partition_by=[F('procurement_id'), F('bid_value')]),
+        bid_gap=F('bid_value') - F('procurement__project__project_value'),
+    )
+
+
+def attach_ranks(participants, using=None):
+    """
+    Set the ranks of ``participants`` (instances) from all their procurements'
+    bids, read from ``using`` (by default the database ``participants`` came
+    from). A bid deleted in between is left without a rank.
+    """
+    if using is None:
+        using = getattr(participants, 'db', DEFAULT_DB_ALIAS)
+    participants = list(participants)
+    if not participants:
+        return
+    ranks = {
+        pk: (rank, ties, gap)
+        for pk, rank, ties, gap in ranked(
+            ProcurementParticipant.objects.using(using).filter(
+                procurement_id__in={participant.procurement_id for participant in participants},
+            )
+        ).values_list('pk', 'bid_rank', 'bid_ties', 'bid_gap')
+    }
+    for participant in participants:
+        participant.bid_rank, participant.bid_ties, participant.bid_gap = ranks.get(participant.pk, (None, None, None))
+
+
+class SettleResult:
+    def __init__(self):
+        self.awarded = 0
+        self.failed = 0
+        self.tied = 0
+        self.skipped = 0
+
+    def __str__(self):
+        return (
+            f'{self.awarded} pemenang ditetapkan, {self.failed} gagal, '
+            f'{self.tied} seri, {self.skipped} dilewati'
+        )
+
+
+def settle(procurements, using=DEFAULT_DB_ALIAS):
+    """Award the procurements of ``procurements`` in evaluation (see the module docstring)."""
+    result = SettleResult()
+    with transaction.atomic(using=using):
+        statuses = dict(
+            Procurement.objects.using(using).select_for_update()
+            .filter(pk__in=procurements.values('pk')).values_list('pk', 'status')
+        )
+        pending = {pk for pk, status in statuses.items() if status in SETTLEABLE}
+        result.skipped = len(statuses) - len(pending)
+        lowest = ranked(
+            ProcurementParticipant.objects.using(using).filter(procurement_id__in=pending)
+        ).filter(bid_rank=1).values_list('procurement_id', 'pk', 'bid_ties', 'bid_gap')
+
+        winners, awarded, tied = set(), set(), set()
+        for procurement_id, pk, ties, gap in lowest:
+            if gap > 0:
+                continue
+            if ties > 1:
+                tied.add(procurement_id)
+            else:
+                winners.add(pk)
+                awarded.add(procurement_id)
+        failed = pending - awarded - tied
+        result.awarded, result.failed, result.tied = len(awarded), len(failed), len(tied)
+        if not awarded and not failed:
+            return result
+
+        participants = ProcurementParticipant.objects.using(using).filter(procurement_id__in=awarded | failed)
+        participants.update(status=Case(When(pk__in=winners, then=Value('winner')), default=Value('loser')))
+        Procurement.objects.using(using).filter(pk__in=awarded | failed).update(
+            status=Case(When(pk__in=awarded, then=Value('winner_selected')), default=Value('failed')),
+        )
+    return result
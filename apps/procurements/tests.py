@@ -1,3 +1,342 @@
+import datetime
+import io
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.procurements import analytics, ranking
+from apps.procurements.importers import ProcurementParticipantImporter
+from apps.procurements.models import (
+    Procurement,
+    ProcurementParticipant,
+    VendorProcurementMonth,
+    VendorProcurementSummary,
+)
+from apps.projects.models import Project
+from apps.vendors.models import Vendor
+
+
+def make_vendor(name, **kwargs):
+    return Vendor.objects.create(
+        name=name, vendor_type='PT', email=f'{name.lower()}@example.com', phone='021',
+        npwp=f'npwp-{name.lower()}', **kwargs,
+    )
+
+
+class ProcurementFixtureMixin:
+    @classmethod
+    def setUpTestData(cls):
+        today = datetime.date(2025, 3, 1)
+        cls.project = Project.objects.create(
+            project_name='Jembatan', project_value=Decimal('1500000.00'),
+            start_date=today, end_date=today + datetime.timedelta(days=90), status='planning',
+        )
+        cls.procurement = Procurement.objects.create(
+            project=cls.project, procurement_type='lelang', status='open',
+            start_date=today, end_date=today + datetime.timedelta(days=30),
+        )
+        cls.vendors = [make_vendor(name) for name in ('Alpha', 'Beta', 'Gamma')]
+        cls.bids = [
+            ProcurementParticipant.objects.create(
+                procurement=cls.procurement, vendor=vendor, bid_value=Decimal(value),
+                submission_date=today, status='submitted',
+            )
+            for vendor, value in zip(cls.vendors, ['1000000.00', '1000000.00', '1400000.00'])
+        ]
+
+
+class ParticipantImportTests(ProcurementFixtureMixin, TestCase):
+    def run_import(self, text):
+        return ProcurementParticipantImporter().run(io.BytesIO(text.encode('utf-8')), 'bids.csv')
+
+    def test_update_without_status_keeps_it(self):
+        ProcurementParticipant.objects.filter(pk=self.bids[0].pk).update(status='winner')
+        result = self.run_import(
+            'procurement,vendor_npwp,bid_value,submission_date\n'
+            f'{self.procurement.pk},npwp-alpha,900000,2025-03-02\n'
+        )
+        self.assertEqual((result.updated, result.failed), (1, 0))
+        bid = ProcurementParticipant.objects.get(pk=self.bids[0].pk)
+        self.assertEqual((bid.bid_value, bid.status), (Decimal('900000.00'), 'winner'))
+
+    def test_new_bid_defaults_to_submitted(self):
+        vendor = make_vendor('Delta')
+        result = self.run_import(
+            'procurement,vendor_npwp,bid_value,submission_date,status\n'
+            f'{self.procurement.pk},npwp-delta,1200000,2025-03-02,\n'
+        )
+        self.assertEqual(result.created, 1)
+        self.assertEqual(ProcurementParticipant.objects.get(vendor=vendor).status, 'submitted')
+
+
+class ParticipantSearchTests(ProcurementFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        with cls.captureOnCommitCallbacks(execute=True):
+            super().setUpTestData()
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+    def results(self, term):
+        response = self.client.get(reverse('admin:procurements_procurementparticipant_changelist'), {'q': term})
+        return set(response.context['cl'].result_list)
+
+    def test_each_word_matches_project_or_vendor(self):
+        self.assertEqual(self.results('jembatan alpha'), {self.bids[0]})
+        self.assertEqual(self.results('jembatan'), set(self.bids))
+        self.assertEqual(self.results('alpha beta'), set())
+
+
+class VendorStatisticsTests(ProcurementFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        with cls.captureOnCommitCallbacks(execute=True):
+            super().setUpTestData()
+
+    def summary(self, vendor):
+        return VendorProcurementSummary.objects.filter(vendor=vendor).first()
+
+    def settle(self, winner):
+        with self.captureOnCommitCallbacks(execute=True):
+            for bid in self.bids:
+                bid.status = 'winner' if bid == winner else 'loser'
+                bid.save()
+
+    def test_bids_counted_on_commit(self):
+        summary = self.summary(self.vendors[0])
+        self.assertEqual((summary.participations, summary.decided, summary.wins), (1, 0, 0))
+        self.assertIsNone(summary.win_rate)
+        self.assertAlmostEqual(summary.bid_ratio, 1000000 / 1500000)
+        month = VendorProcurementMonth.objects.get(vendor=self.vendors[0])
+        self.assertEqual(month.month, datetime.date(2025, 3, 1))
+
+    def test_status_change(self):
+        self.settle(self.bids[1])
+        winner, loser = self.summary(self.vendors[1]), self.summary(self.vendors[0])
+        self.assertEqual((winner.wins, winner.win_rate, winner.awarded_total), (1, 1.0, Decimal('1000000.00')))
+        self.assertEqual((loser.wins, loser.win_rate, loser.awarded_total), (0, 0.0, 0))
+
+    def test_moved_and_deleted_bids(self):
+        bid = self.bids[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            bid.submission_date = datetime.date(2025, 5, 3)
+            bid.save()
+        self.assertEqual(
+            list(VendorProcurementMonth.objects.filter(vendor=self.vendors[0]).values_list('month', flat=True)),
+            [datetime.date(2025, 5, 1)],
+        )
+        delta = make_vendor('Delta')
+        with self.captureOnCommitCallbacks(execute=True):
+            bid.vendor = delta
+            bid.save()
+        self.assertIsNone(self.summary(self.vendors[0]))
+        self.assertEqual(self.summary(delta).participations, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            bid.delete()
+        self.assertIsNone(self.summary(delta))
+
+    def test_project_value_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.project_value = Decimal('2000000.00')
+            self.project.save()
+        self.assertAlmostEqual(self.summary(self.vendors[0]).bid_ratio, 0.5)
+
+    def test_procurement_moved_to_another_project(self):
+        project = Project.objects.create(
+            project_name='Bendungan', project_value=Decimal('4000000.00'),
+            start_date=self.project.start_date, end_date=self.project.end_date, status='planning',
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.procurement.project = project
+            self.procurement.save()
+        self.assertAlmostEqual(self.summary(self.vendors[0]).bid_ratio, 0.25)
+
+    def test_queryset_updates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            # Filtered on the field it changes: the bids are found beforehand.
+            ProcurementParticipant.objects.filter(pk=self.bids[2].pk, status='submitted').update(status='winner')
+        self.assertEqual(self.summary(self.vendors[2]).wins, 1)
+
+        delta = make_vendor('Delta')
+        with self.captureOnCommitCallbacks(execute=True):
+            ProcurementParticipant.objects.filter(vendor=self.vendors[2]).update(
+                vendor=delta, submission_date=datetime.date(2025, 6, 2),
+            )
+        self.assertIsNone(self.summary(self.vendors[2]))
+        self.assertEqual(VendorProcurementMonth.objects.get(vendor=delta).month, datetime.date(2025, 6, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.filter(project_value=self.project.project_value).update(project_value=Decimal('2000000'))
+        self.assertAlmostEqual(self.summary(self.vendors[0]).bid_ratio, 0.5)
+
+        project = Project.objects.create(
+            project_name='Bendungan', project_value=Decimal('4000000.00'),
+            start_date=self.project.start_date, end_date=self.project.end_date, status='planning',
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Procurement.objects.filter(project=self.project).update(project=project)
+        self.assertAlmostEqual(self.summary(self.vendors[0]).bid_ratio, 0.25)
+
+        # Fields the figures do not read refresh nothing.
+        with self.captureOnCommitCallbacks() as callbacks:
+            ProcurementParticipant.objects.update(file='bid.pdf')
+            Procurement.objects.update(status='evaluation')
+        self.assertNotIn(analytics._flush, [callback.func for callback in callbacks])
+
+    def test_refreshes_lock_their_vendors_first(self):
+        keys = [(vendor.pk, datetime.date(2025, 3, 1)) for vendor in self.vendors]
+        for run in (lambda: analytics.refresh(keys), lambda: analytics.rebuild_vendors([pk for pk, _ in keys])):
+            with CaptureQueriesContext(connection) as queries:
+                run()
+            # The first statement after the savepoint, before any bid is read.
+            sql = [query['sql'] for query in queries if not query['sql'].startswith('SAVEPOINT')][0]
+            self.assertIn('FROM "vendors_vendor"', sql)
+            self.assertIn('ORDER BY "vendors_vendor"."id"', sql)
+        self.assertEqual(self.summary(self.vendors[0]).participations, 1)
+
+    def test_import_refreshes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ProcurementParticipantImporter().run(io.BytesIO((
+                'procurement,vendor_npwp,bid_value,submission_date,status\n'
+                f'{self.procurement.pk},npwp-alpha,1000000,2025-03-02,winner\n'
+            ).encode('utf-8')), 'bids.csv')
+        self.assertEqual(self.summary(self.vendors[0]).wins, 1)
+
+    def test_rebuild_command(self):
+        VendorProcurementMonth.objects.all().delete()
+        VendorProcurementSummary.objects.all().delete()
+        ProcurementParticipant.objects.filter(pk=self.bids[0].pk).update(status='winner')
+        call_command('rebuild_vendor_stats', '--chunk-size', '2', stdout=io.StringIO())
+        self.assertEqual(VendorProcurementSummary.objects.count(), 3)
+        self.assertEqual(self.summary(self.vendors[0]).wins, 1)
+        self.assertEqual(VendorProcurementMonth.objects.count(), 3)
+
+    def test_vendor_admin(self):
+        self.settle(self.bids[0])
+        delta = make_vendor('Delta')
+        self.client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x'))
+        changelist = reverse('admin:vendors_vendor_changelist')
+        # Sorted by win rate, descending: vendors without decided bids last.
+        response = self.client.get(changelist, {'o': '-6'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_list[0], self.vendors[0])
+        self.assertEqual(response.context['cl'].result_list[3], delta)
+        # Coalesced rather than NULL, which PostgreSQL sorts first on DESC.
+        self.assertIn('COALESCE', str(response.context['cl'].result_list.query))
+        response = self.client.get(changelist, {'o': '6'})
+        self.assertEqual(response.context['cl'].result_list[0], delta)
+        response = self.client.get(changelist, {'o': '-5'})
+        self.assertContains(response, 'Rp 1.000.000')
+        response = self.client.get(reverse('admin:vendors_vendor_report'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['top_awarded']), [self.summary(self.vendors[0])])
+
+
+class BidRankingTests(ProcurementFixtureMixin, TestCase):
+    def add_procurement(self, *values):
+        procurement = Procurement.objects.create(
+            project=self.project, procurement_type='lelang', status='evaluation',
+            start_date=self.procurement.start_date, end_date=self.procurement.end_date,
+        )
+        for vendor, value in zip(self.vendors, values):
+            ProcurementParticipant.objects.create(
+                procurement=procurement, vendor=vendor, bid_value=Decimal(value),
+                submission_date=procurement.start_date, status='submitted',
+            )
+        return procurement
+
+    def test_ranks_and_ties(self):
+        bids = ranking.ranked(ProcurementParticipant.objects.filter(procurement=self.procurement))
+        ranks = {bid.vendor_id: (bid.bid_rank, bid.bid_ties, bid.bid_gap) for bid in bids}
+        self.assertEqual(ranks, {
+            self.vendors[0].pk: (1, 2, Decimal('-500000.00')),
+            self.vendors[1].pk: (1, 2, Decimal('-500000.00')),
+            self.vendors[2].pk: (3, 1, Decimal('-100000.00')),
+        })
+
+    def test_attach_ranks_ignores_filters(self):
+        bid = ProcurementParticipant.objects.get(pk=self.bids[2].pk)
+        ranking.attach_ranks([bid])
+        self.assertEqual((bid.bid_rank, bid.bid_ties), (3, 1))
+
+    def test_attach_ranks_without_the_bid(self):
+        bids = list(ProcurementParticipant.objects.filter(pk__in=[self.bids[0].pk, self.bids[2].pk]))
+        ProcurementParticipant.objects.filter(pk=self.bids[0].pk).delete()
+        ranking.attach_ranks(bids)
+        self.assertEqual(
+            {bid.pk: (bid.bid_rank, bid.bid_gap) for bid in bids},
+            {self.bids[0].pk: (None, None), self.bids[2].pk: (2, Decimal('-100000.00'))},
+        )
+
+    def test_settle(self):
+        won = self.add_procurement('1200000', '1100000', '1300000')
+        over = self.add_procurement('1600000', '1700000')
+        empty = self.add_procurement()
+        self.procurement.status = 'evaluation'
+        self.procurement.save()
+        done = self.add_procurement('1000000')
+        done.status = 'winner_selected'
+        done.save()
+        procurements = Procurement.objects.filter(pk__in=[won.pk, over.pk, empty.pk, self.procurement.pk, done.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            # Savepoint, lock, ranks, 2 updates, the vendors to refresh and
+            # the release, whatever the number of procurements.
+            with self.assertNumQueries(7):
+                result = ranking.settle(procurements)
+        self.assertEqual((result.awarded, result.failed, result.tied, result.skipped), (1, 2, 1, 1))
+        statuses = dict(Procurement.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[pk] for pk in (won.pk, over.pk, empty.pk, self.procurement.pk, done.pk)],
+            ['winner_selected', 'failed', 'failed', 'evaluation', 'winner_selected'],
+        )
+        self.assertEqual(
+            dict(won.participants.values_list('vendor_id', 'status')),
+            {self.vendors[0].pk: 'loser', self.vendors[1].pk: 'winner', self.vendors[2].pk: 'loser'},
+        )
+        self.assertEqual(set(over.participants.values_list('status', flat=True)), {'loser'})
+        self.assertEqual(set(self.procurement.participants.values_list('status', flat=True)), {'submitted'})
+        self.assertEqual(VendorProcurementSummary.objects.get(vendor=self.vendors[1]).wins, 1)
+
+    def test_admin(self):
+        procurement = self.add_procurement('1200000', '1100000')
+        self.client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x'))
+        response = self.client.get(
+            reverse('admin:procurements_procurementparticipant_changelist'), {'vendor__id__exact': self.vendors[2].pk},
+        )
+        self.assertContains(response, '#3')
+        response = self.client.get(reverse('admin:procurements_procurement_change', args=[self.procurement.pk]))
+        self.assertContains(response, 'seri 2')
+        response = self.client.post(reverse('admin:procurements_procurement_changelist'), {
+            'action': 'settle_bids', '_selected_action': [procurement.pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Procurement.objects.get(pk=procurement.pk).status, 'winner_selected')
+
+
+class LargeForeignKeyTests(ProcurementFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for number in range(20):
+            make_vendor(f'Lain{number}')
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x'))
 
-# Create your tests here.
+    def test_large_tables_are_not_loaded(self):
+        # Vendors and procurements are autocompleted: only the selected ones render.
+        for url, budget in [
+            (reverse('admin:procurements_procurementparticipant_change', args=[self.bids[0].pk]), 12),
+            (reverse('admin:procurements_procurement_change', args=[self.procurement.pk]), 12),
+        ]:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotContains(response, 'Lain1')
+            self.assertLessEqual(len(queries), budget, url)
@@ -1,14 +1,15 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models import Sum
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.contrib import messages
+from apps.core.admin import FastPaginationMixin, IndexedSearchMixin, export_as_csv, export_as_xlsx
 from apps.projects.models import Project
 from apps.projects.filters import ProjectValueFilter, ProjectDurationFilter
+from apps.projects.stats import project_statistics
 
 
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(FastPaginationMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_display = [
         'project_name_display',
         'project_value_display', 
@@ -17,11 +18,20 @@ class ProjectAdmin(admin.ModelAdmin):
         'status_display',
         'duration_display'
     ]
-    list_filter = ['status',  'end_date']
+    list_filter = ['status',  'end_date', ProjectDurationFilter]
     search_fields = ['project_name']
     date_hierarchy = 'start_date'
     list_per_page = 20
-    actions = ['mark_as_ongoing', 'mark_as_completed', 'mark_as_cancelled']
+    query_budget = {'changelist': 10, 'change': 6}
+    actions = ['mark_as_ongoing', 'mark_as_completed', 'mark_as_cancelled', export_as_csv, export_as_xlsx]
+    export_fields = [
+        ('project_name', 'Nama Proyek'),
+        ('project_value', 'Nilai Proyek'),
+        ('start_date', 'Tanggal Mulai'),
+        ('end_date', 'Tanggal Selesai'),
+        ('duration_days', 'Durasi (hari)'),
+        ('status', 'Status'),
+    ]
     
     fieldsets = (
         ('Project Info', {
@@ -132,8 +142,8 @@ class ProjectAdmin(admin.ModelAdmin):
     status_display.admin_order_field = 'status'
 
     def duration_display(self, obj):
-        duration = (obj.end_date - obj.start_date).days
-        
+        duration = obj.duration_days
+
         if duration >= 365:
             years = duration // 365
             months = (duration % 365) // 30
@@ -162,6 +172,7 @@ class ProjectAdmin(admin.ModelAdmin):
             color, color, icon, color, duration_text
         )
     duration_display.short_description = 'Durasi'
+    duration_display.admin_order_field = 'duration_days'
 
     class Media:
         css = {
@@ -198,24 +209,21 @@ class ProjectAdmin(admin.ModelAdmin):
     mark_as_cancelled.short_description = '❌ Tandai sebagai Cancelled'
 
     def changelist_view(self, request, extra_context=None):
-        # Add summary statistics
-        extra_context = extra_context or {}
-        
-        # Calculate statistics
-        total_projects = Project.objects.count()
-        total_value = Project.objects.aggregate(Sum('project_value'))['project_value__sum'] or 0
-         # Format as Rupiah (e.g., 10.000.000)
-        formatted_total_value = f"Rp {total_value:,.0f}".replace(",", ".")
-        
-        status_counts = {}
-        for status_code, status_label in Project.STATUS:
-            status_counts[status_code] = Project.objects.filter(status=status_code).count()
-        
-        extra_context['total_projects'] = total_projects
-        extra_context['total_value'] = formatted_total_value
-        extra_context['status_counts'] = status_counts
-        
-        return super().changelist_view(request, extra_context=extra_context)
+        response = super().changelist_view(request, extra_context=extra_context)
+
+        # Add summary statistics for the filtered changelist
+        context = getattr(response, 'context_data', None)
+        if context is None or 'cl' not in context:
+            return response
+        stats = project_statistics(context['cl'].queryset)
+
+        # Format as Rupiah (e.g., 10.000.000)
+        formatted_total_value = f"Rp {stats['total_value']:,.0f}".replace(",", ".")
+
+        context['total_projects'] = stats['total_projects']
+        context['total_value'] = formatted_total_value
+        context['status_counts'] = stats['status_counts']
+        return response
 
 
 admin.site.register(Project, ProjectAdmin)
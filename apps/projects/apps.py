@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ProjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.projects'
+
+    def ready(self):
+        from apps.core import search
+        from apps.projects.models import Project
+
+        search.register(Project, ['project_name'])
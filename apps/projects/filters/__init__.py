@@ -38,28 +38,10 @@ class ProjectDurationFilter(admin.SimpleListFilter):
         )
 
     def queryset(self, request, queryset):
-        from datetime import timedelta
-        
         if self.value() == 'short':
-            projects = []
-            for project in queryset:
-                if (project.end_date - project.start_date).days < 30:
-                    projects.append(project.id)
-            return queryset.filter(id__in=projects)
-        
+            return queryset.filter(duration_days__lt=30)
         elif self.value() == 'medium':
-            projects = []
-            for project in queryset:
-                duration = (project.end_date - project.start_date).days
-                if 30 <= duration < 365:
-                    projects.append(project.id)
-            return queryset.filter(id__in=projects)
-        
+            return queryset.filter(duration_days__gte=30, duration_days__lt=365)
         elif self.value() == 'long':
-            projects = []
-            for project in queryset:
-                if (project.end_date - project.start_date).days >= 365:
-                    projects.append(project.id)
-            return queryset.filter(id__in=projects)
-        
+            return queryset.filter(duration_days__gte=365)
         return queryset
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+def backfill_duration_days(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    batch = []
+    for project in Project.objects.only('start_date', 'end_date').iterator(chunk_size=2000):
+        project.duration_days = (project.end_date - project.start_date).days
+        batch.append(project)
+        if len(batch) >= 2000:
+            Project.objects.bulk_update(batch, ['duration_days'])
+            batch = []
+    if batch:
+        Project.objects.bulk_update(batch, ['duration_days'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='duration_days',
+            field=models.IntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_duration_days, migrations.RunPython.noop),
+    ]
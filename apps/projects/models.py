@@ -1,5 +1,38 @@
 from django.db import models
-from apps.core.models import TimeStampedModel
+from apps.core.models import TimeStampedModel, TimeStampedQuerySet
+
+
+class DaysBetween(models.Func):
+    """Whole days from the second date to the first, computed by the database."""
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = models.IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(', **extra_context,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template='DATEDIFF(%(expressions)s)', arg_joiner=', ', **extra_context,
+        )
+
+
+class ProjectQuerySet(TimeStampedQuerySet):
+    def update(self, **kwargs):
+        # save() keeps duration_days in step; an update of the dates must too.
+        if {'start_date', 'end_date'} & set(kwargs):
+            kwargs['duration_days'] = DaysBetween(
+                kwargs.get('end_date', models.F('end_date')),
+                kwargs.get('start_date', models.F('start_date')),
+            )
+        return super().update(**kwargs)
+
+    update.alters_data = True
+
+
 # Create your models here.# apps/projects/models.py
 class Project(TimeStampedModel):
     STATUS = [
@@ -14,6 +47,27 @@ class Project(TimeStampedModel):
     start_date = models.DateField()
     end_date = models.DateField()
     status = models.CharField(max_length=20, choices=STATUS)
+    # Denormalized (end_date - start_date).days so duration filters and
+    # sorting are indexed range queries instead of Python-side scans.
+    duration_days = models.IntegerField(default=0, editable=False, db_index=True)
+
+    objects = ProjectQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # date_hierarchy (min/max and drill-down ranges), the end_date
+            # filter and the sortable date columns.
+            models.Index(fields=['start_date'], name='project_start_date_idx'),
+            models.Index(fields=['end_date'], name='project_end_date_idx'),
+            models.Index(fields=['status', 'start_date'], name='project_status_start_idx'),
+        ]
 
     def __str__(self):
         return self.project_name
+
+    def save(self, *args, **kwargs):
+        self.duration_days = (self.end_date - self.start_date).days
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'start_date', 'end_date'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'duration_days'}
+        super().save(*args, **kwargs)
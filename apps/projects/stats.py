@@ -0,0 +1,53 @@
+import hashlib
+
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Count, Q, Sum
+
+from apps.core import cache
+from apps.projects.models import Project
+
+STATS_CACHE_TIMEOUT = 300
+STATS_NAMESPACE = 'projects:stats'
+
+
+def project_statistics(queryset):
+    """
+    Total, value sum and per-status counts and value sums of ``queryset`` in
+    one query.
+
+    Results are cached per filtered query and dropped whenever a Project is
+    saved, deleted or bulk updated (see apps.core.cache).
+    """
+    queryset = queryset.order_by()
+
+    def compute():
+        aggregates = {
+            'total': Count('pk'),
+            'total_value': Sum('project_value'),
+        }
+        for status_code, status_label in Project.STATUS:
+            aggregates[status_code] = Count('pk', filter=Q(status=status_code))
+            aggregates[f'{status_code}_value'] = Sum('project_value', filter=Q(status=status_code))
+        row = queryset.aggregate(**aggregates)
+
+        return {
+            'total_projects': row['total'],
+            'total_value': row['total_value'] or 0,
+            'status_counts': {
+                status_code: row[status_code] for status_code, _ in Project.STATUS
+            },
+            'status_values': {
+                status_code: row[f'{status_code}_value'] or 0 for status_code, _ in Project.STATUS
+            },
+        }
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        # The filters match nothing, e.g. ``pk__in=[]`` from a search without
+        # hits: there is no SQL to key on, and Django answers the aggregate
+        # with zeros without querying.
+        return compute()
+    digest = hashlib.md5(f'{sql}|{params!r}'.encode('utf-8')).hexdigest()
+    cache_key = cache.cache_key(STATS_NAMESPACE, digest, models=[Project])
+    return cache.get_or_set(cache_key, compute, STATS_CACHE_TIMEOUT)
@@ -1,3 +1,86 @@
+import datetime
+import importlib
+from decimal import Decimal
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from apps.projects.models import Project
+from apps.projects.stats import project_statistics
+
+
+class ProjectStatisticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        start = datetime.date(2025, 1, 1)
+        for name, value, status in [('Jalan', '100.00', 'planning'), ('Pelabuhan', '250.00', 'ongoing')]:
+            Project.objects.create(
+                project_name=name, project_value=Decimal(value), status=status,
+                start_date=start, end_date=start + datetime.timedelta(days=30),
+            )
+
+    def test_statistics(self):
+        stats = project_statistics(Project.objects.all())
+        self.assertEqual(stats['total_projects'], 2)
+        self.assertEqual(stats['total_value'], Decimal('350.00'))
+        self.assertEqual(stats['status_counts']['ongoing'], 1)
+
+    def test_empty_result_set(self):
+        with self.assertNumQueries(0):
+            stats = project_statistics(Project.objects.filter(pk__in=[]))
+        self.assertEqual(stats['total_projects'], 0)
+        self.assertEqual(stats['total_value'], 0)
+        self.assertEqual(set(stats['status_counts'].values()), {0})
+
+    def test_changelist_search_without_hits(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x'))
+        response = self.client.get(reverse('admin:projects_project_changelist'), {'q': 'tidakada'})
+        self.assertEqual(response.status_code, 200)
+
+
+class ProjectDurationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        start = datetime.date(2025, 1, 1)
+        cls.projects = [
+            Project.objects.create(
+                project_name=name, project_value=Decimal('100.00'), status='planning',
+                start_date=start, end_date=start + datetime.timedelta(days=days),
+            )
+            for name, days in [('Pendek', 10), ('Sedang', 90), ('Panjang', 400)]
+        ]
+
+    def durations(self):
+        return dict(Project.objects.values_list('project_name', 'duration_days'))
+
+    def test_save(self):
+        self.assertEqual(self.durations(), {'Pendek': 10, 'Sedang': 90, 'Panjang': 400})
+        project = self.projects[0]
+        project.end_date = datetime.date(2025, 3, 2)
+        project.save(update_fields=['end_date'])
+        self.assertEqual(self.durations()['Pendek'], 60)
+
+    def test_update(self):
+        Project.objects.filter(pk=self.projects[0].pk).update(start_date=datetime.date(2024, 12, 22))
+        Project.objects.filter(pk=self.projects[1].pk).update(
+            start_date=datetime.date(2025, 2, 1), end_date=datetime.date(2025, 2, 11),
+        )
+        Project.objects.filter(pk=self.projects[2].pk).update(status='ongoing')
+        self.assertEqual(self.durations(), {'Pendek': 20, 'Sedang': 10, 'Panjang': 400})
+
+    def test_backfill_migration(self):
+        Project.objects.update(duration_days=0)
+        migration = importlib.import_module('apps.projects.migrations.0002_project_duration_days')
+        migration.backfill_duration_days(apps, None)
+        self.assertEqual(self.durations(), {'Pendek': 10, 'Sedang': 90, 'Panjang': 400})
 
-# Create your tests here.
+    def test_duration_filter(self):
+        Project.objects.filter(pk=self.projects[2].pk).update(end_date=datetime.date(2025, 1, 21))
+        self.client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x'))
+        results = {}
+        for value in ('short', 'medium', 'long'):
+            response = self.client.get(reverse('admin:projects_project_changelist'), {'duration': value})
+            results[value] = {project.project_name for project in response.context['cl'].result_list}
+        self.assertEqual(results, {'short': {'Pendek', 'Panjang'}, 'medium': {'Sedang'}, 'long': set()})
@@ -1,23 +1,52 @@
+from decimal import Decimal
+
 from django.contrib import admin
 from apps.vendors.models import Vendor, VendorDocument
 from apps.persons.models import Person
+from apps.core.admin import (
+    DocumentComplianceMixin,
+    FastPaginationMixin,
+    ImportAdminMixin,
+    IndexedSearchMixin,
+    PresignedFileInlineFormSet,
+    export_as_csv,
+    export_as_xlsx,
+)
+from apps.core.forms import DirectUploadForm
+from apps.vendors.importers import VendorImporter
+from django.core.exceptions import PermissionDenied
+from django.db.models.functions import Coalesce
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils.html import format_html
 
+from apps.procurements import analytics
+from apps.procurements.models import VendorProcurementSummary
+
+# Vendors ranked by win rate need at least this many decided bids.
+REPORT_MIN_DECIDED = 3
+
 
 class VendorPersonsInline(admin.TabularInline):  # Atau gunakan StackedInline
     model = Person
     extra = 0  # Jumlah form kosong yang ditampilkan
     fields = ["full_name", "role","email", "phone"]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('vendor')
+
 
 # Register your models here.
 class VendorDocumentInline(admin.TabularInline):  # Atau gunakan StackedInline
     model = VendorDocument
+    form = DirectUploadForm
+    formset = PresignedFileInlineFormSet
     extra = 0  # Jumlah form kosong yang ditampilkan
     fields = ["vendor",  "document_type", "title", 'file', 'file_link',]
     readonly_fields = ('file_link',)
 
-    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('vendor')
 
     def file_link(self, obj):
         if not obj.file:
@@ -29,13 +58,30 @@ class VendorDocumentInline(admin.TabularInline):  # Atau gunakan StackedInline
 
     file_link.short_description = "File URL"
 
-class VendorAdmin(admin.ModelAdmin):
+class VendorAdmin(FastPaginationMixin, DocumentComplianceMixin, ImportAdminMixin, IndexedSearchMixin, admin.ModelAdmin):
     model = Vendor
-    #change_list_template = 'admin/vendors/vendor/change_list.html'
-    list_display = ["name", "vendor_type", "email"]
-    list_filter = ["vendor_type"]
-    search_fields = ("name", "npwp", "persons__full_name")
+    importer_class = VendorImporter
+    change_list_template = 'admin/vendors/vendor/change_list.html'
+    list_display = [
+        "name", "vendor_type", "email", "compliance",
+        "participations", "win_rate", "bid_ratio", "awarded_total",
+    ]
+    # The procurement figures are kept per vendor (apps.procurements.analytics).
+    list_select_related = ('procurement_summary',)
+    list_filter = ["vendor_type", "compliance_status"]
+    # Short terms only; the search index also covers address, persons and documents.
+    search_fields = ("name", "npwp")
     inlines = [VendorDocumentInline, VendorPersonsInline] 
+    query_budget = {'changelist': 8, 'change': 12}
+    actions = [export_as_csv, export_as_xlsx]
+    export_fields = [
+        ('name', 'Nama Vendor'),
+        ('vendor_type', 'Jenis Vendor'),
+        ('npwp', 'NPWP'),
+        ('address', 'Alamat'),
+        ('email', 'Email'),
+        ('phone', 'Telepon'),
+    ]
 
     fieldsets = (
         ('Vendor Info', {
@@ -48,5 +94,59 @@ class VendorAdmin(admin.ModelAdmin):
         }),
     )
 
+    def _summary(self, obj):
+        # None for vendors without bids.
+        return getattr(obj, 'procurement_summary', None)
+
+    # Vendors without bids have no summary row: the columns sort them as zero
+    # (the ratios as -1), not where each backend puts NULLs.
+    @admin.display(description='Partisipasi', ordering=Coalesce('procurement_summary__participations', 0))
+    def participations(self, obj):
+        summary = self._summary(obj)
+        return summary.participations if summary else 0
+
+    @admin.display(description='Win rate', ordering=Coalesce('procurement_summary__win_rate', -1.0))
+    def win_rate(self, obj):
+        summary = self._summary(obj)
+        if summary is None or summary.win_rate is None:
+            return '-'
+        return f'{summary.win_rate:.0%} ({summary.wins}/{summary.decided})'
+
+    @admin.display(description='BID / Nilai Proyek', ordering=Coalesce('procurement_summary__bid_ratio', -1.0))
+    def bid_ratio(self, obj):
+        summary = self._summary(obj)
+        if summary is None or summary.bid_ratio is None:
+            return '-'
+        return f'{summary.bid_ratio:.1%}'
+
+    @admin.display(description='Nilai Menang', ordering=Coalesce('procurement_summary__awarded_total', Decimal(0)))
+    def awarded_total(self, obj):
+        summary = self._summary(obj)
+        return f'Rp {summary.awarded_total if summary else 0:,.0f}'.replace(',', '.')
+
+    def get_urls(self):
+        return [
+            path(
+                'report/',
+                self.admin_site.admin_view(self.report_view),
+                name='vendors_vendor_report',
+            ),
+        ] + super().get_urls()
+
+    def report_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        top = VendorProcurementSummary.objects.select_related('vendor')
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Laporan Pengadaan Vendor',
+            'months': analytics.vendors_by_month(12),
+            'top_awarded': top.filter(awarded_total__gt=0).order_by('-awarded_total')[:20],
+            'top_win_rate': top.filter(decided__gte=REPORT_MIN_DECIDED).order_by('-win_rate', '-decided')[:20],
+            'min_decided': REPORT_MIN_DECIDED,
+        }
+        return TemplateResponse(request, 'admin/vendors/vendor/procurement_report.html', context)
+
 
 admin.site.register(Vendor, VendorAdmin)
\ No newline at end of file
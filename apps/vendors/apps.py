@@ -4,4 +4,9 @@ from django.apps import AppConfig
 class VendorsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.vendors'
-  
+
+    def ready(self):
+        from apps.core import search
+        from apps.vendors.models import Vendor
+
+        search.register(Vendor, ['name', 'npwp', 'address', 'persons__full_name', 'documents__title'])
@@ -0,0 +1,17 @@
+from apps.core.imports import BaseImporter
+from apps.vendors.models import Vendor
+
+
+class VendorImporter(BaseImporter):
+    """
+    Columns: npwp, name, vendor_type, email, phone and optionally address.
+    Upserts by npwp.
+    """
+    model = Vendor
+    fields = ('npwp', 'name', 'vendor_type', 'address', 'email', 'phone')
+    key_fields = ('npwp',)
+    required_columns = ('npwp', 'name', 'vendor_type', 'email', 'phone')
+
+    def existing(self, keys):
+        npwps = [npwp for (npwp,) in keys]
+        return {(obj.npwp,): obj for obj in Vendor.objects.filter(npwp__in=npwps)}
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0007_alter_vendordocument_file'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['vendor_type', 'id'], name='vendor_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendordocument',
+            index=models.Index(fields=['expired_date'], name='vendordoc_expired_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:57
+
+import apps.core.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0008_admin_indexes'),
+    ]
+
+    # Only the Python-side default changes. Skip the schema editor, which
+    # would rebuild every table on SQLite for it.
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='vendor',
+                name='id',
+                field=models.UUIDField(default=apps.core.ids.new_uuid, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='vendordocument',
+                name='id',
+                field=models.UUIDField(default=apps.core.ids.new_uuid, editable=False, primary_key=True, serialize=False),
+            ),
+        ]),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:49
+
+import datetime
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+from django.utils import timezone
+
+# Frozen copy of apps.core.expiry, on the historical models. The first
+# expiry run has no checkpoint yet and recomputes every vendor with the
+# configured COMPLIANCE_EXPIRING_DAYS.
+EXPIRING_DAYS = 30
+
+
+def backfill_compliance(apps, schema_editor):
+    Vendor = apps.get_model('vendors', 'Vendor')
+    VendorDocument = apps.get_model('vendors', 'VendorDocument')
+    rows = VendorDocument.objects.values_list('vendor_id', 'document_type').annotate(
+        latest=Max('expired_date'), dated=Count('expired_date'), total=Count('pk'),
+    ).order_by()
+    expire_on = {}
+    for owner_id, _, latest, dated, total in rows:
+        current = expire_on.setdefault(owner_id, None)
+        if dated < total:
+            # An undated document of this type: the type never expires.
+            continue
+        expire_on[owner_id] = latest if current is None else min(current, latest)
+
+    today = timezone.localdate()
+    changed = []
+    for owner in Vendor.objects.filter(pk__in=expire_on).only('pk').iterator(chunk_size=2000):
+        date = expire_on[owner.pk]
+        if date is None:
+            continue
+        if date < today:
+            status = 'expired'
+        elif date <= today + datetime.timedelta(days=EXPIRING_DAYS):
+            status = 'expiring'
+        else:
+            status = 'valid'
+        owner.documents_expire_on, owner.compliance_status = date, status
+        changed.append(owner)
+    Vendor.objects.bulk_update(changed, ['documents_expire_on', 'compliance_status'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0009_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendor',
+            name='compliance_status',
+            field=models.CharField(choices=[('valid', 'Valid'), ('expiring', 'Segera kedaluwarsa'), ('expired', 'Kedaluwarsa'), ('none', 'Tanpa masa berlaku')], default='none', editable=False, max_length=10, verbose_name='status dokumen'),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='documents_expire_on',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='dokumen berlaku s.d.'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['compliance_status', 'id'], name='vendor_compliance_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['documents_expire_on', 'id'], name='vendor_expire_on_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendordocument',
+            index=models.Index(fields=['updated_at'], name='vendordoc_updated_idx'),
+        ),
+        migrations.RunPython(backfill_compliance, migrations.RunPython.noop),
+    ]
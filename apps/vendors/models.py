@@ -1,7 +1,7 @@
 from django.db import models
-from apps.core.models import TimeStampedModel
+from apps.core.models import DocumentOwnerModel, TimeStampedModel
 from django.conf import settings
-from apps.core.utils import generate_presigned_url, safe_name
+from apps.core.utils import generate_presigned_url, safe_name, storage_key
 
 
 
@@ -11,7 +11,7 @@ def document_upload_to(instance, filename):
     return f"{env}/vendors/{vendor_name}/{filename}"
 
 
-class Vendor(TimeStampedModel):
+class Vendor(DocumentOwnerModel):
     VENDOR_TYPE = [
         ('PT', 'PT'),
         ('CV', 'CV'),
@@ -26,6 +26,16 @@ class Vendor(TimeStampedModel):
     email = models.EmailField()
     phone = models.CharField(max_length=50)
 
+    class Meta:
+        indexes = [
+            # vendor_type filter, in the changelist's -id order.
+            models.Index(fields=['vendor_type', 'id'], name='vendor_type_idx'),
+            # compliance_status filter, and the documents_expire_on column
+            # and range (apps.core.expiry).
+            models.Index(fields=['compliance_status', 'id'], name='vendor_compliance_idx'),
+            models.Index(fields=['documents_expire_on', 'id'], name='vendor_expire_on_idx'),
+        ]
+
     def __str__(self):
         return self.name
     
@@ -45,9 +55,18 @@ class VendorDocument(TimeStampedModel):
     document_type = models.CharField(max_length=20, choices=DOCUMENT_TYPE)
     title = models.CharField(max_length=255)
     file = models.FileField(upload_to=document_upload_to)
+    # The uploaded file's own name; blob names are hashes (apps.core.blobs).
+    file_name = models.CharField('nama file asli', max_length=255, blank=True, editable=False)
     issued_date = models.DateField(null=True, blank=True)
     expired_date = models.DateField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['expired_date'], name='vendordoc_expired_idx'),
+            # Documents changed since the last expiry run.
+            models.Index(fields=['updated_at'], name='vendordoc_updated_idx'),
+        ]
+
     def __str__(self):
         return f'{self.vendor.name}-{self.document_type}-{self.title}'
     
@@ -56,10 +75,10 @@ class VendorDocument(TimeStampedModel):
     def signed_file_url(self):
         if not self.file:
             return None
-        key = f"{settings.AWS_LOCATION}/{self.file.name}"
         return generate_presigned_url(
-            key,
-            expires_in=3600
+            storage_key(self.file.name),
+            expires_in=3600,
+            filename=self.file_name,
         )
     
     
@@ -1,3 +1,71 @@
+import io
+
 from django.test import TestCase
 
-# Create your tests here.
+from apps.vendors.importers import VendorImporter
+from apps.vendors.models import Vendor
+
+
+def csv_file(text):
+    return io.BytesIO(text.encode('utf-8'))
+
+
+def xlsx_file(*rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    output = io.BytesIO()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+class VendorImportTests(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(
+            name='Alpha', npwp='01.234', vendor_type='PT', email='alpha@example.com',
+            phone='021', address='Jl. Merdeka 1',
+        )
+
+    def test_update_keeps_columns_missing_from_the_file(self):
+        result = VendorImporter().run(csv_file(
+            'npwp,name,vendor_type,email,phone\n'
+            '01.234,Alpha Baru,CV,baru@example.com,022\n'
+        ), 'vendors.csv')
+        self.assertEqual((result.created, result.updated, result.failed), (0, 1, 0))
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.name, 'Alpha Baru')
+        self.assertEqual(self.vendor.vendor_type, 'CV')
+        self.assertEqual(self.vendor.address, 'Jl. Merdeka 1')
+
+    def test_empty_optional_cell_clears_it(self):
+        VendorImporter().run(csv_file(
+            'npwp,name,vendor_type,email,phone,address\n'
+            '01.234,Alpha,PT,alpha@example.com,021,\n'
+        ), 'vendors.csv')
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.address, '')
+
+    def test_required_columns_are_reported_per_row(self):
+        result = VendorImporter().run(csv_file(
+            'npwp,name,vendor_type,email,phone\n'
+            '02.345,Beta,PT,,023\n'
+            '03.456,Gamma,PT,gamma@example.com,024\n'
+        ), 'vendors.csv')
+        self.assertEqual((result.created, result.failed), (1, 1))
+        self.assertEqual(result.errors[0][0], 2)
+        self.assertIn('email', result.errors[0][1])
+        self.assertFalse(Vendor.objects.filter(npwp='02.345').exists())
+
+    def test_xlsx_numeric_cells_match_text_keys(self):
+        Vendor.objects.create(name='Beta', npwp='123456789012345', vendor_type='PT', email='b@example.com', phone='021')
+        result = VendorImporter().run(xlsx_file(
+            ('npwp', 'name', 'vendor_type', 'email', 'phone'),
+            (123456789012345, 'Beta Baru', 'PT', 'beta@example.com', 21500),
+            (234567890123456.0, 'Gamma', 'CV', 'gamma@example.com', '022'),
+        ), 'vendors.xlsx')
+        self.assertEqual((result.created, result.updated, result.failed), (1, 1, 0))
+        self.assertEqual(Vendor.objects.get(npwp='123456789012345').phone, '21500')
+        self.assertTrue(Vendor.objects.filter(npwp='234567890123456', name='Gamma').exists())
@@ -18,7 +18,10 @@ from django.urls import path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from apps.core.views import direct_upload_presign
+
 urlpatterns = [
+    path('admin/direct-upload/', direct_upload_presign, name='direct_upload_presign'),
     path('admin/', admin.site.urls),
 ]
 
@@ -0,0 +1,40 @@
+# Gunicorn settings, read automatically from the working directory.
+#
+# Each worker thread holds at most one database connection (kept open for
+# DATABASE_CONN_MAX_AGE in session mode), so the connections per instance are
+# GUNICORN_WORKERS * GUNICORN_THREADS; keep that times the number of Cloud Run
+# instances below the server's max_connections, or use DATABASE_POOL_MODE=
+# transaction behind PgBouncer.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '1'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+# Recycle workers now and then so a slow leak cannot grow forever.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = 100
+
+
+def post_fork(server, worker):
+    # A connection opened in the master (e.g. with --preload) must not be
+    # shared by the forked workers.
+    from django.db import connections
+
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    # Fill the dashboard caches before the first request; with a shared
+    # cache only the first worker of a deploy computes them.
+    from django.db import connections
+
+    from apps.core import dashboard
+
+    try:
+        dashboard.warm()
+    except Exception:
+        # E.g. before the first migrate: the page computes them itself.
+        worker.log.exception('Warming the dashboard cache failed')
+    finally:
+        connections.close_all()
@@ -0,0 +1,139 @@
+/*
+ * Uploads files picked in a DirectUploadWidget straight to the bucket.
+ *
+ * 1. Hash the file (SHA-256) and ask Django for a presigned POST. Storage is
+ *    content-addressed, so a file that is already stored comes back as
+ *    "exists" and is not transferred again. Without WebCrypto (plain http)
+ *    the key follows the model's upload_to, so the row's relations are sent.
+ * 2. POST the file to the bucket.
+ * 3. Put the returned name in the hidden input; the form only submits that,
+ *    and the file's own name (blob names are hashes).
+ */
+(function () {
+    'use strict';
+
+    var pending = 0;
+
+    function csrfToken(form) {
+        var input = form && form.querySelector('input[name=csrfmiddlewaretoken]');
+        if (input) {
+            return input.value;
+        }
+        var match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : '';
+    }
+
+    function relatedValues(wrapper, hidden) {
+        var related = JSON.parse(wrapper.dataset.related || '{}');
+        // A relation picked in the same row (e.g. the vendor select) wins
+        // over the value the row was rendered with.
+        var prefix = hidden.name.slice(0, hidden.name.length - wrapper.dataset.field.length);
+        var form = hidden.form;
+        JSON.parse(wrapper.dataset.relatedFields || '[]').forEach(function (name) {
+            var input = form && form.elements[prefix + name];
+            if (input && input.value) {
+                related[name] = input.value;
+            }
+        });
+        return related;
+    }
+
+    function sha256Hex(file) {
+        if (!window.crypto || !window.crypto.subtle) {
+            return Promise.resolve('');
+        }
+        return file.arrayBuffer().then(function (buffer) {
+            return window.crypto.subtle.digest('SHA-256', buffer);
+        }).then(function (digest) {
+            return Array.prototype.map.call(new Uint8Array(digest), function (byte) {
+                return ('0' + byte.toString(16)).slice(-2);
+            }).join('');
+        });
+    }
+
+    function setStatus(wrapper, text, isError) {
+        var status = wrapper.querySelector('.direct-upload-status');
+        status.textContent = text;
+        status.style.color = isError ? '#ba2121' : '';
+    }
+
+    function upload(input) {
+        var wrapper = input.closest('.direct-upload');
+        var hidden = wrapper.querySelector('input[data-direct-upload-name]');
+        var filename = wrapper.querySelector('input[data-direct-upload-filename]');
+        var file = input.files[0];
+        hidden.value = '';
+        filename.value = '';
+        if (!file) {
+            return;
+        }
+
+        var body = new FormData();
+        body.append('model', wrapper.dataset.model);
+        body.append('field', wrapper.dataset.field);
+        body.append('filename', file.name);
+        body.append('size', file.size);
+        var related = relatedValues(wrapper, hidden);
+        Object.keys(related).forEach(function (name) {
+            body.append(name, related[name]);
+        });
+
+        pending += 1;
+        setStatus(wrapper, 'Menghitung checksum…');
+        sha256Hex(file).then(function (sha256) {
+            body.append('sha256', sha256);
+            setStatus(wrapper, 'Mengunggah…');
+            return fetch(wrapper.dataset.presignUrl, {
+                method: 'POST',
+                body: body,
+                credentials: 'same-origin',
+                headers: {'X-CSRFToken': csrfToken(hidden.form)}
+            });
+        }).then(function (response) {
+            return response.json().then(function (data) {
+                if (!response.ok) {
+                    throw new Error(data.error || response.statusText);
+                }
+                return data;
+            });
+        }).then(function (data) {
+            if (data.exists) {
+                hidden.value = data.name;
+                filename.value = file.name;
+                setStatus(wrapper, 'Sudah tersimpan: ' + file.name);
+                return;
+            }
+            var post = new FormData();
+            Object.keys(data.fields).forEach(function (name) {
+                post.append(name, data.fields[name]);
+            });
+            post.append('file', file);
+            return fetch(data.url, {method: 'POST', body: post}).then(function (response) {
+                if (!response.ok) {
+                    throw new Error('Upload ke storage gagal (' + response.status + ')');
+                }
+                hidden.value = data.name;
+                filename.value = file.name;
+                setStatus(wrapper, 'Terunggah: ' + file.name);
+            });
+        }).catch(function (error) {
+            input.value = '';
+            setStatus(wrapper, error.message, true);
+        }).finally(function () {
+            pending -= 1;
+        });
+    }
+
+    document.addEventListener('change', function (event) {
+        if (event.target.matches('input[type=file][data-direct-upload]')) {
+            upload(event.target);
+        }
+    });
+
+    document.addEventListener('submit', function (event) {
+        if (pending > 0) {
+            event.preventDefault();
+            window.alert('Tunggu hingga semua file selesai diunggah.');
+        }
+    });
+})();